@@ -0,0 +1,45 @@
+.global _start
+
+.text
+_start:
+    la      gp, .data
+    # Select the events of the counters
+    li      t0, 16          # Mispredicted branches and jumps
+    csrw    mhpmevent3, t0
+    li      t0, 17          # Refetch cycles
+    csrw    mhpmevent4, t0
+    # Call a function with a loop 64 times
+    li      s0, 64
+    li      s1, 0
+loop:
+    jal     sum
+    add     s1, s1, a0
+    addi    s0, s0, -1
+    bnez    s0, loop
+    # Stop the counters and save them with the result
+    li      t0, -1
+    csrw    mcountinhibit, t0
+    csrr    t0, mhpmcounter3
+    sw      t0, 0(gp)
+    csrr    t0, mhpmcounter4
+    sw      t0, 4(gp)
+    sw      s1, 8(gp)
+    ecall
+
+# Sum of 1 to 8, plus 1 from a nested call linking to t0.
+# Aligned so that the branches and jumps do not share BTB entries.
+.align 6
+sum:
+    li      a0, 0
+    li      t1, 8
+inner:
+    add     a0, a0, t1
+    addi    t1, t1, -1
+    bnez    t1, inner
+    jal     t0, one
+    add     a0, a0, t2
+    ret
+
+one:
+    li      t2, 1
+    jr      t0
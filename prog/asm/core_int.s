@@ -27,8 +27,9 @@ ret_umode:
     csrw    mepc, t0
     mret
 main:
-    # Loop 100 times
+    # Loop 100 times, tell the test at 0x1018 that the loop is running
     li      s0, 100
+    sw      s0, 24(gp)
 loop:
     addi    s0, s0, -1
     bnez    s0, loop
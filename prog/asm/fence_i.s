@@ -0,0 +1,23 @@
+.global _start
+
+.text
+_start:
+    la      gp, .data
+    la      t0, patch
+    li      t2, 1 << 20     # 1 in the immediate of an I-type instruction
+    li      s0, 4
+loop:
+patch:
+    # Rewritten by the loop, 1 then 2, 3, 4
+    li      a0, 1
+    sw      a0, 0(gp)
+    addi    gp, gp, 4
+    # Increment the immediate of the li above, then
+    # synchronize the fetches with the store
+    lw      t1, 0(t0)
+    add     t1, t1, t2
+    sw      t1, 0(t0)
+    fence.i
+    addi    s0, s0, -1
+    bnez    s0, loop
+    ecall
@@ -0,0 +1,78 @@
+.global _start
+
+.text
+_start:
+    la      gp, .data
+    # Select the events of the counters
+    li      t0, 9           # Multiplications
+    csrw    mhpmevent3, t0
+    li      t0, 10          # Divisions
+    csrw    mhpmevent4, t0
+    li      t0, 8           # AMO, LR and SC
+    csrw    mhpmevent5, t0
+    li      t0, 5           # Taken branches
+    csrw    mhpmevent6, t0
+    li      t0, 1           # Fetch stall cycles
+    csrw    mhpmevent7, t0
+    li      t0, 2           # Memory stall cycles
+    csrw    mhpmevent8, t0
+    li      t0, 9           # Multiplications, not counted in M-mode
+    csrw    mhpmevent9, t0
+    li      t0, 0x40000000  # MINH
+    csrw    mhpmevent9h, t0
+    li      t0, 9           # Multiplications, 2 before the overflow
+    csrw    mhpmevent10, t0
+    li      t0, -1
+    csrw    mhpmcounter10h, t0
+    li      t0, -2
+    csrw    mhpmcounter10, t0
+    # Loop 16 times
+    li      s0, 16
+    addi    s1, gp, 0x100
+loop:
+    mul     t1, s0, s0
+    div     t2, t1, s0
+    amoadd.w t3, s0, (s1)
+    lr.w    t3, (s1)
+    sc.w    t4, t3, (s1)
+    addi    s0, s0, -1
+    bnez    s0, loop
+    # Stop the counters and save them
+    li      t0, -1
+    csrw    mcountinhibit, t0
+    csrr    t0, mhpmcounter3
+    sw      t0, 0(gp)
+    csrr    t0, mhpmcounter4
+    sw      t0, 4(gp)
+    csrr    t0, mhpmcounter5
+    sw      t0, 8(gp)
+    csrr    t0, mhpmcounter6
+    sw      t0, 12(gp)
+    csrr    t0, mhpmcounter7
+    sw      t0, 16(gp)
+    csrr    t0, mhpmcounter8
+    sw      t0, 20(gp)
+    csrr    t0, mhpmcounter9
+    sw      t0, 24(gp)
+    csrr    t0, mhpmcounter10
+    sw      t0, 28(gp)
+    csrr    t0, mhpmcounter10h
+    sw      t0, 32(gp)
+    csrr    t0, scountovf
+    sw      t0, 36(gp)
+    csrr    t0, mip
+    sw      t0, 40(gp)
+    # Take the overflow interrupt
+    la      t0, _trap_hdlr
+    csrw    mtvec, t0
+    li      t0, 0x2000      # LCOFIE
+    csrs    mie, t0
+    csrsi   mstatus, 0x8    # MIE
+end:
+    j       end
+_trap_hdlr:
+    csrr    t0, mcause
+    # The ecall below traps here too
+    bgez    t0, end
+    sw      t0, 44(gp)
+    ecall
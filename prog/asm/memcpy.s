@@ -0,0 +1,64 @@
+.global _start
+
+.text
+_start:
+    la      a0, .data               # 1024 words to copy
+    la      a1, .data + 0x2000      # Copy of the words
+    la      a2, .data + 0x4000      # Copy of the first 256 bytes
+    la      a3, .data + 0x5000      # Results
+    # Copy the words
+    mv      t0, a0
+    mv      t1, a1
+    li      s0, 1024
+copy_word:
+    lw      t2, 0(t0)
+    sw      t2, 0(t1)
+    addi    t0, t0, 4
+    addi    t1, t1, 4
+    addi    s0, s0, -1
+    bnez    s0, copy_word
+    # Copy the first bytes one by one
+    mv      t0, a0
+    mv      t1, a2
+    li      s0, 256
+copy_byte:
+    lbu     t2, 0(t0)
+    sb      t2, 0(t1)
+    addi    t0, t0, 1
+    addi    t1, t1, 1
+    addi    s0, s0, -1
+    bnez    s0, copy_byte
+    # Sum the copied words
+    mv      t1, a1
+    li      s0, 1024
+    li      s1, 0
+sum_word:
+    lw      t2, 0(t1)
+    add     s1, s1, t2
+    addi    t1, t1, 4
+    addi    s0, s0, -1
+    bnez    s0, sum_word
+    sw      s1, 0(a3)
+    # Increment a counter with LR/SC and another one with AMOADD, 16 times
+    addi    t0, a3, 4
+    addi    t1, a3, 8
+    li      s0, 16
+atomic:
+    lr.w    t2, (t0)
+    addi    t2, t2, 1
+    sc.w    t3, t2, (t0)
+    bnez    t3, atomic
+    li      t2, 1
+    amoadd.w zero, t2, (t1)
+    addi    s0, s0, -1
+    bnez    s0, atomic
+    # A store to the reserved word makes the SC fail
+    addi    t0, a3, 12
+    lr.w    t2, (t0)
+    sw      t2, 0(t0)
+    sc.w    t3, t2, (t0)
+    sw      t3, 16(a3)
+    # Write the dirty lines of a write-back D-cache back to the RAM
+    fence.i
+end:
+    ecall
@@ -0,0 +1,35 @@
+#include "bench.h"
+
+static uint32_t start_cycle;
+static uint32_t start_instret;
+
+static inline uint32_t read_mcycle() {
+    uint32_t value;
+    asm volatile ("csrr %0, mcycle" : "=r"(value));
+    return value;
+}
+
+static inline uint32_t read_minstret() {
+    uint32_t value;
+    asm volatile ("csrr %0, minstret" : "=r"(value));
+    return value;
+}
+
+// Start counting the cycles and the retired instructions
+void bench_start() {
+    __mailbox.done = 0;
+    start_instret  = read_minstret();
+    start_cycle    = read_mcycle();
+}
+
+// Stop counting, then write the results to the mailbox.
+// The low words of the counters are enough for the length of the benchmarks.
+void bench_stop(uint32_t iterations, uint32_t checksum) {
+    uint32_t cycle   = read_mcycle();
+    uint32_t instret = read_minstret();
+    __mailbox.iterations = iterations;
+    __mailbox.cycles     = cycle - start_cycle;
+    __mailbox.instret    = instret - start_instret;
+    __mailbox.checksum   = checksum;
+    __mailbox.done       = BENCH_DONE;
+}
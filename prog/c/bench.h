@@ -0,0 +1,29 @@
+#ifndef __BENCH_H__
+#define __BENCH_H__
+
+#include <stdint.h>
+
+#define BENCH_DONE  0x600dbeef
+
+// Results of a benchmark, read by the testbench after the ecall
+struct bench_result {
+    uint32_t  done;         // BENCH_DONE once the other fields are written
+    uint32_t  iterations;
+    uint32_t  cycles;
+    uint32_t  instret;
+    uint32_t  checksum;     // Result of the kernel, checked by the testbench
+};
+
+// Mailbox at the end of the RAM of link.ld
+extern volatile struct bench_result __mailbox;
+
+// Next value of the pseudo-random inputs
+static inline uint32_t lcg(uint32_t x) { return x * 1664525 + 1013904223; }
+
+// Start counting the cycles and the retired instructions
+void bench_start();
+
+// Stop counting, then write the results to the mailbox
+void bench_stop(uint32_t iterations, uint32_t checksum);
+
+#endif
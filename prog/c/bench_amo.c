@@ -0,0 +1,41 @@
+#include "bench.h"
+
+#define ITERATIONS  256
+
+static volatile uint32_t lock;
+static volatile uint32_t shared;
+static volatile uint32_t counter;
+static volatile uint32_t value;
+
+// Spin lock on amoswap.w.aq, released by a store after a fence
+static inline void lock_acquire(volatile uint32_t* l) {
+    while (__atomic_exchange_n(l, 1, __ATOMIC_ACQUIRE)) ;
+}
+
+static inline void lock_release(volatile uint32_t* l) {
+    __atomic_store_n(l, 0, __ATOMIC_RELEASE);
+}
+
+// This program takes a lock, bumps a counter with amoadd.w and a value with
+// an lr.w/sc.w loop, ITERATIONS times. The checksum adds the three results.
+int main() {
+    lock    = 0;
+    shared  = 0;
+    counter = 0;
+    value   = 0;
+
+    bench_start();
+    for (int i = 0; i < ITERATIONS; i++) {
+        lock_acquire(&lock);
+        shared += i;
+        lock_release(&lock);
+
+        __atomic_fetch_add(&counter, 1, __ATOMIC_RELAXED);
+
+        uint32_t old = value;
+        while (!__atomic_compare_exchange_n(&value, &old, old + 2, 0, __ATOMIC_ACQ_REL, __ATOMIC_RELAXED)) ;
+    }
+    bench_stop(ITERATIONS, shared + counter + value);
+
+    return 0;
+}
@@ -0,0 +1,34 @@
+#include "bench.h"
+
+#define ITERATIONS  4
+#define SIZE        256
+
+static uint8_t buf[SIZE];
+
+// CRC-32 (IEEE 802.3), bit by bit, continued from a previous CRC
+static uint32_t crc32(uint32_t crc, uint8_t* data, int len) {
+    crc = ~crc;
+    for (int i = 0; i < len; i++) {
+        crc ^= data[i];
+        for (int j = 0; j < 8; j++)
+            crc = (crc >> 1) ^ (0xedb88320 & -(crc & 1));
+    }
+    return ~crc;
+}
+
+// This program computes the CRC-32 of a buffer repeated ITERATIONS times.
+int main() {
+    uint32_t seed = 1;
+    for (int i = 0; i < SIZE; i++) {
+        seed = lcg(seed);
+        buf[i] = seed >> 24;
+    }
+
+    bench_start();
+    uint32_t crc = 0;
+    for (int i = 0; i < ITERATIONS; i++)
+        crc = crc32(crc, buf, SIZE);
+    bench_stop(ITERATIONS, crc);
+
+    return 0;
+}
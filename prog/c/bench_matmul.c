@@ -0,0 +1,46 @@
+#include "bench.h"
+
+#define ITERATIONS  2
+#define N           16
+
+static int32_t mat_a[N][N];
+static int32_t mat_b[N][N];
+static int32_t mat_c[N][N];
+
+// c = a * b
+static void matmul(int32_t a[N][N], int32_t b[N][N], int32_t c[N][N]) {
+    for (int i = 0; i < N; i++) {
+        for (int j = 0; j < N; j++) {
+            int32_t sum = 0;
+            for (int k = 0; k < N; k++)
+                sum += a[i][k] * b[k][j];
+            c[i][j] = sum;
+        }
+    }
+}
+
+// This program multiplies ITERATIONS pairs of random matrices.
+// The checksum is a hash of the products.
+int main() {
+    uint32_t seed     = 1;
+    uint32_t checksum = 0;
+
+    bench_start();
+    for (int it = 0; it < ITERATIONS; it++) {
+        for (int i = 0; i < N; i++) {
+            for (int j = 0; j < N; j++) {
+                seed = lcg(seed);
+                mat_a[i][j] = (int32_t)seed >> 20;
+                seed = lcg(seed);
+                mat_b[i][j] = (int32_t)seed >> 20;
+            }
+        }
+        matmul(mat_a, mat_b, mat_c);
+        for (int i = 0; i < N; i++)
+            for (int j = 0; j < N; j++)
+                checksum = checksum * 31 + mat_c[i][j];
+    }
+    bench_stop(ITERATIONS, checksum);
+
+    return 0;
+}
@@ -0,0 +1,149 @@
+#include "bench.h"
+
+#define ITERATIONS  4
+#define NODES       32
+#define N           6
+#define LEN         96
+
+// States of the scanner
+#define START       0
+#define INT         1
+#define DECIMAL     2
+#define INVALID     3
+
+struct node {
+    struct node*  next;
+    uint32_t      value;
+};
+
+static struct node  nodes[NODES];
+static int16_t      mat_a[N][N];
+static int16_t      mat_b[N][N];
+static int32_t      mat_c[N][N];
+static char         input[LEN + 1];
+
+// CRC-16 (ARC) of a 16-bit value, bit by bit
+static uint16_t crc16(uint16_t crc, uint16_t value) {
+    crc ^= value;
+    for (int i = 0; i < 16; i++)
+        crc = (crc >> 1) ^ (0xa001 & -(crc & 1));
+    return crc;
+}
+
+static struct node* list_reverse(struct node* head) {
+    struct node* prev = 0;
+    while (head) {
+        struct node* next = head->next;
+        head->next = prev;
+        prev = head;
+        head = next;
+    }
+    return prev;
+}
+
+// Hash of the values in the order of the list
+static uint32_t list_hash(struct node* head) {
+    uint32_t hash = 0;
+    for (; head; head = head->next)
+        hash = hash * 3 + head->value;
+    return hash;
+}
+
+// Sum of the elements of c = a * b
+static int32_t mat_mul(int16_t a[N][N], int16_t b[N][N], int32_t c[N][N]) {
+    int32_t total = 0;
+    for (int i = 0; i < N; i++) {
+        for (int j = 0; j < N; j++) {
+            int32_t sum = 0;
+            for (int k = 0; k < N; k++)
+                sum += a[i][k] * b[k][j];
+            c[i][j] = sum;
+            total += sum;
+        }
+    }
+    return total;
+}
+
+// Count the integers, decimals and invalid tokens of a comma separated input
+static uint32_t scan(const char* s) {
+    uint32_t ints     = 0;
+    uint32_t decimals = 0;
+    uint32_t invalids = 0;
+    int state = START;
+    for (;; s++) {
+        char c = *s;
+        if (c == ',' || c == 0) {
+            if (state == INT)
+                ints++;
+            else if (state == DECIMAL)
+                decimals++;
+            else if (state == INVALID)
+                invalids++;
+            state = START;
+            if (c == 0)
+                break;
+        } else if (c >= '0' && c <= '9') {
+            if (state == START)
+                state = INT;
+        } else if (c == '.') {
+            state = (state == INT) ? DECIMAL : INVALID;
+        } else {
+            state = INVALID;
+        }
+    }
+    return ints | decimals << 8 | invalids << 16;
+}
+
+// This program runs a mix of list, matrix, state machine and CRC kernels,
+// in the spirit of CoreMark. The checksum is the CRC of their results.
+int main() {
+    uint32_t seed = 1;
+    for (int i = 0; i < NODES; i++) {
+        seed = lcg(seed);
+        nodes[i].next  = (i + 1 < NODES) ? &nodes[i + 1] : 0;
+        nodes[i].value = seed >> 16;
+    }
+    for (int i = 0; i < N; i++) {
+        for (int j = 0; j < N; j++) {
+            seed = lcg(seed);
+            mat_a[i][j] = (int32_t)seed >> 24;
+            seed = lcg(seed);
+            mat_b[i][j] = (int32_t)seed >> 24;
+        }
+    }
+    for (int i = 0; i < LEN; i++) {
+        seed = lcg(seed);
+        uint32_t r = seed >> 28;
+        if (r < 10)
+            input[i] = '0' + r;
+        else if (r < 13)
+            input[i] = ',';
+        else if (r < 15)
+            input[i] = '.';
+        else
+            input[i] = 'x';
+    }
+    input[LEN] = 0;
+
+    bench_start();
+    struct node* head = nodes;
+    uint16_t crc = 0;
+    for (int it = 0; it < ITERATIONS; it++) {
+        head = list_reverse(head);
+        uint32_t hash = list_hash(head);
+        crc = crc16(crc, hash);
+        crc = crc16(crc, hash >> 16);
+
+        int32_t total = mat_mul(mat_a, mat_b, mat_c);
+        crc = crc16(crc, total);
+        mat_a[it][it] += 1;
+
+        input[it * 13] = ',';
+        uint32_t tokens = scan(input);
+        crc = crc16(crc, tokens);
+        crc = crc16(crc, tokens >> 16);
+    }
+    bench_stop(ITERATIONS, crc);
+
+    return 0;
+}
@@ -0,0 +1,87 @@
+#include "bench.h"
+
+#define ITERATIONS      32
+#define PAGES           64
+#define RAM_PAGES       257     // The RAM of link.ld and the page of the mailbox
+
+#define SATP_SV32       0x80000000
+#define MSTATUS_MPP     0x1800
+#define MSTATUS_MPP_S   0x0800
+#define MSTATUS_MPRV    0x20000
+
+#define PTE_V           0x01
+#define PTE_R           0x02
+#define PTE_W           0x04
+#define PTE_X           0x08
+#define PTE_A           0x40
+#define PTE_D           0x80
+
+static uint32_t root[1024]  __attribute__((aligned(4096)));
+static uint32_t table[1024] __attribute__((aligned(4096)));
+// One node per page, at a different offset in each page
+static uint32_t pool[PAGES][1024] __attribute__((aligned(4096)));
+static uint32_t order[PAGES];
+
+static uint32_t* node(int i) {
+    return &pool[order[i]][(i * 4) & 1023];
+}
+
+// Map the RAM to itself with 4 KiB pages, then translate the loads and
+// stores of M-mode as S-mode ones
+static void translate_on() {
+    root[0] = ((uint32_t)table >> 12) << 10 | PTE_V;
+    for (int i = 1; i < 1024; i++)
+        root[i] = 0;
+    for (int i = 0; i < 1024; i++)
+        table[i] = (i < RAM_PAGES) ? (i << 10 | PTE_V | PTE_R | PTE_W | PTE_X | PTE_A | PTE_D) : 0;
+
+    asm volatile ("csrw satp, %0\n"
+                  "sfence.vma"
+                  :: "r"(SATP_SV32 | (uint32_t)root >> 12) : "memory");
+    asm volatile ("csrc mstatus, %0" :: "r"(MSTATUS_MPP) : "memory");
+    asm volatile ("csrs mstatus, %0" :: "r"(MSTATUS_MPP_S | MSTATUS_MPRV) : "memory");
+}
+
+static void translate_off() {
+    asm volatile ("csrc mstatus, %0" :: "r"(MSTATUS_MPRV) : "memory");
+    asm volatile ("csrw satp, zero" ::: "memory");
+}
+
+// This program follows a circular list with one node per page, every load
+// walks the Sv32 page table. The checksum is a hash of the values visited.
+int main() {
+    uint32_t seed = 1;
+
+    // Shuffle the pages of the nodes
+    for (int i = 0; i < PAGES; i++)
+        order[i] = i;
+    for (int i = PAGES - 1; i > 0; i--) {
+        seed = lcg(seed);
+        int j = seed % (i + 1);
+        uint32_t tmp = order[i];
+        order[i] = order[j];
+        order[j] = tmp;
+    }
+    // Link the nodes: pointer to the next one, then value
+    for (int i = 0; i < PAGES; i++) {
+        seed = lcg(seed);
+        uint32_t* n = node(i);
+        n[0] = (uint32_t)node((i + 1) % PAGES);
+        n[1] = seed;
+    }
+
+    translate_on();
+    bench_start();
+    uint32_t* n = node(0);
+    uint32_t checksum = 0;
+    for (int it = 0; it < ITERATIONS; it++) {
+        for (int i = 0; i < PAGES; i++) {
+            checksum = checksum * 31 + n[1];
+            n = (uint32_t*)n[0];
+        }
+    }
+    bench_stop(ITERATIONS, checksum);
+    translate_off();
+
+    return 0;
+}
@@ -0,0 +1,40 @@
+#include "bench.h"
+
+#define ITERATIONS  8
+#define SIZE        64
+
+static uint32_t data[SIZE];
+
+// Insertion sort, in place
+static void sort(uint32_t* a, int len) {
+    for (int i = 1; i < len; i++) {
+        uint32_t x = a[i];
+        int j = i - 1;
+        while (j >= 0 && a[j] > x) {
+            a[j + 1] = a[j];
+            j--;
+        }
+        a[j + 1] = x;
+    }
+}
+
+// This program sorts ITERATIONS arrays of random words.
+// The checksum is a hash of the sorted arrays.
+int main() {
+    uint32_t seed     = 1;
+    uint32_t checksum = 0;
+
+    bench_start();
+    for (int it = 0; it < ITERATIONS; it++) {
+        for (int i = 0; i < SIZE; i++) {
+            seed = lcg(seed);
+            data[i] = seed;
+        }
+        sort(data, SIZE);
+        for (int i = 0; i < SIZE; i++)
+            checksum = checksum * 31 + data[i];
+    }
+    bench_stop(ITERATIONS, checksum);
+
+    return 0;
+}
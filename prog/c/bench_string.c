@@ -0,0 +1,64 @@
+#include "bench.h"
+
+#define ITERATIONS  8
+#define LEN         128
+
+static char src[LEN + 1];
+static char dst[LEN + 1];
+
+static int str_len(const char* s) {
+    int len = 0;
+    while (s[len])
+        len++;
+    return len;
+}
+
+static void str_cpy(char* d, const char* s) {
+    while ((*d++ = *s++)) ;
+}
+
+static int str_cmp(const char* a, const char* b) {
+    while (*a && *a == *b) {
+        a++;
+        b++;
+    }
+    return (uint8_t)*a - (uint8_t)*b;
+}
+
+static void str_upper(char* s) {
+    for (; *s; s++)
+        if (*s >= 'a' && *s <= 'z')
+            *s += 'A' - 'a';
+}
+
+static int str_count(const char* s, char c) {
+    int count = 0;
+    for (; *s; s++)
+        count += (*s == c);
+    return count;
+}
+
+// This program copies, capitalizes, compares and scans ITERATIONS random strings.
+// The checksum is a hash of the results.
+int main() {
+    uint32_t seed     = 1;
+    uint32_t checksum = 0;
+
+    bench_start();
+    for (int it = 0; it < ITERATIONS; it++) {
+        for (int i = 0; i < LEN; i++) {
+            seed = lcg(seed);
+            src[i] = 'a' + (seed >> 28);
+        }
+        src[LEN] = 0;
+        str_cpy(dst, src);
+        // Only the end of the copy, so that the comparison stops in the middle
+        str_upper(dst + it * 8);
+        checksum = checksum * 31 + str_len(dst);
+        checksum = checksum * 31 + str_cmp(src, dst);
+        checksum = checksum * 31 + str_count(dst, 'A' + it);
+    }
+    bench_stop(ITERATIONS, checksum);
+
+    return 0;
+}
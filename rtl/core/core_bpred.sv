@@ -0,0 +1,163 @@
+// Branch predictor of the FETCH stage: a direct-mapped branch target buffer (BTB)
+// of the branches and jumps, with a 2-bit counter per branch, and a return-address
+// stack (RAS) for the calls and returns. The predictions are only hints, the
+// instructions are checked against them in EXEC, which updates the predictor with
+// their outcome. Only the taken branches are allocated, the jumps always are.
+module core_bpred #(
+    parameter  BTB_ENTRIES = 16,  // Power of 2, 0 for no prediction
+    parameter  RAS_DEPTH   = 4    // Power of 2, at least 2
+)(
+    input  logic              clk,
+    input  logic              rst_n,
+    // Prediction of the PC following the fetched instruction
+    input  logic [31:0]       lookup_pc,
+    output logic [31:0]       lookup_next_pc,
+    // Update with the instruction executed in EXEC
+    input  logic              update,
+    input  logic [31:0]       update_pc,
+    input  logic [31:0]       update_instr,
+    input  logic              update_taken,
+    input  logic [31:0]       update_target
+);
+
+    import core_pkg::*;
+
+    typedef enum logic [1:0] {
+        BTB_BRANCH,
+        BTB_JUMP,
+        BTB_CALL,       // JAL/JALR linking to x1 or x5, pushes the RAS
+        BTB_RETURN      // JALR from x1 or x5 without link, pops the RAS
+    } btb_kind_e;
+
+    generate
+        if (BTB_ENTRIES == 0) begin : g_none
+            assign lookup_next_pc = lookup_pc + 4;
+        end
+        else begin : g_bpred
+            localparam INDEX_W = (BTB_ENTRIES > 1) ? $clog2(BTB_ENTRIES) : 1;
+            localparam TAG_LSB = 2 + $clog2(BTB_ENTRIES);
+            localparam TAG_W   = 32 - TAG_LSB;
+            localparam PTR_W   = $clog2(RAS_DEPTH);
+
+            logic [BTB_ENTRIES-1:0] valid;
+            logic [TAG_W-1:0]       tag    [BTB_ENTRIES];
+            logic [31:2]            target [BTB_ENTRIES];
+            btb_kind_e              kind   [BTB_ENTRIES];
+            logic [1:0]             counter[BTB_ENTRIES];   // Taken when >= 2
+            logic [31:2]            ras    [RAS_DEPTH];
+            logic [PTR_W-1:0]       ras_ptr;                // Top of the RAS
+
+            logic [INDEX_W-1:0]     lookup_index;
+            logic                   lookup_hit;
+            logic                   lookup_taken;
+            logic [31:2]            lookup_target;
+            logic [31:2]            ras_top;
+
+            logic [INDEX_W-1:0]     update_index;
+            logic                   update_hit;
+            logic                   update_branch_hit;
+            logic                   update_alloc;
+            btb_kind_e              update_kind;
+            logic                   is_branch;
+            logic                   is_jump;
+            logic                   link_rd;
+            logic                   link_rs1;
+            logic                   ras_push;
+            logic                   ras_pop;
+
+            // ------------------- Lookup ---------------------
+            assign lookup_index = (BTB_ENTRIES > 1) ? INDEX_W'(lookup_pc >> 2) : '0;
+            assign lookup_hit   = valid[lookup_index] & (tag[lookup_index] == lookup_pc[31:TAG_LSB]);
+
+            // The top of the RAS includes the call or return updating it in the same cycle
+            assign ras_top = ras_push ? update_pc[31:2] + 1'b1 : ras[ras_pop ? ras_ptr - 1'b1 : ras_ptr];
+
+            always_comb begin
+                case (kind[lookup_index])
+                    BTB_BRANCH: begin
+                        lookup_taken  = counter[lookup_index][1];
+                        lookup_target = target[lookup_index];
+                    end
+                    BTB_RETURN: begin
+                        lookup_taken  = 1'b1;
+                        lookup_target = ras_top;
+                    end
+                    default: begin
+                        lookup_taken  = 1'b1;
+                        lookup_target = target[lookup_index];
+                    end
+                endcase
+            end
+
+            assign lookup_next_pc = (lookup_hit & lookup_taken) ? {lookup_target, 2'b0} : lookup_pc + 4;
+
+            // ------------------- Update ---------------------
+            assign is_branch = (update_instr[6:0] == OP_BRANCH);
+            assign is_jump   = (update_instr[6:0] == OP_JAL) | (update_instr[6:0] == OP_JALR);
+            assign link_rd   = (update_instr[11:7]  == 5'd1) | (update_instr[11:7]  == 5'd5);
+            assign link_rs1  = (update_instr[19:15] == 5'd1) | (update_instr[19:15] == 5'd5);
+
+            always_comb begin
+                if (is_branch)
+                    update_kind = BTB_BRANCH;
+                else if (link_rd)
+                    update_kind = BTB_CALL;
+                else if ((update_instr[6:0] == OP_JALR) & link_rs1)
+                    update_kind = BTB_RETURN;
+                else
+                    update_kind = BTB_JUMP;
+            end
+
+            assign update_index      = (BTB_ENTRIES > 1) ? INDEX_W'(update_pc >> 2) : '0;
+            assign update_hit        = valid[update_index] & (tag[update_index] == update_pc[31:TAG_LSB]);
+            assign update_branch_hit = update_hit & (kind[update_index] == BTB_BRANCH);
+            assign update_alloc      = update & (is_jump | (is_branch & update_taken));
+
+            assign ras_push = update & is_jump & (update_kind == BTB_CALL);
+            assign ras_pop  = update & is_jump & (update_kind == BTB_RETURN);
+
+            // Valid bits, an entry hit by another instruction than a branch or jump is stale
+            always_ff @(posedge clk or negedge rst_n) begin
+                if (~rst_n)
+                    valid <= '0;
+                else if (update_alloc)
+                    valid[update_index] <= 1'b1;
+                else if (update & update_hit & ~(is_branch & update_branch_hit))
+                    valid[update_index] <= 1'b0;
+            end
+
+            // Tags, targets and kinds
+            always_ff @(posedge clk) begin
+                if (update_alloc) begin
+                    tag[update_index]    <= update_pc[31:TAG_LSB];
+                    target[update_index] <= update_target[31:2];
+                    kind[update_index]   <= update_kind;
+                end
+            end
+
+            // 2-bit saturating counters, a new branch starts weakly taken
+            always_ff @(posedge clk) begin
+                if (update & is_branch & (update_alloc | update_branch_hit)) begin
+                    if (~update_branch_hit)
+                        counter[update_index] <= 2'b10;
+                    else if (update_taken & (counter[update_index] != 2'b11))
+                        counter[update_index] <= counter[update_index] + 1'b1;
+                    else if (~update_taken & (counter[update_index] != 2'b00))
+                        counter[update_index] <= counter[update_index] - 1'b1;
+                end
+            end
+
+            // RAS, wrapping around when full or empty
+            always_ff @(posedge clk or negedge rst_n) begin
+                if (~rst_n)        ras_ptr <= '0;
+                else if (ras_push) ras_ptr <= ras_ptr + 1'b1;
+                else if (ras_pop)  ras_ptr <= ras_ptr - 1'b1;
+            end
+
+            always_ff @(posedge clk) begin
+                if (ras_push) ras[ras_ptr + 1'b1] <= update_pc[31:2] + 1'b1;
+            end
+        end
+    endgenerate
+
+endmodule
@@ -4,11 +4,14 @@ module core_controller (
     // To FETCH stage
     output logic                  fetch_stage_valid,
     input  logic                  fetch_stage_ready,
+    output logic                  fetch_ahead,
+    input  logic                  pc_mispredict,
     // To EXEC stage
     output logic                  exec_stage_valid,
     input  logic                  exec_stage_ready,
     output logic                  exec_phase,
     input  core_pkg::ctrl_path_e  ctrl_path,
+    input  logic                  exec_overlap,
     // To MEM stage
     output logic                  mem_stage_valid,
     input  logic                  mem_stage_ready,
@@ -22,7 +25,8 @@ module core_controller (
     // From Trap handler
     input  logic                  exception_valid,
     input  logic                  m_interrupt_valid,
-    input  logic                  s_interrupt_valid
+    input  logic                  s_interrupt_valid,
+    input  logic                  interrupt_pending
 );
 
     import core_pkg::*;
@@ -43,6 +47,7 @@ module core_controller (
 
     logic   is_mem_op;
     logic   two_phase;
+    logic   retire;
 
     // State machine
     always_ff @(posedge clk or negedge rst_n) begin
@@ -58,9 +63,12 @@ module core_controller (
         else
             case (curr_state)
                 IDLE:    next_state = FETCH_0;
-                FETCH_0: next_state = FETCH_1;
+                FETCH_0: next_state = fetch_stage_ready ? EXEC_0 : FETCH_1;   // I-cache hit
                 FETCH_1: next_state = fetch_stage_ready ? EXEC_0 : FETCH_1;
-                EXEC_0:  next_state = exec_stage_ready  ? (is_mem_op ? MEM_0  : FETCH_0) : EXEC_0;
+                EXEC_0:  if (~exec_stage_ready)  next_state = EXEC_0;
+                         else if (is_mem_op)     next_state = MEM_0;
+                         else if (fetch_ahead)   next_state = fetch_stage_ready ? EXEC_0 : FETCH_1;
+                         else                    next_state = FETCH_0;
                 MEM_0:   next_state = mem_stage_ready   ? (two_phase ? EXEC_1 : FETCH_0) : MEM_0;
                 EXEC_1:  next_state = exec_stage_ready  ? MEM_1   : EXEC_1;
                 MEM_1:   next_state = mem_stage_ready   ? FETCH_0 : MEM_1;
@@ -86,6 +94,16 @@ module core_controller (
         endcase
     end
 
+    // The next instruction is fetched during the EXEC of an instruction that only
+    // executes: no MEM stage needing the Memory interface, no trap and no CSR or
+    // fence, and its next PC was predicted by the FETCH stage. Its result is written
+    // back at the end of EXEC, so the next instruction reads it from the Register
+    // file without any hazard.
+    // A pending interrupt stops the overlap, so that it is taken in FETCH_0.
+    // A fetch completing in the same cycle (I-cache hit) goes straight to EXEC_0,
+    // otherwise it completes in FETCH_1.
+    assign fetch_ahead       = (curr_state == EXEC_0) & exec_overlap & ~pc_mispredict & ~interrupt_pending;
+
     // Output
     assign check_interrupt   = (curr_state == FETCH_0);
     assign fetch_stage_valid = (curr_state == FETCH_0) | (curr_state == FETCH_1);
@@ -108,8 +126,17 @@ module core_controller (
     // Access CSR in EXEC phase
     assign csr_en = exec_stage_valid & exec_stage_ready;
 
-    // Instruction is retired when the next state is FETCH
-    // but not due to an exception
-    assign instr_done = (curr_state != FETCH_0) & (next_state == FETCH_0) & ~exception_valid;
+    // Instruction is retired at the end of its last stage but not due to an exception,
+    // on consecutive cycles when the next instructions are fetched ahead
+    always_comb begin
+        case (curr_state)
+            EXEC_0:  retire = exec_stage_ready & ~is_mem_op;
+            MEM_0:   retire = mem_stage_ready  & ~two_phase;
+            MEM_1:   retire = mem_stage_ready;
+            default: retire = 1'b0;
+        endcase
+    end
+
+    assign instr_done = retire & ~exception_valid;
 
 endmodule
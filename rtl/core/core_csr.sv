@@ -42,6 +42,9 @@ module core_csr (
     output logic                  cfg_mideleg_se,
     output logic                  cfg_mideleg_st,
     output logic                  cfg_mideleg_ss,
+    output logic                  cfg_lcofie,
+    output logic                  cfg_lcofip,
+    output logic                  cfg_mideleg_lcof,
     output logic                  ex_csr_illegal_instr,
     // To Memory interface
     output core_pkg::priv_e       priv_imem,
@@ -49,7 +52,10 @@ module core_csr (
     output logic                  cfg_sum,
     output logic                  cfg_mxr,
     output core_pkg::satp_mode_e  cfg_satp_mode,
+    output logic  [8:0]           cfg_satp_asid,
     output logic [21:0]           cfg_satp_ppn,
+    // HPM events, indexed by hpm_event_e
+    input  logic [31:0]           hpm_event,
     // MTIME direct input
     input  logic [63:0]           mtime,
     // From external
@@ -68,6 +74,7 @@ module core_csr (
     localparam CSR_CYCLEH        = 12'hC80;
     localparam CSR_TIMEH         = 12'hC81;
     localparam CSR_INSTRETH      = 12'hC82;
+    localparam CSR_SCOUNTOVF     = 12'hDA0;
 
     localparam CSR_SSTATUS       = 12'h100;
     localparam CSR_SIE           = 12'h104;
@@ -116,6 +123,9 @@ module core_csr (
     localparam CSR_MINSTRETH     = 12'hB82;
     localparam CSR_MCOUNTINHIBIT = 12'h320;
 
+    // mhpmcounter3 to mhpmcounter10 count events, the others are hardwired to 0
+    localparam HPM_NUM           = 8;
+
     localparam MISA_MXL_32       = 2'b01;
     localparam MISA_EXT_I        = 26'(1 << 8);
     localparam MISA_EXT_M        = 26'(1 << 12);
@@ -136,6 +146,9 @@ module core_csr (
     logic         dec_cycleh;
     logic         dec_timeh;
     logic         dec_instreth;
+    logic [31:3]  dec_hpmcounterx;
+    logic [31:3]  dec_hpmcounterxh;
+    logic         dec_scountovf;
 
     logic         dec_sstatus;
     logic         dec_sie;
@@ -190,6 +203,7 @@ module core_csr (
 
     logic         dec_mcountinhibit;
     logic [31:3]  dec_mhpmeventx;
+    logic [31:3]  dec_mhpmeventxh;
 
     // Actual registers
     logic         sie;
@@ -232,15 +246,19 @@ module core_csr (
     logic         mideleg_st;
     logic         mideleg_ss;
 
+    logic         mideleg_lcof;
+
     logic         seie;
     logic         stie;
     logic         ssie;
     logic         meie;
     logic         mtie;
+    logic         lcofie;
 
     logic         seip;
     logic         stip;
     logic         ssip;
+    logic         lcofip;
 
     logic [63:0]  mcycle;
     logic [63:0]  minstret;
@@ -256,6 +274,17 @@ module core_csr (
     logic         mcountinhibit_cy;
     logic         mcountinhibit_ir;
 
+    // HPM counters, index 0 is mhpmcounter3
+    logic [63:0]  mhpmcounter [HPM_NUM];
+    hpm_event_e   mhpmevent   [HPM_NUM];
+    logic [HPM_NUM-1:0] mhpmevent_of;
+    logic [HPM_NUM-1:0] mhpmevent_minh;
+    logic [HPM_NUM-1:0] mhpmevent_sinh;
+    logic [HPM_NUM-1:0] mhpmevent_uinh;
+    logic [HPM_NUM-1:0] scounteren_hpm;
+    logic [HPM_NUM-1:0] mcounteren_hpm;
+    logic [HPM_NUM-1:0] mcountinhibit_hpm;
+
     logic [31:0]  sscratch;
     logic [31:0]  mscratch;
 
@@ -271,6 +300,7 @@ module core_csr (
     logic         menvcfg_fiom;
 
     satp_mode_e   satp_mode;
+    logic  [8:0]  satp_asid;
     logic [21:0]  satp_ppn;
 
     // Inner value
@@ -284,6 +314,11 @@ module core_csr (
     // Counter helper
     logic [63:0]  next_mcycle;
     logic [63:0]  next_minstret;
+    logic [63:0]  next_mhpmcounter [HPM_NUM];
+    logic [HPM_NUM-1:0] hpm_count;
+    logic [HPM_NUM-1:0] hpm_overflow;
+    logic [HPM_NUM-1:0] hpm_inhibit_priv;
+    logic [31:0]  hpm_rdata;
 
     // Legal commands
     logic         legal_mret;
@@ -310,6 +345,7 @@ module core_csr (
     assign dec_cycleh                   = (csr_id == CSR_CYCLEH);
     assign dec_timeh                    = (csr_id == CSR_TIMEH);
     assign dec_instreth                 = (csr_id == CSR_INSTRETH);
+    assign dec_scountovf                = (csr_id == CSR_SCOUNTOVF);
 
     assign dec_sstatus                  = (csr_id == CSR_SSTATUS);
     assign dec_sie                      = (csr_id == CSR_SIE);
@@ -371,6 +407,9 @@ module core_csr (
             assign dec_mhpmcounterx [i] = (csr_id == 12'hB00 + i);
             assign dec_mhpmcounterxh[i] = (csr_id == 12'hB80 + i);
             assign dec_mhpmeventx   [i] = (csr_id == 12'h320 + i);
+            assign dec_mhpmeventxh  [i] = (csr_id == 12'h720 + i);
+            assign dec_hpmcounterx  [i] = (csr_id == 12'hC00 + i);
+            assign dec_hpmcounterxh [i] = (csr_id == 12'hC80 + i);
         end
     endgenerate
 
@@ -386,36 +425,37 @@ module core_csr (
             CSR_CYCLEH:        csr_rdata_inner = mcycle[63:32];
             CSR_TIMEH:         csr_rdata_inner = mtime[63:32];
             CSR_INSTRETH:      csr_rdata_inner = minstret[63:32];
+            CSR_SCOUNTOVF:     csr_rdata_inner = 32'({mhpmevent_of & ((priv == PRIV_M) ? '1 : mcounteren_hpm), 3'b0});
 
             CSR_SSTATUS:       csr_rdata_inner = {12'b0, mxr, sum, 9'b0, spp, 2'b0, spie, 3'b0, sie, 1'b0};
-            CSR_SIE:           csr_rdata_inner = {22'b0, seie, 3'b0, stie, 3'b0, ssie, 1'b0};
+            CSR_SIE:           csr_rdata_inner = {18'b0, lcofie, 3'b0, seie, 3'b0, stie, 3'b0, ssie, 1'b0};
             CSR_STVEC:         csr_rdata_inner = {stvec_base, stvec_mode};
-            CSR_SCOUNTEREN:    csr_rdata_inner = {29'b0, scounteren_ir, scounteren_tm, scounteren_cy};
+            CSR_SCOUNTEREN:    csr_rdata_inner = 32'({scounteren_hpm, scounteren_ir, scounteren_tm, scounteren_cy});
 
             CSR_SSCRATCH:      csr_rdata_inner = sscratch;
             CSR_SEPC:          csr_rdata_inner = {sepc_base, 2'b00};
             CSR_SCAUSE:        csr_rdata_inner = scause;
             CSR_STVAL:         csr_rdata_inner = stval;
-            CSR_SIP:           csr_rdata_inner = {22'b0, seip, 3'b0, stip, 3'b0, ssip, 1'b0};
+            CSR_SIP:           csr_rdata_inner = {18'b0, lcofip, 3'b0, seip, 3'b0, stip, 3'b0, ssip, 1'b0};
 
             CSR_SENVCFG:       csr_rdata_inner = {31'b0, senvcfg_fiom};
-            CSR_SATP:          csr_rdata_inner = {satp_mode, 9'b0, satp_ppn};
+            CSR_SATP:          csr_rdata_inner = {satp_mode, satp_asid, satp_ppn};
 
             CSR_MSTATUS:       csr_rdata_inner = {9'b0, tsr, tw, tvm, mxr, sum, mprv, 4'b0, mpp, 2'b0, spp, mpie, 1'b0, spie, 1'b0, mie, 1'b0, sie, 1'b0};
             CSR_MSTATUSH:      csr_rdata_inner = 32'b0;
             CSR_MISA:          csr_rdata_inner = {MISA_MXL_32, 4'b0, MISA_EXT};
             CSR_MEDELEG:       csr_rdata_inner = medeleg;
             CSR_MEDELEGH:      csr_rdata_inner = 32'b0;
-            CSR_MIDELEG:       csr_rdata_inner = {22'b0, mideleg_se, 3'b0, mideleg_st, 3'b0, mideleg_ss, 1'b0};
-            CSR_MIE:           csr_rdata_inner = {20'b0, meie, 1'b0, seie, 1'b0, mtie, 1'b0, stie, 3'b0, ssie, 1'b0};
+            CSR_MIDELEG:       csr_rdata_inner = {18'b0, mideleg_lcof, 3'b0, mideleg_se, 3'b0, mideleg_st, 3'b0, mideleg_ss, 1'b0};
+            CSR_MIE:           csr_rdata_inner = {18'b0, lcofie, 1'b0, meie, 1'b0, seie, 1'b0, mtie, 1'b0, stie, 3'b0, ssie, 1'b0};
             CSR_MTVEC:         csr_rdata_inner = {mtvec_base, mtvec_mode};
-            CSR_MCOUNTEREN:    csr_rdata_inner = {29'b0, mcounteren_ir, mcounteren_tm, mcounteren_cy};
+            CSR_MCOUNTEREN:    csr_rdata_inner = 32'({mcounteren_hpm, mcounteren_ir, mcounteren_tm, mcounteren_cy});
 
             CSR_MSCRATCH:      csr_rdata_inner = mscratch;
             CSR_MEPC:          csr_rdata_inner = {mepc_base, 2'b00};
             CSR_MCAUSE:        csr_rdata_inner = mcause;
             CSR_MTVAL:         csr_rdata_inner = mtval;
-            CSR_MIP:           csr_rdata_inner = {20'b0, int_m_ext, 1'b0, seip, 1'b0, mtimer_int, 1'b0, stip, 3'b0, ssip, 1'b0};
+            CSR_MIP:           csr_rdata_inner = {18'b0, lcofip, 1'b0, int_m_ext, 1'b0, seip, 1'b0, mtimer_int, 1'b0, stip, 3'b0, ssip, 1'b0};
 
             CSR_MENVCFG:       csr_rdata_inner = {31'b0, menvcfg_fiom};
 
@@ -423,12 +463,27 @@ module core_csr (
             CSR_MINSTRET:      csr_rdata_inner = minstret[31:0];
             CSR_MCYCLEH:       csr_rdata_inner = mcycle[63:32];
             CSR_MINSTRETH:     csr_rdata_inner = minstret[63:32];
-            CSR_MCOUNTINHIBIT: csr_rdata_inner = {29'b0, mcountinhibit_ir, 1'b0, mcountinhibit_cy};
+            CSR_MCOUNTINHIBIT: csr_rdata_inner = 32'({mcountinhibit_hpm, mcountinhibit_ir, 1'b0, mcountinhibit_cy});
 
-            default:           csr_rdata_inner = 32'b0;
+            default:           csr_rdata_inner = hpm_rdata;
         endcase
     end
 
+    // HPM counters and events, 0 when not implemented
+    always_comb begin
+        hpm_rdata = 32'b0;
+        for (int k = 0; k < HPM_NUM; k++) begin
+            if (dec_mhpmcounterx[k + 3] | dec_hpmcounterx[k + 3])
+                hpm_rdata = mhpmcounter[k][31:0];
+            if (dec_mhpmcounterxh[k + 3] | dec_hpmcounterxh[k + 3])
+                hpm_rdata = mhpmcounter[k][63:32];
+            if (dec_mhpmeventx[k + 3])
+                hpm_rdata = 32'(mhpmevent[k]);
+            if (dec_mhpmeventxh[k + 3])
+                hpm_rdata = {mhpmevent_of[k], mhpmevent_minh[k], mhpmevent_sinh[k], mhpmevent_uinh[k], 28'b0};
+        end
+    end
+
     always_comb begin
         case (csr_id)
             CSR_SIP: csr_rdata = csr_rdata_inner | {22'b0, int_s_ext, 9'b0};
@@ -676,6 +731,18 @@ module core_csr (
         .q        ({mideleg_ss,   mideleg_st,   mideleg_se})
     );
 
+    // mideleg_lcof
+    floper #(
+        .WIDTH    (1),
+        .RST_VAL  (0)
+    ) u_flop_mideleg_lcof(
+        .clk      (clk),
+        .rst_n    (rst_n),
+        .en       (csr_write_en & dec_mideleg),
+        .d        (csr_wdata[13]),
+        .q        (mideleg_lcof)
+    );
+
     // sie
     floper #(
         .WIDTH    (3),
@@ -688,6 +755,18 @@ module core_csr (
         .q        ({seie, stie, ssie})
     );
 
+    // lcofie
+    floper #(
+        .WIDTH    (1),
+        .RST_VAL  (0)
+    ) u_flop_lcofie(
+        .clk      (clk),
+        .rst_n    (rst_n),
+        .en       (csr_write_en & (dec_mie | dec_sie)),
+        .d        (csr_wdata[13]),
+        .q        (lcofie)
+    );
+
     // mie
     floper #(
         .WIDTH    (2),
@@ -724,6 +803,13 @@ module core_csr (
         .q        ({seip, stip})
     );
 
+    // lcofip, set when a counter overflows with its OF bit clear
+    always_ff @(posedge clk or negedge rst_n) begin
+        if (~rst_n)                                  lcofip <= 1'b0;
+        else if (|(hpm_overflow & ~mhpmevent_of))    lcofip <= 1'b1;
+        else if (csr_write_en & (dec_mip | dec_sip)) lcofip <= csr_wdata[13];
+    end
+
     // mcycle
     assign next_mcycle = (~mcountinhibit_cy) ? (mcycle + 1'b1) : mcycle;
 
@@ -756,6 +842,17 @@ module core_csr (
         .q        ({scounteren_ir, scounteren_tm, scounteren_cy})
     );
 
+    floper #(
+        .WIDTH    (HPM_NUM),
+        .RST_VAL  (0)
+    ) u_flop_scounteren_hpm(
+        .clk      (clk),
+        .rst_n    (rst_n),
+        .en       (csr_write_en & dec_scounteren),
+        .d        (csr_wdata[3 +: HPM_NUM]),
+        .q        (scounteren_hpm)
+    );
+
     // mcounteren
     floper #(
         .WIDTH    (3),
@@ -768,6 +865,17 @@ module core_csr (
         .q        ({mcounteren_ir, mcounteren_tm, mcounteren_cy})
     );
 
+    floper #(
+        .WIDTH    (HPM_NUM),
+        .RST_VAL  (0)
+    ) u_flop_mcounteren_hpm(
+        .clk      (clk),
+        .rst_n    (rst_n),
+        .en       (csr_write_en & dec_mcounteren),
+        .d        (csr_wdata[3 +: HPM_NUM]),
+        .q        (mcounteren_hpm)
+    );
+
     // mcountinhibit
     floper #(
         .WIDTH    (2),
@@ -780,6 +888,71 @@ module core_csr (
         .q        ({mcountinhibit_ir, mcountinhibit_cy})
     );
 
+    floper #(
+        .WIDTH    (HPM_NUM),
+        .RST_VAL  (0)
+    ) u_flop_mcountinhibit_hpm(
+        .clk      (clk),
+        .rst_n    (rst_n),
+        .en       (csr_write_en & dec_mcountinhibit),
+        .d        (csr_wdata[3 +: HPM_NUM]),
+        .q        (mcountinhibit_hpm)
+    );
+
+    // mhpmcounter, mhpmevent and mhpmeventh (Sscofpmf)
+    generate
+        for (i = 0; i < HPM_NUM; i++) begin : gen_hpm
+            // Counting is filtered by the privilege mode
+            always_comb begin
+                case (priv)
+                    PRIV_M:  hpm_inhibit_priv[i] = mhpmevent_minh[i];
+                    PRIV_S:  hpm_inhibit_priv[i] = mhpmevent_sinh[i];
+                    default: hpm_inhibit_priv[i] = mhpmevent_uinh[i];
+                endcase
+            end
+
+            assign hpm_count[i]        = ~mcountinhibit_hpm[i] & ~hpm_inhibit_priv[i] & hpm_event[mhpmevent[i]];
+            assign hpm_overflow[i]     = hpm_count[i] & (&mhpmcounter[i]);
+            assign next_mhpmcounter[i] = mhpmcounter[i] + 64'(hpm_count[i]);
+
+            always_ff @(posedge clk or negedge rst_n) begin
+                if (~rst_n)                                       mhpmcounter[i] <= 64'd0;
+                else if (csr_write_en & dec_mhpmcounterx[i + 3])  mhpmcounter[i] <= {next_mhpmcounter[i][63:32], csr_wdata};
+                else if (csr_write_en & dec_mhpmcounterxh[i + 3]) mhpmcounter[i] <= {csr_wdata, next_mhpmcounter[i][31:0]};
+                else                                              mhpmcounter[i] <= next_mhpmcounter[i];
+            end
+
+            floper #(
+                .WIDTH    (5),
+                .RST_VAL  (HPM_NONE)
+            ) u_flop_mhpmevent(
+                .clk      (clk),
+                .rst_n    (rst_n),
+                .en       (csr_write_en & dec_mhpmeventx[i + 3]),
+                .d        (csr_wdata[4:0]),
+                .q        (mhpmevent[i])
+            );
+
+            // OF is set by an overflow, the interrupt is only raised when it was clear
+            always_ff @(posedge clk or negedge rst_n) begin
+                if (~rst_n)                                     mhpmevent_of[i] <= 1'b0;
+                else if (csr_write_en & dec_mhpmeventxh[i + 3]) mhpmevent_of[i] <= csr_wdata[31];
+                else if (hpm_overflow[i])                       mhpmevent_of[i] <= 1'b1;
+            end
+
+            floper #(
+                .WIDTH    (3),
+                .RST_VAL  (0)
+            ) u_flop_mhpmeventh(
+                .clk      (clk),
+                .rst_n    (rst_n),
+                .en       (csr_write_en & dec_mhpmeventxh[i + 3]),
+                .d        (csr_wdata[30:28]),
+                .q        ({mhpmevent_minh[i], mhpmevent_sinh[i], mhpmevent_uinh[i]})
+            );
+        end
+    endgenerate
+
     // sscratch
     floper #(
         .WIDTH    (32),
@@ -874,16 +1047,16 @@ module core_csr (
         .q        (menvcfg_fiom)
     );
 
-    // satp
+    // satp, with the 9 bits of ASID of Sv32
     floper #(
-        .WIDTH    (23),
+        .WIDTH    (32),
         .RST_VAL  (0)
     ) u_flop_satp(
         .clk      (clk),
         .rst_n    (rst_n),
         .en       (csr_write_en & dec_satp),
-        .d        ({csr_wdata[31], csr_wdata[21:0]}),
-        .q        ({satp_mode, satp_ppn})
+        .d        (csr_wdata),
+        .q        ({satp_mode, satp_asid, satp_ppn})
     );
 
     // -------------- Effective privilege -------------
@@ -904,10 +1077,14 @@ module core_csr (
     assign cfg_mideleg_se = mideleg_se;
     assign cfg_mideleg_st = mideleg_st;
     assign cfg_mideleg_ss = mideleg_ss;
+    assign cfg_lcofie     = lcofie;
+    assign cfg_lcofip     = lcofip;
+    assign cfg_mideleg_lcof = mideleg_lcof;
 
     assign cfg_mxr        = mxr;
     assign cfg_sum        = sum;
     assign cfg_satp_mode  = satp_mode;
+    assign cfg_satp_asid  = satp_asid;
     assign cfg_satp_ppn   = satp_ppn;
 
     // --------------- Valid value check --------------
@@ -1012,7 +1189,10 @@ module core_csr (
         dec_cycleh,
         dec_timeh,
         dec_instreth,
+        dec_hpmcounterx,
+        dec_hpmcounterxh,
         // S-mode
+        dec_scountovf,
         dec_sstatus,
         dec_sie,
         dec_stvec,
@@ -1057,7 +1237,8 @@ module core_csr (
         dec_minstreth,
         dec_mhpmcounterxh,
         dec_mcountinhibit,
-        dec_mhpmeventx
+        dec_mhpmeventx,
+        dec_mhpmeventxh
     };
 
     assign legal_mwrite = |{
@@ -1101,7 +1282,8 @@ module core_csr (
         dec_minstreth,
         dec_mhpmcounterxh,
         dec_mcountinhibit,
-        dec_mhpmeventx
+        dec_mhpmeventx,
+        dec_mhpmeventxh
     };
 
     assign legal_sread = |{
@@ -1112,7 +1294,10 @@ module core_csr (
         dec_cycleh   & mcounteren_cy,
         dec_timeh    & mcounteren_tm,
         dec_instreth & mcounteren_ir,
+        |(dec_hpmcounterx [3 +: HPM_NUM] & mcounteren_hpm),
+        |(dec_hpmcounterxh[3 +: HPM_NUM] & mcounteren_hpm),
         // S-mode
+        dec_scountovf,
         dec_sstatus,
         dec_sie,
         dec_stvec,
@@ -1147,7 +1332,9 @@ module core_csr (
         dec_instret  & mcounteren_ir & scounteren_ir,
         dec_cycleh   & mcounteren_cy & scounteren_cy,
         dec_timeh    & mcounteren_tm & scounteren_tm,
-        dec_instreth & mcounteren_ir & scounteren_ir
+        dec_instreth & mcounteren_ir & scounteren_ir,
+        |(dec_hpmcounterx [3 +: HPM_NUM] & mcounteren_hpm & scounteren_hpm),
+        |(dec_hpmcounterxh[3 +: HPM_NUM] & mcounteren_hpm & scounteren_hpm)
     };
 
 endmodule
@@ -0,0 +1,196 @@
+// Set-associative data cache of physical addresses, direct-mapped with
+// WAYS = 1. The lines are refilled by core_mem_if like the I-cache, the word
+// accessed being read last so that a store missing the cache is merged into it.
+// With WRITE_BACK, the stores only write the cache and mark their line dirty.
+// The dirty words are written back through the store buffer: the words of the
+// victim line as the refill replaces them, or all the dirty lines on flush.
+module core_dcache #(
+    parameter  SETS       = 64,   // Power of 2, 0 for no cache
+    parameter  WAYS       = 2,
+    parameter  LINE_WORDS = 4,    // Power of 2
+    parameter  WRITE_BACK = 0
+)(
+    input  logic              clk,
+    input  logic              rst_n,
+    // Lookup
+    input  logic [33:0]       lookup_paddr,
+    output logic              lookup_hit,
+    output logic [31:0]       lookup_rdata,
+    // Store hitting the cache
+    input  logic              write,
+    input  logic [31:0]       write_data,
+    input  logic  [3:0]       write_strb,
+    // Refill from core_mem_if
+    input  logic              fill,
+    input  logic              fill_last,      // Last word of the line
+    input  logic              fill_dirty,     // A store is merged in the last word
+    input  logic [33:0]       fill_paddr,
+    input  logic [31:0]       fill_data,
+    // Write-back of the dirty lines, FENCE.I
+    input  logic              flush,
+    output logic              flush_busy,
+    // Dirty words to the store buffer
+    output logic              wb_valid,
+    input  logic              wb_ready,
+    output logic [33:0]       wb_paddr,
+    output logic [31:0]       wb_data
+);
+
+    generate
+        if (SETS == 0) begin : g_none
+            assign lookup_hit   = 1'b0;
+            assign lookup_rdata = 32'b0;
+            assign flush_busy   = 1'b0;
+            assign wb_valid     = 1'b0;
+            assign wb_paddr     = 34'b0;
+            assign wb_data      = 32'b0;
+        end
+        else begin : g_cache
+            localparam OFFSET_W  = (LINE_WORDS > 1) ? $clog2(LINE_WORDS) : 1;
+            localparam INDEX_W   = (SETS > 1)       ? $clog2(SETS)       : 1;
+            localparam WAY_W     = (WAYS > 1)       ? $clog2(WAYS)       : 1;
+            localparam INDEX_LSB = 2 + $clog2(LINE_WORDS);
+            localparam TAG_LSB   = INDEX_LSB + $clog2(SETS);
+            localparam TAG_W     = 34 - TAG_LSB;
+
+            logic [WAYS-1:0]        valid [SETS];
+            logic [WAYS-1:0]        dirty [SETS];
+            logic [TAG_W-1:0]       tag   [SETS][WAYS];
+            logic [31:0]            data  [SETS][WAYS][LINE_WORDS];
+            logic [WAY_W-1:0]       victim[SETS];
+
+            logic [INDEX_W-1:0]     lookup_index;
+            logic [OFFSET_W-1:0]    lookup_offset;
+            logic [INDEX_W-1:0]     fill_index;
+            logic [OFFSET_W-1:0]    fill_offset;
+            logic [WAY_W-1:0]       fill_way;
+            logic [WAYS-1:0]        hit;
+
+            logic                   evict;
+            logic [INDEX_W-1:0]     flush_set;
+            logic [WAY_W-1:0]       flush_way;
+            logic [OFFSET_W-1:0]    flush_word;
+            logic                   flush_dirty;
+            logic                   flush_next;
+            logic                   flush_last;
+
+            assign lookup_index  = (SETS > 1)       ? INDEX_W'(lookup_paddr >> INDEX_LSB) : '0;
+            assign lookup_offset = (LINE_WORDS > 1) ? OFFSET_W'(lookup_paddr >> 2)         : '0;
+            assign fill_index    = (SETS > 1)       ? INDEX_W'(fill_paddr >> INDEX_LSB)   : '0;
+            assign fill_offset   = (LINE_WORDS > 1) ? OFFSET_W'(fill_paddr >> 2)           : '0;
+            assign fill_way      = victim[fill_index];
+
+            always_comb begin
+                for (int i = 0; i < WAYS; i++)
+                    hit[i] = valid[lookup_index][i] & (tag[lookup_index][i] == lookup_paddr[33:TAG_LSB]);
+            end
+
+            always_comb begin
+                lookup_rdata = 32'b0;
+                for (int i = 0; i < WAYS; i++)
+                    if (hit[i]) lookup_rdata = data[lookup_index][i][lookup_offset];
+            end
+
+            assign lookup_hit = |hit;
+
+            // Valid bits, the line being refilled is invalid until its last word
+            always_ff @(posedge clk or negedge rst_n) begin
+                if (~rst_n) begin
+                    for (int i = 0; i < SETS; i++) valid[i] <= '0;
+                end
+                else if (fill) valid[fill_index][fill_way] <= fill_last;
+            end
+
+            // Dirty bits, kept until the last word of a refill so that every word
+            // of the victim line is written back
+            always_ff @(posedge clk or negedge rst_n) begin
+                if (~rst_n) begin
+                    for (int i = 0; i < SETS; i++) dirty[i] <= '0;
+                end
+                else if (WRITE_BACK) begin
+                    if (fill & fill_last)
+                        dirty[fill_index][fill_way] <= fill_dirty;
+                    else if (write)
+                        dirty[lookup_index] <= dirty[lookup_index] | hit;
+                    else if (flush_next & flush_dirty)
+                        dirty[flush_set][flush_way] <= 1'b0;
+                end
+            end
+
+            // Tags and data, the tag of the victim is replaced with the last word
+            always_ff @(posedge clk) begin
+                if (fill) begin
+                    if (fill_last) tag[fill_index][fill_way] <= fill_paddr[33:TAG_LSB];
+                    data[fill_index][fill_way][fill_offset] <= fill_data;
+                end
+                else if (write) begin
+                    for (int i = 0; i < WAYS; i++)
+                        for (int b = 0; b < 4; b++)
+                            if (hit[i] & write_strb[b])
+                                data[lookup_index][i][lookup_offset][8*b +: 8] <= write_data[8*b +: 8];
+                end
+            end
+
+            // Round-robin replacement, once the line is complete
+            always_ff @(posedge clk or negedge rst_n) begin
+                if (~rst_n) begin
+                    for (int i = 0; i < SETS; i++) victim[i] <= '0;
+                end
+                else if (fill & fill_last)
+                    victim[fill_index] <= (fill_way == WAY_W'(WAYS - 1)) ? '0 : fill_way + 1'b1;
+            end
+
+            // Flush: go through every line, writing back the words of the dirty ones
+            assign flush_dirty = flush_busy & dirty[flush_set][flush_way];
+            assign flush_last  = (flush_set == INDEX_W'(SETS - 1)) & (flush_way == WAY_W'(WAYS - 1));
+            assign flush_next  = flush_busy & (~flush_dirty | (wb_ready & (flush_word == OFFSET_W'(LINE_WORDS - 1))));
+
+            always_ff @(posedge clk or negedge rst_n) begin
+                if (~rst_n) begin
+                    flush_busy <= 1'b0;
+                    flush_set  <= '0;
+                    flush_way  <= '0;
+                    flush_word <= '0;
+                end
+                else if (flush) begin
+                    flush_busy <= (WRITE_BACK != 0);
+                    flush_set  <= '0;
+                    flush_way  <= '0;
+                    flush_word <= '0;
+                end
+                else if (flush_next) begin
+                    if (flush_last) flush_busy <= 1'b0;
+                    if (flush_way == WAY_W'(WAYS - 1)) begin
+                        flush_way <= '0;
+                        flush_set <= flush_set + 1'b1;
+                    end
+                    else flush_way <= flush_way + 1'b1;
+                    flush_word <= '0;
+                end
+                else if (flush_dirty & wb_ready)
+                    flush_word <= flush_word + 1'b1;
+            end
+
+            // Dirty words written back, of the victim of a refill or of a flush
+            assign evict    = fill & dirty[fill_index][fill_way];
+            assign wb_valid = evict | flush_dirty;
+            assign wb_paddr = evict ? line_paddr(tag[fill_index][fill_way], fill_index, fill_offset) :
+                                      line_paddr(tag[flush_set][flush_way], flush_set, flush_word);
+            assign wb_data  = evict ? data[fill_index][fill_way][fill_offset] :
+                                      data[flush_set][flush_way][flush_word];
+
+            function automatic logic [33:0] line_paddr(logic [TAG_W-1:0] line_tag, logic [INDEX_W-1:0] index,
+                                                       logic [OFFSET_W-1:0] offset);
+                line_paddr = 34'(line_tag) << TAG_LSB;
+                if (SETS > 1)       line_paddr |= 34'(index)  << INDEX_LSB;
+                if (LINE_WORDS > 1) line_paddr |= 34'(offset) << 2;
+            endfunction
+
+            // Assertion: the store buffer has room for the whole victim line
+            A_EvictReady: assert property (@(posedge clk) disable iff (~rst_n)
+                evict |-> wb_ready
+            );
+        end
+    endgenerate
+
+endmodule
@@ -0,0 +1,99 @@
+// Set-associative instruction cache of physical addresses, direct-mapped with
+// WAYS = 1. The lines are refilled by core_mem_if one word at a time into the
+// victim way of their set, which is only valid again after the last word.
+// The victims are chosen round-robin per set.
+module core_icache #(
+    parameter  SETS       = 64,   // Power of 2, 0 for no cache
+    parameter  WAYS       = 2,
+    parameter  LINE_WORDS = 4     // Power of 2
+)(
+    input  logic              clk,
+    input  logic              rst_n,
+    // Lookup
+    input  logic [33:0]       lookup_paddr,
+    output logic              lookup_hit,
+    output logic [31:0]       lookup_rdata,
+    // Refill from core_mem_if
+    input  logic              fill,
+    input  logic              fill_last,      // Last word of the line
+    input  logic [33:0]       fill_paddr,
+    input  logic [31:0]       fill_data,
+    // FENCE.I
+    input  logic              invalidate
+);
+
+    generate
+        if (SETS == 0) begin : g_none
+            assign lookup_hit   = 1'b0;
+            assign lookup_rdata = 32'b0;
+        end
+        else begin : g_cache
+            localparam OFFSET_W  = (LINE_WORDS > 1) ? $clog2(LINE_WORDS) : 1;
+            localparam INDEX_W   = (SETS > 1)       ? $clog2(SETS)       : 1;
+            localparam WAY_W     = (WAYS > 1)       ? $clog2(WAYS)       : 1;
+            localparam INDEX_LSB = 2 + $clog2(LINE_WORDS);
+            localparam TAG_LSB   = INDEX_LSB + $clog2(SETS);
+            localparam TAG_W     = 34 - TAG_LSB;
+
+            logic [WAYS-1:0]        valid [SETS];
+            logic [TAG_W-1:0]       tag   [SETS][WAYS];
+            logic [31:0]            data  [SETS][WAYS][LINE_WORDS];
+            logic [WAY_W-1:0]       victim[SETS];
+
+            logic [INDEX_W-1:0]     lookup_index;
+            logic [OFFSET_W-1:0]    lookup_offset;
+            logic [INDEX_W-1:0]     fill_index;
+            logic [OFFSET_W-1:0]    fill_offset;
+            logic [WAY_W-1:0]       fill_way;
+            logic [WAYS-1:0]        hit;
+
+            assign lookup_index  = (SETS > 1)       ? INDEX_W'(lookup_paddr >> INDEX_LSB) : '0;
+            assign lookup_offset = (LINE_WORDS > 1) ? OFFSET_W'(lookup_paddr >> 2)         : '0;
+            assign fill_index    = (SETS > 1)       ? INDEX_W'(fill_paddr >> INDEX_LSB)   : '0;
+            assign fill_offset   = (LINE_WORDS > 1) ? OFFSET_W'(fill_paddr >> 2)           : '0;
+            assign fill_way      = victim[fill_index];
+
+            always_comb begin
+                for (int i = 0; i < WAYS; i++)
+                    hit[i] = valid[lookup_index][i] & (tag[lookup_index][i] == lookup_paddr[33:TAG_LSB]);
+            end
+
+            always_comb begin
+                lookup_rdata = 32'b0;
+                for (int i = 0; i < WAYS; i++)
+                    if (hit[i]) lookup_rdata = data[lookup_index][i][lookup_offset];
+            end
+
+            assign lookup_hit = |hit;
+
+            // Valid bits, the line being refilled is invalid until its last word
+            always_ff @(posedge clk or negedge rst_n) begin
+                if (~rst_n) begin
+                    for (int i = 0; i < SETS; i++) valid[i] <= '0;
+                end
+                else if (invalidate) begin
+                    for (int i = 0; i < SETS; i++) valid[i] <= '0;
+                end
+                else if (fill) valid[fill_index][fill_way] <= fill_last;
+            end
+
+            // Tags and data
+            always_ff @(posedge clk) begin
+                if (fill) begin
+                    tag[fill_index][fill_way]               <= fill_paddr[33:TAG_LSB];
+                    data[fill_index][fill_way][fill_offset] <= fill_data;
+                end
+            end
+
+            // Round-robin replacement, once the line is complete
+            always_ff @(posedge clk or negedge rst_n) begin
+                if (~rst_n) begin
+                    for (int i = 0; i < SETS; i++) victim[i] <= '0;
+                end
+                else if (fill & fill_last)
+                    victim[fill_index] <= (fill_way == WAY_W'(WAYS - 1)) ? '0 : fill_way + 1'b1;
+            end
+        end
+    endgenerate
+
+endmodule
@@ -1,4 +1,19 @@
-module core_mem_if (
+module core_mem_if #(
+    parameter  ITLB_ENTRIES     = 8,
+    parameter  DTLB_ENTRIES     = 8,
+    parameter  ICACHE_SETS      = 0,        // 0 for no I-cache
+    parameter  ICACHE_WAYS      = 2,
+    parameter  ICACHE_LINE      = 4,        // Words per line
+    parameter  DCACHE_SETS      = 0,        // 0 for no D-cache
+    parameter  DCACHE_WAYS      = 2,
+    parameter  DCACHE_LINE      = 1,        // Words per line
+    parameter  DCACHE_WRITE_BACK = 0,       // Write-through otherwise
+    parameter  STORE_BUFFER     = 4,        // Entries, at least DCACHE_LINE if write-back
+    // Cacheable region, the memory of the machine: the physical addresses
+    // with the same bits above CACHEABLE_ADDR_W as CACHEABLE_BASE
+    parameter  logic [33:0] CACHEABLE_BASE   = 34'h0_0000_0000,
+    parameter  CACHEABLE_ADDR_W = 31
+)(
     input  logic                  clk,
     input  logic                  rst_n,
     // From FETCH stage
@@ -30,14 +45,31 @@ module core_mem_if (
     input  logic                  cfg_sum,
     input  logic                  cfg_mxr,
     input  core_pkg::satp_mode_e  cfg_satp_mode,
+    input  logic  [8:0]           cfg_satp_asid,
     input  logic [21:0]           cfg_satp_ppn,
+    // SFENCE.VMA from EXEC stage
+    input  logic                  sfence,
+    input  logic                  sfence_vaddr_valid,
+    input  logic [19:0]           sfence_vpn,
+    input  logic                  sfence_asid_valid,
+    input  logic  [8:0]           sfence_asid,
+    // FENCE.I from EXEC stage
+    input  logic                  fence_i,
     // To Trap handler
     output logic                  ex_instr_access_fault,
     output logic                  ex_load_access_fault,
     output logic                  ex_store_access_fault,
     output logic                  ex_instr_page_fault,
     output logic                  ex_load_page_fault,
-    output logic                  ex_store_page_fault
+    output logic                  ex_store_page_fault,
+    // To HPM counters
+    output logic                  walk_start,
+    output logic                  walk_active,
+    output logic                  tlb_hit,
+    output logic                  icache_hit,
+    output logic                  icache_miss,
+    output logic                  dcache_hit,
+    output logic                  dcache_miss
 );
 
     import core_pkg::*;
@@ -48,7 +80,8 @@ module core_mem_if (
         TRANS0,
         ACCESS1,        // Megapage access
         ACCESS0,        // Normal page access
-        BARE            // Bare-mode access
+        BARE,           // Bare-mode access
+        FLUSH           // Write-back of the D-cache
     } state_e;
 
     typedef struct packed {
@@ -86,26 +119,90 @@ module core_mem_if (
     logic [21:0]  curr_ppn;
 
     pte_t         pte;
+    pte_t         tlb_pte;
     logic         invalid_pte;
     logic         leaf_pte;
-    logic         invalid_access;
-    logic         unpriv_access;
-    logic         svade;
+    logic         leaf_denied;
+    logic         tlb_denied;
 
     logic         access_fault;
     logic         page_fault;
 
+    logic         itlb_hit;
+    logic [31:0]  itlb_pte;
+    logic         dtlb_hit;
+    logic [31:0]  dtlb_pte;
+    logic         tlb_lookup;
+    logic         tlb_match;
+    logic         tlb_valid;
+    logic         tlb_fill;
+
+    localparam REFILL_W = (ICACHE_LINE > 2 || DCACHE_LINE > 2) ? $clog2((ICACHE_LINE > DCACHE_LINE) ? ICACHE_LINE : DCACHE_LINE) : 1;
+
+    logic         bus_wait;
+    logic         walk_lookup;
+    logic         access_lookup;
+    logic         trans_step;
+    logic         cache_done;
+
+    logic [33:0]  idle_paddr;
+    logic [33:0]  access_paddr;
+    logic [33:0]  cache_paddr;
+    logic         icache_en;
+    logic         icache_lookup_hit;
+    logic [31:0]  icache_rdata;
+    logic [33:0]  dcache_paddr;
+    logic         dcache_en;
+    logic         dcache_lookup_hit;
+    logic [31:0]  dcache_rdata;
+    logic         dcache_store;
+    logic         dcache_done;
+    logic         dcache_write;
+    logic         dcache_flush;
+    logic         dcache_flush_busy;
+    logic         dcache_wb_valid;
+    logic [33:0]  dcache_wb_paddr;
+    logic [31:0]  dcache_wb_data;
+    logic [31:0]  dcache_fill_data;
+    logic         pte_hit;
+    logic         refill;
+    logic         refill_last;
+    logic         refill_fill;
+    logic [33:0]  refill_paddr;
+    logic [REFILL_W-1:0] refill_mask;
+    logic [REFILL_W-1:0] refill_offset;
+    logic [REFILL_W-1:0] refill_word;
+    logic [REFILL_W-1:0] refill_cnt;
+
+    logic         sb_push_valid;
+    logic         sb_push_ready;
+    logic [69:0]  sb_push_data;
+    logic         store_pending;
+    logic         sb_drain;
+    logic [69:0]  sb_pop_data;
+    logic [33:0]  sb_paddr;
+    logic  [3:0]  sb_wstrb;
+    logic [31:0]  sb_wdata;
+
     // Handshake
     // Although there are 2 input interfaces,
     // no arbiter is needed since FETCH and MEM do not coexist.
     assign apb_step     = penable & pready;
 
     assign mem_if_start = imem_valid | dmem_valid;
-    assign mem_if_done  = (curr_state != IDLE) & (next_state == IDLE);
+    assign mem_if_done  = (next_state == IDLE) & (((curr_state != IDLE) & (curr_state != FLUSH)) | cache_done);
 
     assign imem_ready   = imem_valid & mem_if_done;
     assign dmem_ready   = dmem_valid & mem_if_done;
 
+    // An access needing the bus waits in IDLE for the store buffer to drain
+    assign bus_wait     = (curr_state == IDLE) & mem_if_start & ~cache_done & store_pending;
+
+    // Page table walks and TLB hits, for the HPM counters
+    assign walk_start   = (curr_state == IDLE) & (next_state == TRANS1);
+    assign walk_active  = (curr_state == TRANS1) | (curr_state == TRANS0);
+    assign tlb_hit      = tlb_valid & ~bus_wait;
+
     // Translation active
     always_comb begin
         if (cfg_satp_mode == SATP_SV32)
@@ -127,18 +224,26 @@ module core_mem_if (
     always_comb begin
         next_state = curr_state;
         case (curr_state)
-            IDLE: if (mem_if_start) next_state = satp_active ? TRANS1 : BARE;
-            TRANS1: if (apb_step) begin
+            IDLE: if (dcache_flush)  next_state = FLUSH;
+            else if (mem_if_start & ~cache_done & ~store_pending) begin
+                if (tlb_valid)      next_state = ACCESS0;
+                else                next_state = satp_active ? TRANS1 : BARE;
+            end
+            TRANS1: if (trans_step) begin
                 if (mem_if_err)     next_state = IDLE;
                 else if (leaf_pte)  next_state = ACCESS1; // Megapage
                 else                next_state = TRANS0;
             end
-            TRANS0: if (apb_step) begin
+            TRANS0: if (trans_step) begin
                 if (mem_if_err)     next_state = IDLE;
                 else                next_state = ACCESS0;
             end
             ACCESS1, ACCESS0, BARE:
-                if (apb_step)       next_state = IDLE;
+                if (cache_done)     next_state = IDLE;
+                else if (apb_step & (~refill | refill_last | mem_if_err))
+                                    next_state = IDLE;
+            FLUSH: if (~dcache_flush_busy)
+                                    next_state = IDLE;
             default:                next_state = IDLE;
         endcase
     end
@@ -147,34 +252,30 @@ module core_mem_if (
     always_comb begin
         case (curr_state)
             IDLE: begin
-                psel   = mem_if_start;
-                paddr  = satp_active ? trans1_paddr : {2'b0, mem_if_addr};
-                pwrite = satp_active ? 1'b0         : (mem_if_dir == MEM_WRITE);
+                psel   = mem_if_start & ~cache_done & ~store_pending & ~pte_hit;
+                if (tlb_valid | ~satp_active) begin
+                    paddr  = refill ? refill_paddr : idle_paddr;
+                    pwrite = (mem_if_dir == MEM_WRITE) & ~refill;
+                end
+                else begin
+                    paddr  = trans1_paddr;
+                    pwrite = 1'b0;
+                end
             end
             TRANS1: begin
-                psel   = 1'b1;
+                psel   = ~pte_hit;
                 paddr  = trans1_paddr;
                 pwrite = 1'b0;
             end
             TRANS0: begin
-                psel   = 1'b1;
+                psel   = ~pte_hit;
                 paddr  = trans0_paddr;
                 pwrite = 1'b0;
             end
-            ACCESS1: begin
-                psel   = 1'b1;
-                paddr  = access1_paddr;
-                pwrite = (mem_if_dir == MEM_WRITE);
-            end
-            ACCESS0: begin
-                psel   = 1'b1;
-                paddr  = access0_paddr;
-                pwrite = (mem_if_dir == MEM_WRITE);
-            end
-            BARE: begin
-                psel   = 1'b1;
-                paddr  = {2'b0, mem_if_addr};
-                pwrite = (mem_if_dir == MEM_WRITE);
+            ACCESS1, ACCESS0, BARE: begin
+                psel   = ~cache_done;
+                paddr  = refill ? refill_paddr : access_paddr;
+                pwrite = (mem_if_dir == MEM_WRITE) & ~refill;
             end
             default: begin
                 psel   = 1'b0;
@@ -182,6 +283,13 @@ module core_mem_if (
                 pwrite = 1'b0;
             end
         endcase
+
+        // The store buffer drains while the state machine does not use the bus
+        if (sb_drain) begin
+            psel   = 1'b1;
+            paddr  = sb_paddr;
+            pwrite = 1'b1;
+        end
     end
 
     assign mem_if_addr   = dmem_valid ? dmem_addr : imem_addr;
@@ -192,12 +300,23 @@ module core_mem_if (
     assign access1_paddr = {curr_ppn[21:10], mem_if_addr[21:0]};    // 4MB megapage
     assign access0_paddr = {curr_ppn,        mem_if_addr[11:0]};    // 4kB normal page
 
-    assign pwdata        = dmem_wdata;
-    assign pwstrb        = dmem_wstrb;
+    // Physical address of the access, once translated
+    assign idle_paddr    = tlb_valid ? {tlb_pte.ppn1, tlb_pte.ppn0, mem_if_addr[11:0]} : {2'b0, mem_if_addr};
+
+    always_comb begin
+        case (curr_state)
+            ACCESS1: access_paddr = access1_paddr;
+            ACCESS0: access_paddr = access0_paddr;
+            default: access_paddr = {2'b0, mem_if_addr};
+        endcase
+    end
+
+    assign pwdata        = sb_drain ? sb_wdata : dmem_wdata;
+    assign pwstrb        = sb_drain ? sb_wstrb : dmem_wstrb;
 
     // Response
-    assign imem_rdata    = prdata;
-    assign dmem_rdata    = prdata;
+    assign imem_rdata    = icache_hit  ? icache_rdata : prdata;
+    assign dmem_rdata    = dcache_done ? dcache_rdata : prdata;
 
     // PENABLE flop
     always_ff @(posedge clk or negedge rst_n) begin
@@ -206,52 +325,248 @@ module core_mem_if (
         else                              penable <= psel;
     end
 
-    // Current PPN flop
+    // Current PPN flop, from the walk or from a TLB hit
     flope #(
         .WIDTH  (22)
     ) u_flop_ppn(
         .clk    (clk),
-        .en     (apb_step),
-        .d      ({pte.ppn1, pte.ppn0}),
+        .en     (trans_step | tlb_valid),
+        .d      (tlb_valid ? {tlb_pte.ppn1, tlb_pte.ppn0} : {pte.ppn1, pte.ppn0}),
         .q      (curr_ppn)
     );
 
-    // PTE parsing
-    assign pte            = prdata;
+    // ---------------------- TLB ---------------------
+    // A hit skips the walk and goes to ACCESS0 with the PPN of the TLB.
+    // A hit failing the permission or A/D checks is flushed and walks again,
+    // so that the faults are raised from the PTE in memory.
+    assign tlb_lookup = (curr_state == IDLE) & mem_if_start & satp_active;
+    assign tlb_match  = (mem_if_dir == MEM_EXEC) ? itlb_hit : dtlb_hit;
+    assign tlb_valid  = tlb_lookup & tlb_match & ~tlb_denied;
+
+    // Fill the leaf PTE of a walk without fault
+    assign tlb_fill   = trans_step & ~mem_if_err & (((curr_state == TRANS1) & leaf_pte) | (curr_state == TRANS0));
+
+    core_tlb #(
+        .ENTRIES            (ITLB_ENTRIES)
+    ) u_itlb(
+        .clk                (clk),
+        .rst_n              (rst_n),
+        .lookup_vpn         (mem_if_addr[31:12]),
+        .lookup_asid        (cfg_satp_asid),
+        .lookup_hit         (itlb_hit),
+        .lookup_pte         (itlb_pte),
+        .lookup_flush       (tlb_lookup & itlb_hit & ~tlb_valid & (mem_if_dir == MEM_EXEC)),
+        .fill               (tlb_fill & (mem_if_dir == MEM_EXEC)),
+        .fill_vpn           (mem_if_addr[31:12]),
+        .fill_asid          (cfg_satp_asid),
+        .fill_mega          (curr_state == TRANS1),
+        .fill_pte           (pte),
+        .sfence             (sfence),
+        .sfence_vaddr_valid (sfence_vaddr_valid),
+        .sfence_vpn         (sfence_vpn),
+        .sfence_asid_valid  (sfence_asid_valid),
+        .sfence_asid        (sfence_asid)
+    );
+
+    core_tlb #(
+        .ENTRIES            (DTLB_ENTRIES)
+    ) u_dtlb(
+        .clk                (clk),
+        .rst_n              (rst_n),
+        .lookup_vpn         (mem_if_addr[31:12]),
+        .lookup_asid        (cfg_satp_asid),
+        .lookup_hit         (dtlb_hit),
+        .lookup_pte         (dtlb_pte),
+        .lookup_flush       (tlb_lookup & dtlb_hit & ~tlb_valid & (mem_if_dir != MEM_EXEC)),
+        .fill               (tlb_fill & (mem_if_dir != MEM_EXEC)),
+        .fill_vpn           (mem_if_addr[31:12]),
+        .fill_asid          (cfg_satp_asid),
+        .fill_mega          (curr_state == TRANS1),
+        .fill_pte           (pte),
+        .sfence             (sfence),
+        .sfence_vaddr_valid (sfence_vaddr_valid),
+        .sfence_vpn         (sfence_vpn),
+        .sfence_asid_valid  (sfence_asid_valid),
+        .sfence_asid        (sfence_asid)
+    );
+
+    // -------------------- Caches --------------------
+    // The accesses to the cacheable region are looked up once their physical
+    // address is known: in IDLE in Bare mode or on a TLB hit, completing in
+    // the same cycle on a hit, or in the access state after a walk.
+    // A miss refills the whole line in place of the access, starting after
+    // the word accessed so that the last word read is the one returned.
+    assign cache_paddr   = (curr_state == IDLE) ? idle_paddr : access_paddr;
+    assign access_lookup = ((curr_state == IDLE) & mem_if_start & (tlb_valid | ~satp_active)) |
+                           (curr_state == ACCESS1) | (curr_state == ACCESS0) | (curr_state == BARE);
+    assign cache_done    = icache_hit | dcache_done;
+    assign refill        = access_lookup & ((icache_en & ~icache_lookup_hit) |
+                                            (dcache_en & ~dcache_store & ~dcache_lookup_hit));
+
+    // Word of the line read, the one after the accessed word at the start.
+    // The lines of the two caches may have different sizes.
+    assign refill_mask   = REFILL_W'((mem_if_dir == MEM_EXEC) ? ICACHE_LINE - 1 : DCACHE_LINE - 1);
+    assign refill_offset = mem_if_addr[2 +: REFILL_W] & refill_mask;
+    assign refill_word   = (curr_state == IDLE) ? (refill_offset + 1'b1) & refill_mask : refill_cnt;
+    assign refill_last   = (refill_cnt == refill_offset);
+    assign refill_paddr  = {cache_paddr[33:REFILL_W+2], (cache_paddr[2 +: REFILL_W] & ~refill_mask) | refill_word, 2'b0};
+
+    always_ff @(posedge clk) begin
+        if (curr_state == IDLE) refill_cnt <= (refill_offset + 1'b1) & refill_mask;
+        else if (apb_step)      refill_cnt <= (refill_cnt + 1'b1) & refill_mask;
+    end
+
+    assign refill_fill   = apb_step & refill & ~pslverr &
+                           ((curr_state == ACCESS1) | (curr_state == ACCESS0) | (curr_state == BARE));
+    assign icache_miss   = refill_fill & refill_last & (mem_if_dir == MEM_EXEC);
+    assign dcache_miss   = refill_fill & refill_last & (mem_if_dir != MEM_EXEC);
+
+    // I-cache, invalidated by FENCE.I
+    assign icache_en     = (ICACHE_SETS != 0) & (mem_if_dir == MEM_EXEC) &
+                           (cache_paddr[33:CACHEABLE_ADDR_W] == CACHEABLE_BASE[33:CACHEABLE_ADDR_W]);
+    assign icache_hit    = access_lookup & icache_en & icache_lookup_hit;
+
+    core_icache #(
+        .SETS               (ICACHE_SETS),
+        .WAYS               (ICACHE_WAYS),
+        .LINE_WORDS         (ICACHE_LINE)
+    ) u_icache(
+        .clk                (clk),
+        .rst_n              (rst_n),
+        .lookup_paddr       (cache_paddr),
+        .lookup_hit         (icache_lookup_hit),
+        .lookup_rdata       (icache_rdata),
+        .fill               (refill_fill & (mem_if_dir == MEM_EXEC)),
+        .fill_last          (refill_last),
+        .fill_paddr         (refill_paddr),
+        .fill_data          (prdata),
+        .invalidate         (fence_i)
+    );
+
+    // D-cache, also looked up by the walks so that they see the PTEs written
+    // by the stores still in the cache. With write-through, the stores go to
+    // the store buffer whether they hit or not, updating the line on a hit.
+    // With write-back, a store missing the cache refills its line, and
+    // FENCE.I writes back the dirty lines before the I-cache refills from the RAM.
+    assign walk_lookup   = ((curr_state == IDLE) & mem_if_start & satp_active & ~tlb_valid) |
+                           (curr_state == TRANS1) | (curr_state == TRANS0);
+    assign dcache_paddr  = ~walk_lookup ? cache_paddr : (curr_state == TRANS0) ? trans0_paddr : trans1_paddr;
+    assign dcache_en     = (DCACHE_SETS != 0) & ((mem_if_dir != MEM_EXEC) | walk_lookup) &
+                           (dcache_paddr[33:CACHEABLE_ADDR_W] == CACHEABLE_BASE[33:CACHEABLE_ADDR_W]);
+    assign dcache_store  = (DCACHE_WRITE_BACK == 0) & (mem_if_dir == MEM_WRITE);
+    assign dcache_done   = access_lookup & dcache_en & (dcache_store ? sb_push_ready : dcache_lookup_hit);
+    assign dcache_write  = dcache_done & dcache_lookup_hit & (mem_if_dir == MEM_WRITE);
+    assign dcache_hit    = dcache_done & dcache_lookup_hit;
+    assign dcache_flush  = (curr_state == IDLE) & fence_i & (DCACHE_SETS != 0) & (DCACHE_WRITE_BACK != 0);
+    assign pte_hit       = walk_lookup & dcache_en & dcache_lookup_hit;
+    assign trans_step    = walk_active & (apb_step | pte_hit);
+
+    // A store refilling its line is merged into the last word read
+    always_comb begin
+        dcache_fill_data = prdata;
+        if ((mem_if_dir == MEM_WRITE) & refill_last)
+            for (int i = 0; i < 4; i++)
+                if (dmem_wstrb[i]) dcache_fill_data[8*i +: 8] = dmem_wdata[8*i +: 8];
+    end
+
+    core_dcache #(
+        .SETS               (DCACHE_SETS),
+        .WAYS               (DCACHE_WAYS),
+        .LINE_WORDS         (DCACHE_LINE),
+        .WRITE_BACK         (DCACHE_WRITE_BACK)
+    ) u_dcache(
+        .clk                (clk),
+        .rst_n              (rst_n),
+        .lookup_paddr       (dcache_paddr),
+        .lookup_hit         (dcache_lookup_hit),
+        .lookup_rdata       (dcache_rdata),
+        .write              (dcache_write),
+        .write_data         (dmem_wdata),
+        .write_strb         (dmem_wstrb),
+        .fill               (refill_fill & (mem_if_dir != MEM_EXEC)),
+        .fill_last          (refill_last),
+        .fill_dirty         (mem_if_dir == MEM_WRITE),
+        .fill_paddr         (refill_paddr),
+        .fill_data          (dcache_fill_data),
+        .flush              (dcache_flush),
+        .flush_busy         (dcache_flush_busy),
+        .wb_valid           (dcache_wb_valid),
+        .wb_ready           (sb_push_ready),
+        .wb_paddr           (dcache_wb_paddr),
+        .wb_data            (dcache_wb_data)
+    );
+
+    // ----------------- Store buffer -----------------
+    // The stores of a write-through D-cache, or the dirty words of a write-back
+    // one, are written to the RAM in order whenever the state machine does not
+    // use the bus. The state machine only leaves IDLE once the buffer is empty,
+    // so that the other accesses are not reordered with the buffered stores.
+    // The cacheable region is the RAM, which never returns an error.
+    assign sb_push_valid = (access_lookup & dcache_en & dcache_store) | dcache_wb_valid;
+    assign sb_push_data  = dcache_wb_valid ? {dcache_wb_paddr, 4'b1111, dcache_wb_data} :
+                                             {cache_paddr, dmem_wstrb, dmem_wdata};
+    assign sb_drain      = store_pending & ((curr_state == IDLE) | (curr_state == FLUSH));
+    assign sb_paddr      = sb_pop_data[69:36];
+    assign sb_wstrb      = sb_pop_data[35:32];
+    assign sb_wdata      = sb_pop_data[31:0];
+
+    buffer #(
+        .WIDTH      (70),
+        .DEPTH      (STORE_BUFFER)
+    ) u_store_buffer(
+        .clk        (clk),
+        .rst_n      (rst_n),
+        .srst       (1'b0),
+        .push_valid (sb_push_valid),
+        .push_ready (sb_push_ready),
+        .push_data  (sb_push_data),
+        .pop_valid  (store_pending),
+        .pop_ready  (sb_drain & apb_step),
+        .pop_data   (sb_pop_data)
+    );
+
+    // PTE parsing, of the walk or of the TLB entry hit on a lookup
+    assign pte            = pte_hit ? dcache_rdata : prdata;
+    assign tlb_pte        = (mem_if_dir == MEM_EXEC) ? itlb_pte : dtlb_pte;
     assign invalid_pte    = ~pte.v | (pte.w & ~pte.r);
     assign leaf_pte       = pte.r | pte.x;
+    assign leaf_denied    = denied(pte);
+    assign tlb_denied     = denied(tlb_pte);
 
-    // Check if the access type is allowed
-    // If MXR is set, loads from X-pages are allowed
-    always_comb begin
+    // Permission and A/D checks of a leaf PTE
+    function automatic logic denied(pte_t leaf);
+        logic invalid_access;
+        logic unpriv_access;
+        logic svade;
+
+        // Check if the access type is allowed
+        // If MXR is set, loads from X-pages are allowed
         case (mem_if_dir)
-            MEM_EXEC:     invalid_access = ~pte.x;
-            MEM_READ:     invalid_access = cfg_mxr ? ~(pte.r | pte.x) : ~pte.r;
+            MEM_EXEC:     invalid_access = ~leaf.x;
+            MEM_READ:     invalid_access = cfg_mxr ? ~(leaf.r | leaf.x) : ~leaf.r;
             MEM_WRITE,
-            MEM_READ_AMO: invalid_access = ~pte.w;
+            MEM_READ_AMO: invalid_access = ~leaf.w;
         endcase
-    end
 
-    // Check if the access has matching privilege
-    // If SUM is set, S-mode is allowed to load/store U-pages
-    always_comb begin
+        // Check if the access has matching privilege
+        // If SUM is set, S-mode is allowed to load/store U-pages
         case (priv_dmem)
             PRIV_M,
-            PRIV_S:  unpriv_access = (cfg_sum & (mem_if_dir != MEM_EXEC)) ? 1'b0 : pte.u;
-            default: unpriv_access = ~pte.u;
+            PRIV_S:  unpriv_access = (cfg_sum & (mem_if_dir != MEM_EXEC)) ? 1'b0 : leaf.u;
+            default: unpriv_access = ~leaf.u;
         endcase
-    end
 
-    // Check if A/D bits are cleared on leaf node
-    // Only check D bit on stores
-    always_comb begin
-        if (~pte.a)       svade = 1'b1;
+        // Check if A/D bits are cleared on leaf node
+        // Only check D bit on stores
+        if (~leaf.a)      svade = 1'b1;
         else case (mem_if_dir)
             MEM_WRITE,
-            MEM_READ_AMO: svade = ~pte.d;
+            MEM_READ_AMO: svade = ~leaf.d;
             default:      svade = 1'b0;
         endcase
-    end
+
+        return invalid_access | unpriv_access | svade;
+    endfunction
 
     // Fault conditions
     always_comb begin
@@ -259,21 +574,24 @@ module core_mem_if (
         page_fault   = 1'b0;
 
         case (curr_state)
-            TRANS1: if (apb_step) begin
-                if (pslverr)          access_fault = 1'b1;
-                else if (invalid_pte) page_fault   = 1'b1;
+            TRANS1: if (trans_step) begin
+                if (apb_step & pslverr) access_fault = 1'b1;
+                else if (invalid_pte)   page_fault   = 1'b1;
                 else if (leaf_pte) begin
-                    if (|pte.ppn0)    page_fault   = 1'b1;  // Misaligned megapage
-                    else              page_fault   = invalid_access | unpriv_access | svade;
+                    if (|pte.ppn0)      page_fault   = 1'b1;  // Misaligned megapage
+                    else                page_fault   = leaf_denied;
                 end
             end
-            TRANS0: if (apb_step) begin
-                if (pslverr)          access_fault = 1'b1;
-                else if (invalid_pte) page_fault   = 1'b1;
-                else if (leaf_pte)    page_fault   = invalid_access | unpriv_access | svade;
-                else                  page_fault   = 1'b1;  // End of translation, must be a leaf
+            TRANS0: if (trans_step) begin
+                if (apb_step & pslverr) access_fault = 1'b1;
+                else if (invalid_pte)   page_fault   = 1'b1;
+                else if (leaf_pte)      page_fault   = leaf_denied;
+                else                    page_fault   = 1'b1;  // End of translation, must be a leaf
             end
-            default: if (apb_step)    access_fault = pslverr;
+            // Not in IDLE or FLUSH, where the transfers are the store buffer's
+            ACCESS1, ACCESS0, BARE:
+                if (apb_step)           access_fault = pslverr;
+            default: ;
         endcase
     end
 
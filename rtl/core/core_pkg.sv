@@ -210,7 +210,30 @@ package core_pkg;
         INT_S_EXTERNAL = 5'd9,
         INT_S_TIMER    = 5'd5,
         INT_S_SOFTWARE = 5'd1,
+        INT_LCOF       = 5'd13,
         INT_NONE       = 5'd0
     } interrupt_e;
 
+    // Events counted by mhpmcounter3+, selected by mhpmevent3+
+    typedef enum logic [4:0] {
+        HPM_NONE         = 5'd0,
+        HPM_FETCH_STALL  = 5'd1,    // Cycles waiting for an instruction
+        HPM_MEM_STALL    = 5'd2,    // Cycles waiting for a data access
+        HPM_WALK         = 5'd3,    // Page table walks
+        HPM_WALK_CYCLE   = 5'd4,    // Cycles walking the page table
+        HPM_BRANCH_TAKEN = 5'd5,    // Taken conditional branches
+        HPM_TRAP         = 5'd6,    // Exceptions and interrupts taken
+        HPM_INTERRUPT    = 5'd7,    // Interrupts taken
+        HPM_AMO          = 5'd8,    // AMO, LR and SC retired
+        HPM_MUL          = 5'd9,    // Multiplications retired
+        HPM_DIV          = 5'd10,   // Divisions and remainders retired
+        HPM_TLB_HIT      = 5'd11,   // Translations hit in the TLBs
+        HPM_ICACHE_HIT   = 5'd12,   // Fetches hit in the I-cache
+        HPM_ICACHE_MISS  = 5'd13,   // I-cache lines refilled
+        HPM_DCACHE_HIT   = 5'd14,   // Loads and stores hit in the D-cache
+        HPM_DCACHE_MISS  = 5'd15,   // D-cache lines refilled
+        HPM_MISPREDICT   = 5'd16,   // Mispredicted branches and jumps
+        HPM_REFETCH      = 5'd17    // Cycles refetching after a misprediction
+    } hpm_event_e;
+
 endpackage
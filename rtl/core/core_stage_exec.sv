@@ -5,6 +5,7 @@ module core_stage_exec (
     output logic                  exec_stage_ready,
     input  logic                  exec_phase,
     output core_pkg::ctrl_path_e  ctrl_path,
+    output logic                  exec_overlap,
     // From Reg file
     output logic  [4:0]           reg_a_id,
     input  logic [31:0]           reg_a_value,
@@ -37,13 +38,18 @@ module core_stage_exec (
     output logic                  sret,
     output logic                  wfi,
     output logic                  sfence_vma,
+    // To Memory interface
+    output logic                  fence_i,
     // To Trap handler
     output logic                  ex_ecall,
     output logic                  ex_ebreak,
     output logic                  ex_exec_illegal_instr,
     output logic                  ex_instr_misaligned,
     output logic                  ex_load_misaligned,
-    output logic                  ex_store_misaligned
+    output logic                  ex_store_misaligned,
+    // To HPM counters
+    output core_pkg::pc_src_e     pc_src,
+    output core_pkg::exec_engine_e exec_engine
 );
 
     import core_pkg::*;
@@ -58,8 +64,6 @@ module core_stage_exec (
     alu_op_e       alu_op;
     mul_op_e       mul_op;
     div_op_e       div_op;
-    exec_engine_e  exec_engine;
-    pc_src_e       pc_src;
     br_type_e      br_type;
     mem_src_e      mem_src;
     logic          sc;
@@ -122,6 +126,7 @@ module core_stage_exec (
         .sret           (sret),
         .wfi            (wfi),
         .sfence_vma     (sfence_vma),
+        .fence_i        (fence_i),
         .illegal_instr  (illegal_instr)
     );
 
@@ -210,6 +215,12 @@ module core_stage_exec (
     // If instr is SC, we modify the ctrl_path based on mem_rsv_valid
     assign ctrl_path = (sc & ~mem_rsv_valid) ? CTRL_EXEC : pre_ctrl_path;
 
+    // The next FETCH can overlap this EXEC if the instruction does not use the MEM stage,
+    // cannot trap and does not change the CSRs or fence the memory.
+    // A new PC is checked against the prediction of the FETCH stage by the Controller.
+    assign exec_overlap = (ctrl_path == CTRL_EXEC) & ~illegal_instr & ~ex_instr_misaligned &
+                          (instr[6:0] != OP_SYSTEM) & (instr[6:0] != OP_MISCMEM);
+
     // --------------- Last ALU result ----------------
     // Only store the last ALU result in first phase
     flope #(
@@ -1,15 +1,21 @@
 module core_stage_fetch #(
-    parameter  RESET_VECTOR = 32'h0000_0000
+    parameter  RESET_VECTOR = 32'h0000_0000,
+    parameter  BTB_ENTRIES  = 16,
+    parameter  RAS_DEPTH    = 4
 )(
     input  logic         clk,
     input  logic         rst_n,
     // From Controller
     input  logic         fetch_stage_valid,
     output logic         fetch_stage_ready,
+    input  logic         fetch_ahead,
+    // To Controller
+    output logic         pc_mispredict,
     // To EXEC stage
     output logic [31:0]  instr,
     output logic [31:0]  pc,
     // From EXEC stage
+    input  logic         exec_done,
     input  logic         pc_new_valid,
     input  logic [31:0]  pc_new,
     // From CSR
@@ -17,6 +23,8 @@ module core_stage_fetch #(
     input  logic [31:0]  pc_csr,
     // To Write-back mux
     output logic [31:0]  pc_plus_4,
+    // To HPM counters
+    output logic         refetch,
     // Memory interface
     output logic         imem_valid,
     input  logic         imem_ready,
@@ -30,33 +38,64 @@ module core_stage_fetch #(
     logic        fetch_done;
     logic [31:0] curr_pc;
     logic [31:0] old_pc;
+    logic [31:0] pred_pc;
+    logic [31:0] next_pc;
 
     // Handshake
-    assign imem_valid        = fetch_stage_valid & ~(m_interrupt_valid | s_interrupt_valid);
+    // The next instruction may also be fetched ahead, during the EXEC stage
+    assign imem_valid        = (fetch_stage_valid | fetch_ahead) & ~(m_interrupt_valid | s_interrupt_valid);
     assign fetch_stage_ready = imem_ready;
     assign fetch_done        = imem_valid & imem_ready;
 
+    // Branch predictor
+    // Predicts the PC following the fetched instruction, and learns from the EXEC stage
+    core_bpred #(
+        .BTB_ENTRIES    (BTB_ENTRIES),
+        .RAS_DEPTH      (RAS_DEPTH)
+    ) u_bpred(
+        .clk            (clk),
+        .rst_n          (rst_n),
+        .lookup_pc      (curr_pc),
+        .lookup_next_pc (pred_pc),
+        .update         (exec_done & ~pc_csr_valid),
+        .update_pc      (old_pc),
+        .update_instr   (instr),
+        .update_taken   (pc_new_valid),
+        .update_target  (pc_new)
+    );
+
+    // Actual PC following the instruction in EXEC stage.
+    // curr_pc holds the predicted one, which is only fetched ahead when they match.
+    assign next_pc       = pc_new_valid ? pc_new : pc_plus_4;
+    assign pc_mispredict = exec_done & (curr_pc != next_pc);
+
     // PC register
-    // Increases by 4 every FETCH cycle
-    // or gets updated with new value from EXEC/CSR.
+    // Gets the predicted PC every FETCH cycle,
+    // or gets corrected with the actual one from EXEC, or updated from CSR.
     always_ff @(posedge clk or negedge rst_n) begin
-        if (~rst_n)            curr_pc <= RESET_VECTOR;
-        else if (pc_csr_valid) curr_pc <= pc_csr;
-        else if (pc_new_valid) curr_pc <= pc_new;
-        else if (fetch_done)   curr_pc <= curr_pc + 4;
+        if (~rst_n)             curr_pc <= RESET_VECTOR;
+        else if (pc_csr_valid)  curr_pc <= pc_csr;
+        else if (pc_mispredict) curr_pc <= next_pc;
+        else if (fetch_done)    curr_pc <= pred_pc;
     end
 
     // Store the old PC for the EXEC stage
-    // since the curr_pc is PC + 4 after fetch_done
+    // since the curr_pc is the predicted PC after fetch_done
     always_ff @(posedge clk) begin
         if (fetch_done) old_pc <= curr_pc;
     end
 
+    // The FETCH stage following a misprediction refetches from the actual PC
+    always_ff @(posedge clk or negedge rst_n) begin
+        if (~rst_n)                          refetch <= 1'b0;
+        else if (pc_csr_valid | fetch_done)  refetch <= 1'b0;
+        else if (pc_mispredict)              refetch <= 1'b1;
+    end
+
     // Real PC is current PC in FETCH stage, but old PC in EXEC and MEM stage
     assign pc = fetch_stage_valid ? curr_pc : old_pc;
 
-    // PC + 4 is actually curr_pc after fetch_done
-    assign pc_plus_4 = curr_pc;
+    assign pc_plus_4 = old_pc + 4;
 
     // Address to I-mem is the current PC (before fetch_done)
     assign imem_addr = curr_pc;
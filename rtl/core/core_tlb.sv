@@ -0,0 +1,107 @@
+// Fully associative TLB of Sv32 leaf PTEs, tagged with the ASID of satp.
+// Only the PTEs of successful walks are filled, the permissions are checked
+// again by core_mem_if on every hit. Entries are replaced round-robin.
+module core_tlb #(
+    parameter  ENTRIES = 8
+)(
+    input  logic              clk,
+    input  logic              rst_n,
+    // Lookup
+    input  logic [19:0]       lookup_vpn,
+    input  logic  [8:0]       lookup_asid,
+    output logic              lookup_hit,
+    output logic [31:0]       lookup_pte,     // PTE of the hit, PPN[0] from the VPN on a megapage
+    input  logic              lookup_flush,   // Invalidate the entries hit
+    // Fill after a page table walk
+    input  logic              fill,
+    input  logic [19:0]       fill_vpn,
+    input  logic  [8:0]       fill_asid,
+    input  logic              fill_mega,
+    input  logic [31:0]       fill_pte,
+    // SFENCE.VMA
+    input  logic              sfence,
+    input  logic              sfence_vaddr_valid,   // rs1 != x0
+    input  logic [19:0]       sfence_vpn,
+    input  logic              sfence_asid_valid,    // rs2 != x0
+    input  logic  [8:0]       sfence_asid
+);
+
+    generate
+        if (ENTRIES == 0) begin : g_none
+            assign lookup_hit = 1'b0;
+            assign lookup_pte = 32'b0;
+        end
+        else begin : g_tlb
+            localparam IDX_W = (ENTRIES > 1) ? $clog2(ENTRIES) : 1;
+
+            logic [ENTRIES-1:0]         valid;
+            logic [ENTRIES-1:0][19:0]   vpn;
+            logic [ENTRIES-1:0][8:0]    asid;
+            logic [ENTRIES-1:0]         mega;
+            logic [ENTRIES-1:0][31:0]   pte;
+
+            logic [ENTRIES-1:0]         hit;
+            logic [ENTRIES-1:0]         flush;
+            logic [IDX_W-1:0]           victim;
+
+            // A megapage only matches VPN[1], a global PTE any ASID
+            always_comb begin
+                for (int i = 0; i < ENTRIES; i++) begin
+                    hit[i] = valid[i] &
+                             (pte[i][5] | (asid[i] == lookup_asid)) &
+                             (vpn[i][19:10] == lookup_vpn[19:10]) &
+                             (mega[i] | (vpn[i][9:0] == lookup_vpn[9:0]));
+                end
+            end
+
+            // SFENCE.VMA never flushes the global PTEs of a given ASID
+            always_comb begin
+                for (int i = 0; i < ENTRIES; i++) begin
+                    flush[i] = lookup_flush & hit[i];
+                    if (sfence)
+                        flush[i] = |{
+                            flush[i],
+                            (~sfence_vaddr_valid |
+                                ((vpn[i][19:10] == sfence_vpn[19:10]) & (mega[i] | (vpn[i][9:0] == sfence_vpn[9:0])))) &
+                            (~sfence_asid_valid | (~pte[i][5] & (asid[i] == sfence_asid)))
+                        };
+                end
+            end
+
+            always_comb begin
+                lookup_pte = 32'b0;
+                for (int i = 0; i < ENTRIES; i++)
+                    if (hit[i]) lookup_pte = mega[i] ? {pte[i][31:20], lookup_vpn[9:0], pte[i][9:0]} : pte[i];
+            end
+
+            assign lookup_hit = |hit;
+
+            // Valid bits
+            always_ff @(posedge clk or negedge rst_n) begin
+                if (~rst_n) valid <= '0;
+                else begin
+                    for (int i = 0; i < ENTRIES; i++)
+                        if (flush[i]) valid[i] <= 1'b0;
+                    if (fill) valid[victim] <= 1'b1;
+                end
+            end
+
+            // Tags and PTEs
+            always_ff @(posedge clk) begin
+                if (fill) begin
+                    vpn[victim]  <= fill_vpn;
+                    asid[victim] <= fill_asid;
+                    mega[victim] <= fill_mega;
+                    pte[victim]  <= fill_pte;
+                end
+            end
+
+            // Round-robin replacement
+            always_ff @(posedge clk or negedge rst_n) begin
+                if (~rst_n)    victim <= '0;
+                else if (fill) victim <= (victim == IDX_W'(ENTRIES - 1)) ? '0 : victim + 1'b1;
+            end
+        end
+    endgenerate
+
+endmodule
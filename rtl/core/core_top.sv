@@ -1,5 +1,19 @@
 module core_top #(
-    parameter  RESET_VECTOR = 32'h0000_0000
+    parameter  RESET_VECTOR     = 32'h0000_0000,
+    parameter  BTB_ENTRIES      = 16,       // 0 for no branch prediction
+    parameter  RAS_DEPTH        = 4,
+    parameter  ITLB_ENTRIES     = 8,
+    parameter  DTLB_ENTRIES     = 8,
+    parameter  ICACHE_SETS      = 0,        // 0 for no I-cache
+    parameter  ICACHE_WAYS      = 2,
+    parameter  ICACHE_LINE      = 4,        // Words per line
+    parameter  DCACHE_SETS      = 0,        // 0 for no D-cache
+    parameter  DCACHE_WAYS      = 2,
+    parameter  DCACHE_LINE      = 1,        // Words per line
+    parameter  DCACHE_WRITE_BACK = 0,       // Write-through otherwise
+    parameter  STORE_BUFFER     = 4,        // Entries, at least DCACHE_LINE if write-back
+    parameter  logic [33:0] CACHEABLE_BASE   = 34'h0_0000_0000,
+    parameter  CACHEABLE_ADDR_W = 31
 )(
     input  logic         clk,
     input  logic         rst_n,
@@ -26,10 +40,14 @@ module core_top #(
     // Controller stages
     logic         fetch_stage_valid;
     logic         fetch_stage_ready;
+    logic         fetch_ahead;
+    logic         pc_mispredict;
     logic         exec_stage_valid;
     logic         exec_stage_ready;
     logic         exec_phase;
     ctrl_path_e   ctrl_path;
+    logic         exec_overlap;
+    logic         exec_done;
     logic         mem_stage_valid;
     logic         mem_stage_ready;
     logic         instr_done;
@@ -71,6 +89,7 @@ module core_top #(
     logic         sret;
     logic         wfi;
     logic         sfence_vma;
+    logic         fence_i;
     logic         pc_csr_valid;
     logic [31:0]  pc_csr;
 
@@ -88,6 +107,7 @@ module core_top #(
     interrupt_e   m_interrupt_cause;
     logic         s_interrupt_valid;
     interrupt_e   s_interrupt_cause;
+    logic         interrupt_pending;
     priv_e        priv;
     logic         cfg_mie;
     logic         cfg_sie;
@@ -102,6 +122,9 @@ module core_top #(
     logic         cfg_mideleg_se;
     logic         cfg_mideleg_st;
     logic         cfg_mideleg_ss;
+    logic         cfg_lcofie;
+    logic         cfg_lcofip;
+    logic         cfg_mideleg_lcof;
     logic         ex_csr_illegal_instr;
     logic         ex_ecall;
     logic         ex_ebreak;
@@ -133,18 +156,35 @@ module core_top #(
     logic         cfg_sum;
     logic         cfg_mxr;
     satp_mode_e   cfg_satp_mode;
+    logic  [8:0]  cfg_satp_asid;
     logic [21:0]  cfg_satp_ppn;
 
+    // HPM events
+    pc_src_e      pc_src;
+    exec_engine_e exec_engine;
+    logic         walk_start;
+    logic         walk_active;
+    logic         tlb_hit;
+    logic         icache_hit;
+    logic         icache_miss;
+    logic         dcache_hit;
+    logic         dcache_miss;
+    logic         refetch;
+    logic [31:0]  hpm_event;
+
     // ------------------ Controller ------------------
     core_controller u_controller(
         .clk                    (clk),
         .rst_n                  (rst_n),
         .fetch_stage_valid      (fetch_stage_valid),
         .fetch_stage_ready      (fetch_stage_ready),
+        .fetch_ahead            (fetch_ahead),
+        .pc_mispredict          (pc_mispredict),
         .exec_stage_valid       (exec_stage_valid),
         .exec_stage_ready       (exec_stage_ready),
         .exec_phase             (exec_phase),
         .ctrl_path              (ctrl_path),
+        .exec_overlap           (exec_overlap),
         .mem_stage_valid        (mem_stage_valid),
         .mem_stage_ready        (mem_stage_ready),
         .reg_d_en               (reg_d_en),
@@ -153,24 +193,31 @@ module core_top #(
         .check_interrupt        (check_interrupt),
         .exception_valid        (exception_valid),
         .m_interrupt_valid      (m_interrupt_valid),
-        .s_interrupt_valid      (s_interrupt_valid)
+        .s_interrupt_valid      (s_interrupt_valid),
+        .interrupt_pending      (interrupt_pending)
     );
 
     // ----------------- FETCH stage ------------------
     core_stage_fetch #(
-        .RESET_VECTOR           (RESET_VECTOR)
+        .RESET_VECTOR           (RESET_VECTOR),
+        .BTB_ENTRIES            (BTB_ENTRIES),
+        .RAS_DEPTH              (RAS_DEPTH)
     ) u_stage_fetch(
         .clk                    (clk),
         .rst_n                  (rst_n),
         .fetch_stage_valid      (fetch_stage_valid),
         .fetch_stage_ready      (fetch_stage_ready),
+        .fetch_ahead            (fetch_ahead),
+        .pc_mispredict          (pc_mispredict),
         .instr                  (instr),
         .pc                     (pc),
+        .exec_done              (exec_done),
         .pc_new_valid           (pc_new_valid),
         .pc_new                 (pc_new),
         .pc_csr_valid           (pc_csr_valid),
         .pc_csr                 (pc_csr),
         .pc_plus_4              (pc_plus_4),
+        .refetch                (refetch),
         .imem_valid             (imem_valid),
         .imem_ready             (imem_ready),
         .imem_addr              (imem_addr),
@@ -180,12 +227,15 @@ module core_top #(
     );
 
     // ------------------ EXEC stage ------------------
+    assign exec_done = exec_stage_valid & exec_stage_ready;
+
     core_stage_exec u_stage_exec(
         .clk                    (clk),
         .exec_stage_valid       (exec_stage_valid),
         .exec_stage_ready       (exec_stage_ready),
         .exec_phase             (exec_phase),
         .ctrl_path              (ctrl_path),
+        .exec_overlap           (exec_overlap),
         .reg_a_id               (reg_a_id),
         .reg_a_value            (reg_a_value),
         .reg_b_id               (reg_b_id),
@@ -212,12 +262,15 @@ module core_top #(
         .sret                   (sret),
         .wfi                    (wfi),
         .sfence_vma             (sfence_vma),
+        .fence_i                (fence_i),
         .ex_ecall               (ex_ecall),
         .ex_ebreak              (ex_ebreak),
         .ex_exec_illegal_instr  (ex_exec_illegal_instr),
         .ex_instr_misaligned    (ex_instr_misaligned),
         .ex_load_misaligned     (ex_load_misaligned),
-        .ex_store_misaligned    (ex_store_misaligned)
+        .ex_store_misaligned    (ex_store_misaligned),
+        .pc_src                 (pc_src),
+        .exec_engine            (exec_engine)
     );
 
     // ------------------- MEM stage ------------------
@@ -295,13 +348,18 @@ module core_top #(
         .cfg_mideleg_se         (cfg_mideleg_se),
         .cfg_mideleg_st         (cfg_mideleg_st),
         .cfg_mideleg_ss         (cfg_mideleg_ss),
+        .cfg_lcofie             (cfg_lcofie),
+        .cfg_lcofip             (cfg_lcofip),
+        .cfg_mideleg_lcof       (cfg_mideleg_lcof),
         .ex_csr_illegal_instr   (ex_csr_illegal_instr),
         .priv_imem              (priv_imem),
         .priv_dmem              (priv_dmem),
         .cfg_sum                (cfg_sum),
         .cfg_mxr                (cfg_mxr),
         .cfg_satp_mode          (cfg_satp_mode),
+        .cfg_satp_asid          (cfg_satp_asid),
         .cfg_satp_ppn           (cfg_satp_ppn),
+        .hpm_event              (hpm_event),
         .mtime                  (mtime),
         .int_m_ext              (int_m_ext),
         .int_s_ext              (int_s_ext),
@@ -309,7 +367,20 @@ module core_top #(
     );
 
     // --------------- Memory interface ---------------
-    core_mem_if u_mem_if(
+    core_mem_if #(
+        .ITLB_ENTRIES           (ITLB_ENTRIES),
+        .DTLB_ENTRIES           (DTLB_ENTRIES),
+        .ICACHE_SETS            (ICACHE_SETS),
+        .ICACHE_WAYS            (ICACHE_WAYS),
+        .DCACHE_SETS            (DCACHE_SETS),
+        .DCACHE_WAYS            (DCACHE_WAYS),
+        .DCACHE_WRITE_BACK      (DCACHE_WRITE_BACK),
+        .ICACHE_LINE            (ICACHE_LINE),
+        .DCACHE_LINE            (DCACHE_LINE),
+        .STORE_BUFFER           (STORE_BUFFER),
+        .CACHEABLE_BASE         (CACHEABLE_BASE),
+        .CACHEABLE_ADDR_W       (CACHEABLE_ADDR_W)
+    ) u_mem_if(
         .clk                    (clk),
         .rst_n                  (rst_n),
         .imem_valid             (imem_valid),
@@ -337,13 +408,27 @@ module core_top #(
         .cfg_sum                (cfg_sum),
         .cfg_mxr                (cfg_mxr),
         .cfg_satp_mode          (cfg_satp_mode),
+        .cfg_satp_asid          (cfg_satp_asid),
         .cfg_satp_ppn           (cfg_satp_ppn),
+        .sfence                 (csr_en & sfence_vma),
+        .sfence_vaddr_valid     (reg_a_id != 5'd0),
+        .sfence_vpn             (reg_a_value[31:12]),
+        .sfence_asid_valid      (reg_b_id != 5'd0),
+        .sfence_asid            (reg_b_value[8:0]),
+        .fence_i                (csr_en & fence_i),
         .ex_instr_access_fault  (ex_instr_access_fault),
         .ex_load_access_fault   (ex_load_access_fault),
         .ex_store_access_fault  (ex_store_access_fault),
         .ex_instr_page_fault    (ex_instr_page_fault),
         .ex_load_page_fault     (ex_load_page_fault),
-        .ex_store_page_fault    (ex_store_page_fault)
+        .ex_store_page_fault    (ex_store_page_fault),
+        .walk_start             (walk_start),
+        .walk_active            (walk_active),
+        .tlb_hit                (tlb_hit),
+        .icache_hit             (icache_hit),
+        .icache_miss            (icache_miss),
+        .dcache_hit             (dcache_hit),
+        .dcache_miss            (dcache_miss)
     );
 
     // --------------- Write-back mux -----------------
@@ -367,6 +452,7 @@ module core_top #(
         .m_interrupt_cause      (m_interrupt_cause),
         .s_interrupt_valid      (s_interrupt_valid),
         .s_interrupt_cause      (s_interrupt_cause),
+        .interrupt_pending      (interrupt_pending),
         .priv                   (priv),
         .cfg_mie                (cfg_mie),
         .cfg_sie                (cfg_sie),
@@ -381,6 +467,9 @@ module core_top #(
         .cfg_mideleg_se         (cfg_mideleg_se),
         .cfg_mideleg_st         (cfg_mideleg_st),
         .cfg_mideleg_ss         (cfg_mideleg_ss),
+        .cfg_lcofie             (cfg_lcofie),
+        .cfg_lcofip             (cfg_lcofip),
+        .cfg_mideleg_lcof       (cfg_mideleg_lcof),
         .ex_csr_illegal_instr   (ex_csr_illegal_instr),
         .instr                  (instr),
         .imem_addr              (imem_addr),
@@ -403,5 +492,27 @@ module core_top #(
         .mtimer_int             (mtimer_int)
     );
 
+    // ------------------ HPM events ------------------
+    always_comb begin
+        hpm_event                   = 32'b0;
+        hpm_event[HPM_FETCH_STALL]  = fetch_stage_valid & ~fetch_stage_ready;
+        hpm_event[HPM_MEM_STALL]    = mem_stage_valid & ~mem_stage_ready;
+        hpm_event[HPM_WALK]         = walk_start;
+        hpm_event[HPM_WALK_CYCLE]   = walk_active;
+        hpm_event[HPM_BRANCH_TAKEN] = pc_new_valid & (pc_src == PC_BRANCH);
+        hpm_event[HPM_TRAP]         = exception_valid | m_interrupt_valid | s_interrupt_valid;
+        hpm_event[HPM_INTERRUPT]    = m_interrupt_valid | s_interrupt_valid;
+        hpm_event[HPM_AMO]          = instr_done & ((ctrl_path == CTRL_AMO) | (mem_rsv != RSV_NONE));
+        hpm_event[HPM_MUL]          = instr_done & (exec_engine == EXEC_MUL);
+        hpm_event[HPM_DIV]          = instr_done & (exec_engine == EXEC_DIV);
+        hpm_event[HPM_TLB_HIT]      = tlb_hit;
+        hpm_event[HPM_ICACHE_HIT]   = icache_hit;
+        hpm_event[HPM_ICACHE_MISS]  = icache_miss;
+        hpm_event[HPM_DCACHE_HIT]   = dcache_hit;
+        hpm_event[HPM_DCACHE_MISS]  = dcache_miss;
+        hpm_event[HPM_MISPREDICT]   = pc_mispredict & ~pc_csr_valid;
+        hpm_event[HPM_REFETCH]      = fetch_stage_valid & refetch;
+    end
+
 
 endmodule
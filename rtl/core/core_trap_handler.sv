@@ -9,6 +9,8 @@ module core_trap_handler (
     output core_pkg::interrupt_e  m_interrupt_cause,
     output logic                  s_interrupt_valid,
     output core_pkg::interrupt_e  s_interrupt_cause,
+    // To Controller
+    output logic                  interrupt_pending,
     // From CSR
     input  core_pkg::priv_e       priv,
     input  logic                  cfg_mie,
@@ -18,12 +20,15 @@ module core_trap_handler (
     input  logic                  cfg_seie,
     input  logic                  cfg_stie,
     input  logic                  cfg_ssie,
+    input  logic                  cfg_lcofie,
     input  logic                  cfg_seip,
     input  logic                  cfg_stip,
     input  logic                  cfg_ssip,
+    input  logic                  cfg_lcofip,
     input  logic                  cfg_mideleg_se,
     input  logic                  cfg_mideleg_st,
     input  logic                  cfg_mideleg_ss,
+    input  logic                  cfg_mideleg_lcof,
     input  logic                  ex_csr_illegal_instr,
     // From FETCH
     input  logic [31:0]           instr,
@@ -54,15 +59,19 @@ module core_trap_handler (
 
     logic  int_m_enable;
     logic  int_s_enable;
+    logic  m_interrupt_pending;
+    logic  s_interrupt_pending;
 
     logic  m_int_me_active;
     logic  m_int_mt_active;
     logic  m_int_se_active;
     logic  m_int_st_active;
     logic  m_int_ss_active;
+    logic  m_int_lcof_active;
     logic  s_int_se_active;
     logic  s_int_st_active;
     logic  s_int_ss_active;
+    logic  s_int_lcof_active;
 
     // Trap when any exception happens
     assign exception_valid = |{
@@ -97,37 +106,38 @@ module core_trap_handler (
         endcase
     end
 
-    assign m_int_me_active = cfg_meie & int_m_ext;
-    assign m_int_mt_active = cfg_mtie & mtimer_int;
+    assign m_int_me_active   = cfg_meie & int_m_ext;
+    assign m_int_mt_active   = cfg_mtie & mtimer_int;
 
-    assign m_int_se_active = cfg_seie & (cfg_seip | int_s_ext) & ~cfg_mideleg_se;
-    assign m_int_st_active = cfg_stie & cfg_stip & ~cfg_mideleg_st;
-    assign m_int_ss_active = cfg_ssie & cfg_ssip & ~cfg_mideleg_ss;
+    assign m_int_se_active   = cfg_seie & (cfg_seip | int_s_ext) & ~cfg_mideleg_se;
+    assign m_int_st_active   = cfg_stie & cfg_stip & ~cfg_mideleg_st;
+    assign m_int_ss_active   = cfg_ssie & cfg_ssip & ~cfg_mideleg_ss;
+    assign m_int_lcof_active = cfg_lcofie & cfg_lcofip & ~cfg_mideleg_lcof;
 
-    assign s_int_se_active = cfg_seie & (cfg_seip | int_s_ext) & cfg_mideleg_se;
-    assign s_int_st_active = cfg_stie & cfg_stip & cfg_mideleg_st;
-    assign s_int_ss_active = cfg_ssie & cfg_ssip & cfg_mideleg_ss;
+    assign s_int_se_active   = cfg_seie & (cfg_seip | int_s_ext) & cfg_mideleg_se;
+    assign s_int_st_active   = cfg_stie & cfg_stip & cfg_mideleg_st;
+    assign s_int_ss_active   = cfg_ssie & cfg_ssip & cfg_mideleg_ss;
+    assign s_int_lcof_active = cfg_lcofie & cfg_lcofip & cfg_mideleg_lcof;
 
-    always_comb begin
-        if (check_interrupt) begin
-            m_interrupt_valid = int_m_enable & |{
-                m_int_me_active,
-                m_int_mt_active,
-                m_int_se_active,
-                m_int_st_active,
-                m_int_ss_active
-            };
-            s_interrupt_valid = int_s_enable & |{
-                s_int_se_active,
-                s_int_st_active,
-                s_int_ss_active
-            };
-        end
-        else begin
-            m_interrupt_valid = 1'b0;
-            s_interrupt_valid = 1'b0;
-        end
-    end
+    assign m_interrupt_pending = int_m_enable & |{
+        m_int_me_active,
+        m_int_mt_active,
+        m_int_se_active,
+        m_int_st_active,
+        m_int_ss_active,
+        m_int_lcof_active
+    };
+    assign s_interrupt_pending = int_s_enable & |{
+        s_int_se_active,
+        s_int_st_active,
+        s_int_ss_active,
+        s_int_lcof_active
+    };
+
+    // Interrupts are only taken when checked, the Controller does not fetch ahead while one is pending
+    assign m_interrupt_valid = check_interrupt & m_interrupt_pending;
+    assign s_interrupt_valid = check_interrupt & s_interrupt_pending;
+    assign interrupt_pending = m_interrupt_pending | s_interrupt_pending;
 
     // The priority of exceptions and interrupts is described in the spec
     always_comb begin
@@ -174,6 +184,8 @@ module core_trap_handler (
             m_interrupt_cause = INT_S_SOFTWARE;
         else if (m_int_st_active)
             m_interrupt_cause = INT_S_TIMER;
+        else if (m_int_lcof_active)
+            m_interrupt_cause = INT_LCOF;
         else
             m_interrupt_cause = INT_NONE;
     end
@@ -185,6 +197,8 @@ module core_trap_handler (
             s_interrupt_cause = INT_S_SOFTWARE;
         else if (s_int_st_active)
             s_interrupt_cause = INT_S_TIMER;
+        else if (s_int_lcof_active)
+            s_interrupt_cause = INT_LCOF;
         else
             s_interrupt_cause = INT_NONE;
     end
@@ -28,6 +28,7 @@ module core_decoder (
     output logic                    sret,
     output logic                    wfi,
     output logic                    sfence_vma,
+    output logic                    fence_i,
     output logic                    illegal_instr
 );
 
@@ -88,6 +89,7 @@ module core_decoder (
         sret       = 1'b0;
         wfi        = 1'b0;
         sfence_vma = 1'b0;
+        fence_i    = 1'b0;
 
         case (opcode)
             OP_OP:          ctrl = {CTRL_EXEC, IMM_Z, SRC_RR, WB_EXEC,  PC_NORMAL, MEM_READ};
@@ -134,6 +136,10 @@ module core_decoder (
                 end
                 default:    ctrl = {CTRL_EXEC, IMM_Z, SRC_RR, WB_NONE,  PC_NORMAL, MEM_READ};
             endcase
+            OP_MISCMEM: begin
+                ctrl       = {CTRL_EXEC, IMM_Z, SRC_RR, WB_NONE,  PC_NORMAL, MEM_READ};
+                fence_i    = (funct3 == 3'b001);
+            end
             default:        ctrl = {CTRL_EXEC, IMM_Z, SRC_RR, WB_NONE,  PC_NORMAL, MEM_READ};
         endcase
     end
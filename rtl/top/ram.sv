@@ -24,6 +24,7 @@ module ram #(
 
     logic [31:0]             mem_array [WORD_CNT];
     logic [WORD_CNT_BW-1:0]  word_addr;
+    logic                    write_en;
 
     // Control: always read on enable
     assign pready = psel & penable;
@@ -32,8 +33,10 @@ module ram #(
     assign word_addr = WORD_CNT_BW'(paddr[ADDR_W-1:2]);
 
     // Write interface
+    assign write_en = pready & pwrite & ~pslverr;
+
     always_ff @(posedge clk) begin
-        if (pready & pwrite & ~pslverr) begin
+        if (write_en) begin
             if (pwstrb[0]) mem_array[word_addr][0  +: 8] <= pwdata[0  +: 8];
             if (pwstrb[1]) mem_array[word_addr][8  +: 8] <= pwdata[8  +: 8];
             if (pwstrb[2]) mem_array[word_addr][16 +: 8] <= pwdata[16 +: 8];
@@ -6,7 +6,10 @@
 // - UART
 module top #(
     parameter  RESET_VECTOR = 32'h0000_0000,    // Value of PC when reset
-    parameter  RAM_SIZE = 32'h0400_0000         // RAM size in bytes (64 MB)
+    parameter  RAM_SIZE = 32'h0400_0000,        // RAM size in bytes (64 MB)
+    parameter  ICACHE_SETS = 64,                // I-cache of the core (2-way, 16B lines), 0 for none
+    parameter  DCACHE_SETS = 64,                // D-cache of the core (2-way, 4B lines), 0 for none
+    parameter  DCACHE_WRITE_BACK = 0            // Write-through D-cache otherwise
 )(
     input  logic  clk,
     input  logic  rst_n,
@@ -94,8 +97,14 @@ module top #(
     logic                      int_s_ext;
 
     // --------------------- Core ---------------------
+    // The RAM is the cacheable region
     core_top #(
-        .RESET_VECTOR  (RESET_VECTOR)
+        .RESET_VECTOR      (RESET_VECTOR),
+        .ICACHE_SETS       (ICACHE_SETS),
+        .DCACHE_SETS       (DCACHE_SETS),
+        .DCACHE_WRITE_BACK (DCACHE_WRITE_BACK),
+        .CACHEABLE_BASE    (34'h0_0000_0000),
+        .CACHEABLE_ADDR_W  ($clog2(RAM_SIZE))
     ) u_core(
         .clk           (clk),
         .rst_n         (rst_n),
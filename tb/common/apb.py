@@ -3,49 +3,70 @@ from cocotb.clock import Clock
 from uart import *
 
 
+# APB master. The transfers of a burst are back to back: psel stays high and
+# the SETUP of a transfer is driven on the edge the previous ACCESS completes,
+# so that a burst of n transfers takes 2n cycles with pready high.
+# Several coroutines may share the bus, they take turns with a lock held for
+# a whole burst. With shared=False the bench has a single master, the lock is
+# skipped and a concurrent access is an error.
 class Apb:
-    def __init__(self, tb):
+    def __init__(self, tb, shared=True):
         self.tb   = tb
         self.clk  = tb.clk
-        self.lock = Lock()
+        self.edge = RisingEdge(tb.clk)
+        self.lock = Lock() if shared else None
+        self.busy = False
 
 
-    async def _write(self, addr, wdata, wstrb, expect_err=False):
-        async with self.lock:
-            tb = self.tb
-            tb.psel.value = 1
-            tb.pwrite.value = 1
-            tb.paddr.value = addr
+    # One transfer, the bus must be held
+    async def _transfer(self, addr, write, wdata, wstrb, expect_err):
+        tb = self.tb
+        tb.psel.value    = 1
+        tb.penable.value = 0
+        tb.pwrite.value  = write
+        tb.paddr.value   = addr
+        tb.pwstrb.value  = wstrb
+        if write:
             tb.pwdata.value = wdata
-            tb.pwstrb.value = wstrb
-            await RisingEdge(tb.clk)
-            tb.penable.value = 1
-            while True:
-                await RisingEdge(tb.clk)
-                if tb.pready.value == 1:
-                    assert tb.pslverr.value == expect_err
-                    tb.psel.value = 0
-                    tb.penable.value = 0
-                    return
+        await self.edge
+        tb.penable.value = 1
+        await self.edge
+        while tb.pready.value != 1:
+            await self.edge
+        assert tb.pslverr.value == expect_err
+        return None if write else tb.prdata.value.integer
+
+
+    # Transfers of (addr, write, wdata, wstrb) back to back, returns the read data
+    async def _burst(self, transfers, expect_err=False):
+        if self.lock is not None:
+            await self.lock.acquire()
+        else:
+            assert not self.busy, "Concurrent access to an APB bus with shared=False"
+            self.busy = True
+        try:
+            rdata = []
+            for addr, write, wdata, wstrb in transfers:
+                data = await self._transfer(addr, write, wdata, wstrb, expect_err)
+                if not write:
+                    rdata.append(data)
+            self.tb.psel.value    = 0
+            self.tb.penable.value = 0
+            return rdata
+        finally:
+            if self.lock is not None:
+                self.lock.release()
+            else:
+                self.busy = False
+
+
+    async def _write(self, addr, wdata, wstrb, expect_err=False):
+        await self._burst([(addr, 1, wdata, wstrb)], expect_err=expect_err)
 
 
     async def _read(self, addr, expect_err=False):
-        async with self.lock:
-            tb = self.tb
-            tb.psel.value = 1
-            tb.pwrite.value = 0
-            tb.paddr.value = addr
-            tb.pwstrb.value = 0
-            await RisingEdge(tb.clk)
-            tb.penable.value = 1
-            while True:
-                await RisingEdge(tb.clk)
-                if tb.pready.value == 1:
-                    assert tb.pslverr.value == expect_err
-                    rdata = tb.prdata.value
-                    tb.psel.value = 0
-                    tb.penable.value = 0
-                    return rdata.integer
+        rdata = await self._burst([(addr, 0, 0, 0)], expect_err=expect_err)
+        return rdata[0]
 
 
     async def write(self, addr, wdata, expect_err=False):
@@ -68,3 +89,25 @@ class Apb:
         rdata = await self._read(addr, expect_err=expect_err)
         return (rdata >> ((addr & 3) * 8)) & 0xff
 
+
+    # Write wdata[i] to addrs[i] in one burst
+    async def write_many(self, addrs, wdata, expect_err=False):
+        assert len(addrs) == len(wdata)
+        await self._burst([(addr, 1, data, 0b1111) for addr, data in zip(addrs, wdata)],
+                          expect_err=expect_err)
+
+
+    # Read addrs in one burst
+    async def read_many(self, addrs, expect_err=False):
+        return await self._burst([(addr, 0, 0, 0) for addr in addrs], expect_err=expect_err)
+
+
+    async def write_byte_many(self, addrs, wdata, expect_err=False):
+        assert len(addrs) == len(wdata)
+        await self._burst([(addr, 1, data << ((addr & 3) * 8), 1 << (addr & 3)) for addr, data in zip(addrs, wdata)],
+                          expect_err=expect_err)
+
+
+    async def read_byte_many(self, addrs, expect_err=False):
+        rdata = await self.read_many(addrs, expect_err=expect_err)
+        return [(data >> ((addr & 3) * 8)) & 0xff for addr, data in zip(addrs, rdata)]
@@ -0,0 +1,179 @@
+import os, sys, json, argparse
+import runner
+from utils import get_proj_dir
+
+
+SCOPES    = ["core", "uart", "plic", "top"]
+COUNTERS  = ["wall_s", "sim_ns", "cycles", "instret"]
+TOLERANCE = 0.1   # Throughput drop allowed against the baseline
+MIN_WALL  = 1.0   # Tests shorter than this in the baseline are too noisy to compare
+
+
+def out_dir(scope):
+    return f"{get_proj_dir()}/build/sim/{scope}/bench"
+
+
+# Simulated kHz and instructions per second of a set of counters
+def add_rates(entry):
+    wall = entry["wall_s"]
+    entry["khz"] = entry["cycles"] / wall / 1000 if wall and entry["cycles"] is not None else None
+    entry["ips"] = entry["instret"] / wall if wall and entry["instret"] is not None else None
+    return entry
+
+
+def total(entries):
+    entry = {}
+    for key in COUNTERS:
+        values = [e[key] for e in entries if e[key] is not None]
+        entry[key] = sum(values) if values else None
+    return add_rates(entry)
+
+
+# Run the tests of the scopes one after the other, so that they do not compete
+# for the CPU, and read back the counters recorded by bench_probe
+def run(scopes, module=None):
+    jobs = []
+    for scope in scopes:
+        os.makedirs(out_dir(scope), exist_ok=True)
+        print(f"Building {runner.sim_binary(scope)}")
+        runner.build(scope, log=f"{out_dir(scope)}/build.log")
+
+        records = f"{out_dir(scope)}/records.jsonl"
+        if os.path.exists(records):
+            os.remove(records)
+        variables = {"MODULE": module} if module else {}
+        jobs.append(runner.Job(scope, scope,
+            results = f"{out_dir(scope)}/results.xml",
+            log     = f"{out_dir(scope)}/sim.log",
+            env     = {"BENCH": records},
+            **variables))
+
+    def on_done(job):
+        print(f"{job.name} done in {job.time:.1f}s (exit {job.proc.returncode}, log {job.log})")
+
+    runner.run_jobs(jobs, 1, on_done)
+
+    result = {"scopes": {}, "tests": {}}
+    for job in jobs:
+        status  = {f"{c.classname}.{c.name}": c.status for c in runner.parse_results(job.results)}
+        entries = []
+        records = job.env["BENCH"]
+        if os.path.exists(records):
+            with open(records, "r") as file:
+                entries = [json.loads(line) for line in file]
+        for entry in entries:
+            # A test without a result crashed the simulator
+            entry["status"] = status.get(entry["test"], "FAIL")
+            result["tests"][f"{job.scope}.{entry.pop('test')}"] = add_rates(entry)
+        result["scopes"][job.scope] = total(entries)
+    return result
+
+
+def print_report(result):
+    tests = result["tests"]
+    width = max([len(name) for name in tests] + [5])
+    print(f"{'TEST':<{width}}  STATUS  WALL(s)      SIM(ns)      CYCLES     INSTRET       kHz        IPS")
+    for name, e in sorted(tests.items(), key=lambda item: -item[1]["wall_s"]):
+        print(f"{name:<{width}}  {e['status']:<6}  {e['wall_s']:7.2f}  {e['sim_ns']:11.0f}  {fmt(e['cycles'], 10, 'd')}"
+              f"  {fmt(e['instret'], 10, 'd')}  {fmt(e['khz'], 8, '.1f')}  {fmt(e['ips'], 9, '.0f')}")
+    for name, e in result["scopes"].items():
+        print(f"{name:<{width}}  {'TOTAL':<6}  {e['wall_s'] or 0:7.2f}  {e['sim_ns'] or 0:11.0f}  {fmt(e['cycles'], 10, 'd')}"
+              f"  {fmt(e['instret'], 10, 'd')}  {fmt(e['khz'], 8, '.1f')}  {fmt(e['ips'], 9, '.0f')}")
+
+    # Results measured by the guest programs themselves, see tb/top/test_bench.py
+    guests = {name: e["guest"] for name, e in tests.items() if "guest" in e}
+    if guests:
+        print(f"{'GUEST':<{width}}  ITERATIONS      CYCLES     INSTRET     CPI      ITER/s")
+        for name, g in guests.items():
+            print(f"{name:<{width}}  {g['iterations']:10d}  {g['cycles']:10d}  {g['instret']:10d}"
+                  f"  {g['cpi']:6.3f}  {g['iterations_per_s']:10.1f}")
+
+
+def fmt(value, width, spec):
+    return f"{'-':>{width}}" if value is None else f"{value:{width}{spec}}"
+
+
+# Throughput of the scopes and of the long enough tests against the baseline.
+# The simulated kHz is compared, the tests without cycles compare their
+# simulated time per second instead. The CPI of the guest programs is
+# compared too.
+def compare(result, baseline, tolerance, min_wall):
+    pairs = [(f"{name} (total)", e, baseline["scopes"].get(name), 0) for name, e in result["scopes"].items()]
+    pairs += [(name, e, baseline["tests"].get(name), min_wall) for name, e in result["tests"].items()]
+
+    regressions = []
+    print(f"Throughput against the baseline, tolerance {100 * tolerance:.0f}%")
+    for name, new, old, min_time in pairs:
+        if old is None or not old["wall_s"] or old["wall_s"] < min_time:
+            continue
+        if new["khz"] is not None and old["khz"]:
+            old_rate, new_rate, unit = old["khz"], new["khz"], "kHz"
+        elif new["wall_s"]:
+            old_rate, new_rate, unit = old["sim_ns"] / old["wall_s"], new["sim_ns"] / new["wall_s"], "ns/s"
+        else:
+            continue
+        change = new_rate / old_rate - 1
+        flag   = ""
+        if change < -tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"  {name}: {old_rate:.1f} -> {new_rate:.1f} {unit} ({100 * change:+.1f}%){flag}")
+
+    # The CPI of the guest programs does not depend on the host
+    for name, new in result["tests"].items():
+        old = baseline["tests"].get(name)
+        if "guest" not in new or old is None or "guest" not in old:
+            continue
+        change = new["guest"]["cpi"] / old["guest"]["cpi"] - 1
+        flag   = ""
+        if change > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(f"{name} (CPI)")
+        print(f"  {name}: CPI {old['guest']['cpi']:.3f} -> {new['guest']['cpi']:.3f} ({100 * change:+.1f}%){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the throughput of the simulators and compare it to a baseline")
+    parser.add_argument("-s", "--scope", action="append", choices=SCOPES, help="scope to run (default: all)")
+    parser.add_argument("-m", "--module", help="MODULE to run instead of the default tests of the scope")
+    parser.add_argument("-o", "--output", default=f"{get_proj_dir()}/bench_output.txt", help="JSON file of the results")
+    parser.add_argument("-b", "--baseline", default=f"{get_proj_dir()}/tb/bench_baseline.json", help="JSON file of the baseline")
+    parser.add_argument("-t", "--tolerance", type=float, default=TOLERANCE, help="throughput drop allowed, as a fraction")
+    parser.add_argument("--min-wall", type=float, default=MIN_WALL, help="wall time in seconds under which a test is not compared")
+    parser.add_argument("-u", "--update", action="store_true", help="save the results as the new baseline")
+    args = parser.parse_args()
+    if args.module and len(args.scope or SCOPES) != 1:
+        parser.error("--module needs a single --scope")
+
+    result = run(args.scope or SCOPES, args.module)
+    print_report(result)
+    with open(args.output, "w") as file:
+        json.dump(result, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    # A scope without any test did not build or did not start
+    failed  = [name for name, e in result["tests"].items() if e["status"] == "FAIL"]
+    failed += [name for name, e in result["scopes"].items() if e["wall_s"] is None]
+    if failed:
+        print(f"FAILED={len(failed)}: {' '.join(failed)}")
+
+    if args.update:
+        with open(args.baseline, "w") as file:
+            json.dump(result, file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 1 if failed else 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline in {args.baseline}, run with --update to create it")
+        return 1 if failed else 0
+    with open(args.baseline, "r") as file:
+        baseline = json.load(file)
+    regressions = compare(result, baseline, args.tolerance, args.min_wall)
+    if regressions:
+        print(f"REGRESSIONS={len(regressions)}: {' '.join(regressions)}")
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
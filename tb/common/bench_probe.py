@@ -0,0 +1,96 @@
+import os, json, functools, cocotb
+from cocotb.regression import RegressionManager
+from cocotb.triggers import RisingEdge
+from cocotb.utils import get_sim_time
+
+BENCH = os.environ.get("BENCH")   # File to append the counters of every test to
+
+# Where the core is under the toplevel of each scope
+CORE_PATHS = ("u_core", "dut.u_core")
+
+_probe = None                     # Probe loaded with BENCH set
+
+
+def find_core(top):
+    for path in CORE_PATHS:
+        try:
+            return functools.reduce(getattr, path.split("."), top)
+        except AttributeError:
+            pass
+    return None
+
+
+# Add the results of the guest program of the running test to its record,
+# does nothing without BENCH
+def report(**results):
+    if _probe is not None:
+        _probe.guest.update(results)
+
+
+# Counters of every test, appended as JSON lines to a file for bench.py.
+# Loaded as the first module of MODULE when BENCH is set, it wraps the start
+# of the tests and the recording of their results by the regression manager,
+# so that the tests need no change.
+# The clock period is measured from two rising edges of clk in the first
+# test, the instructions are read from minstret, which counts from the
+# reset of each test.
+class Probe():
+    def __init__(self, top, path):
+        self.top    = top
+        self.core   = find_core(top)
+        self.path   = path
+        self.period = None   # ns
+        self.guest  = {}
+
+    def start(self):
+        probe         = self
+        start_test    = RegressionManager._start_test
+        record_result = RegressionManager._record_result
+
+        @functools.wraps(start_test)
+        def wrap_start_test(self):
+            start_test(self)
+            # The task dies with a test too short to measure it, the next one retries
+            if probe.period is None:
+                cocotb.start_soon(probe.measure())
+
+        @functools.wraps(record_result)
+        def wrap_record_result(self, test, outcome, wall_time_s, sim_time_ns):
+            probe.record(test, wall_time_s, sim_time_ns)
+            return record_result(self, test, outcome, wall_time_s, sim_time_ns)
+
+        RegressionManager._start_test    = wrap_start_test
+        RegressionManager._record_result = wrap_record_result
+
+    async def measure(self):
+        await RisingEdge(self.top.clk)
+        start = get_sim_time("ns")
+        await RisingEdge(self.top.clk)
+        self.period = get_sim_time("ns") - start
+
+    def record(self, test, wall_time_s, sim_time_ns):
+        cycles = None
+        if self.period:
+            cycles = round(sim_time_ns / self.period)
+        instret = None
+        if self.core is not None:
+            try:
+                instret = self.core.u_csr.minstret.value.integer
+            except ValueError:
+                pass   # X before the first reset
+
+        entry = {"test":    f"{test.__module__}.{test.__qualname__}",
+                 "wall_s":  wall_time_s,
+                 "sim_ns":  sim_time_ns,
+                 "cycles":  cycles,
+                 "instret": instret}
+        if self.guest:
+            entry["guest"] = self.guest
+            self.guest = {}
+        with open(self.path, "a") as file:
+            file.write(json.dumps(entry) + "\n")
+
+
+if BENCH and cocotb.top is not None:
+    _probe = Probe(cocotb.top, BENCH)
+    _probe.start()
@@ -0,0 +1,39 @@
+from gpi import watch
+from retire_trace import watch_cycles
+
+
+# The caches are only built with ICACHE=<sets> and DCACHE=<sets> in tb/core
+def has_cache(core, cache):
+    return hasattr(getattr(core.u_mem_if, f"u_{cache}"), "g_cache")
+
+
+# Accesses hit in a cache of the memory interface of a core ("icache" or
+# "dcache") and lines refilled, from the signals of its HPM events.
+# The hits of the instructions fetched ahead come on consecutive cycles.
+class CacheStats():
+    def __init__(self, core, cache):
+        self.cache     = cache
+        self.hits      = 0
+        self.misses    = 0
+        self.callbacks = {}
+        watch_cycles(self.callbacks, core, getattr(core.u_mem_if, f"{cache}_hit"), self.__hit)
+        watch(self.callbacks, getattr(core.u_mem_if, f"{cache}_miss"), self.__miss)
+
+    def __hit(self):
+        self.hits += 1
+
+    def __miss(self):
+        self.misses += 1
+
+    def stop(self):
+        for callback in self.callbacks.values():
+            callback.deregister()
+        self.callbacks = {}
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def log(self, logger):
+        logger.info(f"{self.cache}: {self.hits} hits, {self.misses} misses, "
+                    f"hit rate {100 * self.hit_rate():.2f}%")
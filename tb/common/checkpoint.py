@@ -0,0 +1,106 @@
+import gzip, pickle, time
+from cocotb.binary import BinaryValue
+from cocotb.handle import HierarchyObject, HierarchyArrayObject, NonHierarchyIndexableObject, ModifiableObject
+from cocotb.triggers import Event, FallingEdge
+from cocotb.utils import get_sim_time
+
+
+CHECKPOINT_VERSION = 1
+SKIP_NAMES = {"clk"}  # Driven by the clock generator of the testbench
+
+
+# Collect the console output of a UART and wake up when a string appears
+class Console():
+    def __init__(self, uart, text=""):
+        self.text    = text
+        self.pattern = None
+        self.event   = Event()
+        uart.listeners.append(self.__on_char)
+
+    def __on_char(self, data):
+        self.text += chr(data)
+        if self.pattern is not None and self.text.endswith(self.pattern):
+            self.event.set()
+
+    # Wait until the console prints a string
+    async def wait_for(self, pattern):
+        self.pattern = pattern
+        self.event.clear()
+        await self.event.wait()
+        self.pattern = None
+
+
+# Snapshot of all the signals of a design, plus the dirty words of its RAMs and
+# some cocotb-side state.
+# The snapshot is taken and restored on a falling edge of the clock: the whole
+# design is written back with the values it had at that point, so registers,
+# nets and memories are consistent with each other on the next rising edge.
+class Checkpoint():
+    def __init__(self, top, clk, rams=()):
+        self.top  = top
+        self.clk  = clk
+        self.rams = rams
+
+    # Walk the hierarchy and return the writable signals by path
+    def signals(self):
+        skip = {ram.mem._path for ram in self.rams}
+        found = {}
+        def walk(handle):
+            for child in handle:
+                if child._name in SKIP_NAMES or child._path in skip:
+                    continue
+                if isinstance(child, ModifiableObject):
+                    found[child._path] = child
+                elif isinstance(child, (HierarchyObject, HierarchyArrayObject, NonHierarchyIndexableObject)):
+                    walk(child)
+        walk(self.top)
+        return found
+
+    # Save the design at the next falling edge of the clock
+    async def save(self, filename, state=None):
+        await FallingEdge(self.clk)
+        start = time.perf_counter()
+        values = {}
+        for path, handle in self.signals().items():
+            value = handle.value
+            values[path] = value.integer if isinstance(value, BinaryValue) else value
+        mems = {}
+        for ram in self.rams:
+            # Only the words written while tracking are saved
+            assert ram.tracking, f"{ram.mem._path} does not track its writes"
+            dirty = sorted(ram.dirty)
+            mems[ram.mem._path] = (dirty, [ram.mem[idx].value.integer for idx in dirty])
+        data = {
+            "version"  : CHECKPOINT_VERSION,
+            "sim_time" : get_sim_time("ns"),
+            "signals"  : values,
+            "mems"     : mems,
+            "state"    : state or {},
+        }
+        with gzip.open(filename, "wb") as file:
+            pickle.dump(data, file)
+        self.top._log.info(f"Checkpoint saved to {filename}: {len(values)} signals, "
+                           f"{sum(len(m[0]) for m in mems.values())} RAM words "
+                           f"({time.perf_counter() - start:.1f}s)")
+
+    # Restore the design at the next falling edge of the clock, return the saved state
+    async def restore(self, filename):
+        with gzip.open(filename, "rb") as file:
+            data = pickle.load(file)
+        assert data["version"] == CHECKPOINT_VERSION, "Unsupported checkpoint version"
+        await FallingEdge(self.clk)
+        start = time.perf_counter()
+        signals = self.signals()
+        missing = [path for path in data["signals"] if path not in signals]
+        assert not missing, f"Checkpoint does not match the design: {missing[:5]}"
+        for path, value in data["signals"].items():
+            signals[path].value = value
+        for ram in self.rams:
+            ram.clear_dirty()
+            idxs, words = data["mems"].get(ram.mem._path, ([], []))
+            for idx, word in zip(idxs, words):
+                ram.mem[idx].value = word
+            ram.dirty.update(idxs)
+        self.top._log.info(f"Checkpoint restored from {filename} (saved at {data['sim_time']:.0f}ns, "
+                           f"{time.perf_counter() - start:.1f}s)")
+        return data["state"]
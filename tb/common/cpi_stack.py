@@ -0,0 +1,260 @@
+import os, atexit, logging, cocotb
+from cocotb.triggers import ReadOnly, RisingEdge
+from cocotb.utils import get_sim_time
+from gpi import raw, watch, sim_steps, EDGE_ANY
+from retire_trace import watch_retire
+
+CPI_STACK = os.environ.get("CPI_STACK")   # Directory to write the CPI stacks to
+
+_active = None                     # CPI stack started by the last call to start_cpi_stack
+
+# core_controller states
+CTRL_IDLE    = 0
+CTRL_FETCH_0 = 1
+CTRL_FETCH_1 = 2
+CTRL_EXEC_0  = 3
+CTRL_MEM_0   = 4
+CTRL_EXEC_1  = 5
+CTRL_MEM_1   = 6
+
+# core_mem_if states
+MEM_IF_IDLE    = 0
+MEM_IF_TRANS1  = 1
+MEM_IF_TRANS0  = 2
+MEM_IF_ACCESS1 = 3
+MEM_IF_ACCESS0 = 4
+MEM_IF_BARE    = 5
+
+# Decoder outputs
+CTRL_PATH_MEM = 1
+CTRL_PATH_AMO = 2
+EXEC_MUL      = 2
+EXEC_DIV      = 3
+PC_JUMP       = 1
+PC_BRANCH     = 2
+MEM_WRITE     = 2
+
+# Opcodes classified from the instruction itself
+OP_MISCMEM = 0x0f
+OP_AMO     = 0x2f
+OP_SYSTEM  = 0x73
+
+# Cycle categories
+FETCH, FETCH_WALK, EXECUTE, DATA_WALK, DATA, AMO_PHASE, TRAP_REDIRECT = range(7)
+CATEGORIES = ("fetch wait", "fetch page walk", "execute", "data page walk",
+              "data access", "AMO 2nd phase", "trap redirect")
+
+# Instruction classes, a trapped instruction is in "trap"
+CLASSES = ("alu", "mul", "div", "branch", "jump", "load", "store", "amo", "system", "trap")
+ALU, MUL, DIV, BRANCH, JUMP, LOAD, STORE, AMO, SYSTEM, TRAP = range(len(CLASSES))
+
+
+# Category of a cycle, from the states of the controller and of the memory interface
+def category(ctrl, mem_if):
+    walk = mem_if in (MEM_IF_TRANS1, MEM_IF_TRANS0)
+    if ctrl in (CTRL_IDLE, CTRL_FETCH_0, CTRL_FETCH_1):
+        return FETCH_WALK if walk else FETCH
+    if ctrl == CTRL_EXEC_0:
+        return EXECUTE
+    if ctrl == CTRL_MEM_0:
+        return DATA_WALK if walk else DATA
+    return AMO_PHASE
+
+
+# Cycles of the core by category, per class of retired instruction.
+# The cycles spent in each pair of controller and memory interface states are
+# added to the instruction in flight, which is classified from the decoder
+# when it retires, so every cycle ends up in exactly one cell of the table.
+# Only the state changes, retirements and traps run Python code.
+class CpiStack():
+    def __init__(self, core):
+        self.core      = core
+        self.table     = [[0] * len(CATEGORIES) for _ in CLASSES]
+        self.counts    = [0] * len(CLASSES)
+        self.pending   = [0] * len(CATEGORIES)   # Cycles of the instruction in flight
+        self.category  = FETCH
+        self.key       = None
+        self.since     = 0                       # First cycle not accounted yet
+        self.t0        = 0
+        self.period    = 1
+        self.task      = None
+        self.path      = None
+        self.callbacks = {}
+        self.categories = {(ctrl, mem_if): category(ctrl, mem_if)
+                           for ctrl in range(CTRL_MEM_1 + 1) for mem_if in range(MEM_IF_BARE + 1)}
+
+    # Start counting once the core is out of reset
+    def start(self):
+        self.task = cocotb.start_soon(self.__run())
+        return self.task
+
+    def stop(self):
+        if self.task is not None:
+            self.task.kill()
+            self.task = None
+        for callback in self.callbacks.values():
+            callback.deregister()
+        self.callbacks = {}
+
+    async def __run(self):
+        core = self.core
+
+        # A reset sequence started at the same time only drives rst_n at the end of the step
+        await ReadOnly()
+        if not core.rst_n.value.integer:
+            await RisingEdge(core.rst_n)
+
+        # Cycles are counted in clock periods of simulation time
+        await RisingEdge(core.clk)
+        start = get_sim_time()
+        await RisingEdge(core.clk)
+        self.t0     = get_sim_time()
+        self.period = self.t0 - start
+
+        trap   = core.u_trap_handler
+        change = self.__change()
+        change()
+        watch(self.callbacks, core.u_controller.curr_state, change, EDGE_ANY)
+        watch(self.callbacks, core.u_mem_if.curr_state, change, EDGE_ANY)
+        watch_retire(self.callbacks, core, self.__retire(change))
+        watch(self.callbacks, trap.exception_valid, self.__trap(change))
+        watch(self.callbacks, trap.m_interrupt_valid, self.__trap(change))
+        watch(self.callbacks, trap.s_interrupt_valid, self.__trap(change))
+
+    def __cycle(self):
+        return (sim_steps() - self.t0) // self.period
+
+    # Account the cycles of the last pair of states when it changes.
+    # Both states change on the same edge, the second callback finds no change.
+    def __change(self):
+        ctrl   = raw(self.core.u_controller.curr_state)
+        mem_if = raw(self.core.u_mem_if.curr_state)
+
+        def change():
+            key = (ctrl(), mem_if())
+            if key == self.key:
+                return
+            now = self.__cycle()
+            self.pending[self.category] += now - self.since
+            self.key      = key
+            self.category = self.categories.get(key, FETCH)
+            self.since    = now
+        return change
+
+    # The retiring cycle is the last one of the instruction
+    def __retire(self, change):
+        decoder     = self.core.u_stage_exec.u_decoder
+        instr       = raw(self.core.u_stage_fetch.instr)
+        ctrl_path   = raw(decoder.ctrl_path)
+        mem_dir     = raw(decoder.mem_dir)
+        pc_src      = raw(decoder.pc_src)
+        exec_engine = raw(decoder.exec_engine)
+
+        def retire():
+            change()
+            now = self.__cycle() + 1
+            self.pending[self.category] += now - self.since
+            self.since = now
+
+            opcode = instr() & 0x7f
+            path   = ctrl_path()
+            if opcode == OP_AMO:
+                cls = AMO
+            elif opcode == OP_SYSTEM or opcode == OP_MISCMEM:
+                cls = SYSTEM
+            elif path == CTRL_PATH_MEM:
+                cls = STORE if mem_dir() == MEM_WRITE else LOAD
+            elif path == CTRL_PATH_AMO:
+                cls = AMO
+            else:
+                src = pc_src()
+                if src == PC_JUMP:
+                    cls = JUMP
+                elif src == PC_BRANCH:
+                    cls = BRANCH
+                else:
+                    engine = exec_engine()
+                    cls = MUL if engine == EXEC_MUL else DIV if engine == EXEC_DIV else ALU
+            self.__account(cls)
+        return retire
+
+    # A trap spends one cycle redirecting the fetch, the trapped instruction
+    # or the interrupted fetch is accounted as a trap
+    def __trap(self, change):
+        def trap():
+            change()
+            now = self.__cycle()
+            self.pending[self.category] += now - self.since
+            self.pending[TRAP_REDIRECT] += 1
+            self.since = now + 1
+            self.__account(TRAP)
+        return trap
+
+    def __account(self, cls):
+        row = self.table[cls]
+        for i, cycles in enumerate(self.pending):
+            row[i] += cycles
+        self.counts[cls] += 1
+        self.pending = [0] * len(CATEGORIES)
+
+    # Cycles accounted so far
+    def cycles(self):
+        return sum(map(sum, self.table))
+
+    # Cycles per category over all the classes
+    def stack(self):
+        return [sum(row[i] for row in self.table) for i in range(len(CATEGORIES))]
+
+    # Table of the cycles per class and category, with the CPI of each class.
+    # The last lines are the CPI stack: the share of each category in the CPI.
+    def report(self):
+        total   = self.cycles()
+        retired = sum(self.counts[:TRAP]) or 1
+        width   = max(map(len, CATEGORIES))
+        lines   = [f"{'class':<8}{'count':>10}{'cycles':>12}{'CPI':>8}  " +
+                   "".join(f"{name:>{width + 2}}" for name in CATEGORIES)]
+        for cls, name in enumerate(CLASSES):
+            count = self.counts[cls]
+            if not count:
+                continue
+            row = self.table[cls]
+            lines.append(f"{name:<8}{count:>10}{sum(row):>12}{sum(row) / count:>8.2f}  " +
+                         "".join(f"{cycles:>{width + 2}}" for cycles in row))
+        lines.append(f"{'total':<8}{sum(self.counts):>10}{total:>12}{total / retired:>8.2f}")
+        lines.append("")
+        lines.append(f"CPI stack of {retired} retired instructions:")
+        for name, cycles in zip(CATEGORIES, self.stack()):
+            lines.append(f"  {name:<{width}}  {cycles / retired:8.3f}  {100 * cycles / (total or 1):6.2f}%")
+        return "\n".join(lines) + "\n"
+
+    # Write the report to its path and log it, once.
+    # Also registered to run at the exit of the simulator, as the profiler.
+    def save(self):
+        if self.path is not None:
+            self.write(self.path)
+            self.path = None
+
+    def write(self, filename):
+        report = self.report()
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        with open(filename, "w") as file:
+            file.write(report)
+        logging.getLogger("cocotb.cpi_stack").info("%s\n%s", filename, report)
+
+
+# Count the cycles of the core into CPI_STACK/<name>.cpi when CPI_STACK is set.
+# The callbacks outlive the test that registered them, so starting a CPI stack
+# ends and writes the one of the previous test.
+def start_cpi_stack(core, name):
+    global _active
+    if not CPI_STACK:
+        return None
+    if _active is not None:
+        _active.stop()
+        _active.save()
+
+    _active = CpiStack(core)
+    _active.path = f"{CPI_STACK}/{name}.cpi"
+    _active.start()
+    atexit.register(_active.save)
+    return _active
@@ -0,0 +1,80 @@
+import struct
+
+ELF_MAGIC = b"\x7fELF"
+
+# ELF identification / types
+ELFCLASS32    = 1
+ELFDATA2LSB   = 1
+PT_LOAD       = 1
+SHT_SYMTAB    = 2
+STT_NOTYPE    = 0
+STT_FUNC      = 2
+SHN_UNDEF     = 0
+SHN_ABS       = 0xfff1
+SHF_EXECINSTR = 0x4
+
+# Return True if the buffer starts with an ELF header
+def is_elf(data):
+    return bytes(data[:4]) == ELF_MAGIC
+
+# Segment to be loaded in memory
+class Segment():
+    def __init__(self, paddr, vaddr, data, memsz):
+        self.paddr = paddr
+        self.vaddr = vaddr
+        self.data  = data
+        self.memsz = memsz
+
+# Minimal little-endian ELF32 reader
+class Elf():
+    def __init__(self, data):
+        self.data = memoryview(data)
+        assert is_elf(self.data), "Not an ELF file"
+        assert self.data[4] == ELFCLASS32, "Only ELF32 is supported"
+        assert self.data[5] == ELFDATA2LSB, "Only little-endian ELF is supported"
+        # Header fields used by the loader
+        (self.e_entry, self.e_phoff, self.e_shoff) = struct.unpack_from("<III", self.data, 24)
+        (self.e_phentsize, self.e_phnum,
+         self.e_shentsize, self.e_shnum, self.e_shstrndx) = struct.unpack_from("<HHHHH", self.data, 42)
+
+    @classmethod
+    def open(cls, filename):
+        with open(filename, "rb") as file:
+            return cls(file.read())
+
+    # PT_LOAD segments with their file content
+    def segments(self):
+        for i in range(self.e_phnum):
+            off = self.e_phoff + i * self.e_phentsize
+            (p_type, p_offset, p_vaddr, p_paddr,
+             p_filesz, p_memsz) = struct.unpack_from("<IIIIII", self.data, off)
+            if p_type != PT_LOAD:
+                continue
+            yield Segment(p_paddr, p_vaddr, self.data[p_offset:p_offset + p_filesz], p_memsz)
+
+    # Named function and label symbols of the symbol table, as (address, size, name)
+    def symbols(self):
+        for i in range(self.e_shnum):
+            off = self.e_shoff + i * self.e_shentsize
+            (sh_type, _, _, sh_offset, sh_size,
+             sh_link, _, _, sh_entsize) = struct.unpack_from("<IIIIIIIII", self.data, off + 4)
+            if sh_type != SHT_SYMTAB:
+                continue
+            # String table of the symbol names, the names have no length limit
+            (str_off, str_size) = struct.unpack_from("<II", self.data, self.e_shoff + sh_link * self.e_shentsize + 16)
+            strtab = bytes(self.data[str_off:str_off + str_size])
+            for sym in range(sh_offset, sh_offset + sh_size, sh_entsize):
+                (st_name, st_value, st_size, st_info, _, st_shndx) = struct.unpack_from("<IIIBBH", self.data, sym)
+                if st_name == 0 or (st_info & 0xf) not in (STT_NOTYPE, STT_FUNC):
+                    continue
+                if st_shndx in (SHN_UNDEF, SHN_ABS) or st_shndx >= self.e_shnum:
+                    continue
+                # Only the code, not the labels of the data sections
+                sh_flags = struct.unpack_from("<I", self.data, self.e_shoff + st_shndx * self.e_shentsize + 8)[0]
+                if not sh_flags & SHF_EXECINSTR:
+                    continue
+                end  = strtab.find(b"\0", st_name)
+                name = strtab[st_name:end if end >= 0 else len(strtab)].decode()
+                # Skip the local labels and the mapping symbols ($x, $d) of the assembler
+                if not name.startswith((".L", "$")):
+                    yield (st_value, st_size, name)
@@ -0,0 +1,357 @@
+import os, sys, time
+from array import array
+from cocotb.triggers import FallingEdge, RisingEdge
+from elf import Elf, is_elf
+from iss import M32, HPM_NUM, BusError, Iss, Region
+
+FAST_FORWARD_CPI = int(os.environ.get("FAST_FORWARD_CPI", "8"))  # Cycles per instruction assumed by the ISS
+
+# Memory map of top
+RAM_BASE     = 0x0000_0000
+UART_BASE    = 0x8000_0000
+UART_SIZE    = 1 << 12
+MTIMER_BASE  = 0x8001_0000
+MTIMER_SIZE  = 1 << 16
+PLIC_BASE    = 0x9000_0000
+PLIC_SIZE    = 1 << 26
+ROM_BASE     = 0xf000_0000
+RESET_VECTOR = 0x0000_0000
+
+# mip bits of the interrupt lines
+MIP_MTIP = 1 << 7
+MIP_SEIP = 1 << 9
+MIP_MEIP = 1 << 11
+
+# Writable bits of medeleg, in the order of u_flop_medeleg (MSB first)
+MEDELEG_BITS = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 12, 13, 15, 18, 19]
+
+
+# Functional model of mtimer: mtime counts the cycles, partial writes are errors
+class MtimerModel():
+    def __init__(self):
+        self.mtime    = 0
+        self.mtimecmp = 0xffff_ffff_ffff_ffff
+
+    def read(self, offset):
+        if offset & 3:
+            return 0
+        if offset == 0x0000: return self.mtime & M32
+        if offset == 0x0004: return self.mtime >> 32
+        if offset == 0x8000: return self.mtimecmp & M32
+        if offset == 0x8004: return self.mtimecmp >> 32
+        return 0
+
+    def write(self, offset, value, mask):
+        if mask != M32:
+            raise BusError()
+        if offset == 0x0000:   self.mtime    = (self.mtime & ~M32) | value
+        elif offset == 0x0004: self.mtime    = (self.mtime & M32) | (value << 32)
+        elif offset == 0x8000: self.mtimecmp = (self.mtimecmp & ~M32) | value
+        elif offset == 0x8004: self.mtimecmp = (self.mtimecmp & M32) | (value << 32)
+
+    def tick(self, cycles):
+        self.mtime = (self.mtime + cycles) & 0xffff_ffff_ffff_ffff
+
+    def irq(self):
+        return MIP_MTIP if self.mtime >= self.mtimecmp else 0
+
+    # Backdoor the registers into u_mtimer
+    def handoff(self, dut):
+        dut.mtime.value           = self.mtime
+        dut.u_mtimecmp.q.value    = self.mtimecmp & M32
+        dut.u_mtimecmph.q.value   = self.mtimecmp >> 32
+
+
+# Functional model of the UART registers. The characters are sent at once, so the
+# TX FIFO is always empty, and nothing is received while fast-forwarding.
+class UartModel():
+    def __init__(self):
+        self.text = ""
+        self.ier  = 0
+        self.fcr  = 0       # FIFO enable and trigger bits of FCR
+        self.lcr  = 0b0000_0011
+        self.mcr  = 0
+        self.spr  = 0
+        self.dll  = 1
+        self.dlm  = 0
+        self.listeners = []
+
+    def read(self, offset):
+        if offset >> 3:
+            raise BusError()
+        reg  = offset & 7
+        dlab = self.lcr >> 7
+        if reg == 0:   value = self.dll if dlab else 0
+        elif reg == 1: value = self.dlm if dlab else self.ier
+        elif reg == 2: value = ((self.fcr & 1) * 0xc0) | (0b0010 if self.interrupt() else 0b0001)
+        elif reg == 3: value = self.lcr
+        elif reg == 4: value = self.mcr
+        elif reg == 5: value = 0x60     # THR and transmitter empty
+        elif reg == 6: value = 0
+        else:          value = self.spr
+        return value << (8 * (reg & 3))
+
+    def write(self, offset, value, mask):
+        reg = offset & 7
+        if offset >> 3 or mask != 0xff << (8 * (reg & 3)) or reg in (5, 6):
+            raise BusError()
+        data = (value >> (8 * (reg & 3))) & 0xff
+        dlab = self.lcr >> 7
+        if reg == 0 and dlab: self.dll = data
+        elif reg == 0:        self.__send(data)
+        elif reg == 1 and dlab: self.dlm = data
+        elif reg == 1:        self.ier = data & 0xf
+        elif reg == 2:        self.fcr = data & 0xc1
+        elif reg == 3:        self.lcr = data
+        elif reg == 4:        self.mcr = data & 0x1f
+        elif reg == 7:        self.spr = data
+
+    def __send(self, data):
+        self.text += chr(data)
+        for listener in self.listeners:
+            listener(data)
+
+    # Only the THR empty interrupt can be raised
+    def interrupt(self):
+        return bool(self.ier & 0b0010)
+
+    def tick(self, cycles):
+        pass
+
+    # The UART interrupt goes through the PLIC
+    def irq(self):
+        return 0
+
+    # Backdoor the registers into u_uart
+    def handoff(self, dut):
+        reg = dut.u_reg
+        reg.u_ier_flop.q.value = self.ier
+        reg.u_fcr_flop.q.value = ((self.fcr >> 6) << 1) | (self.fcr & 1)
+        reg.u_lcr_flop.q.value = self.lcr
+        reg.u_mcr_flop.q.value = self.mcr
+        reg.u_spr_flop.q.value = self.spr
+        reg.u_dll_flop.q.value = self.dll
+        reg.u_dlm_flop.q.value = self.dlm
+
+
+# Functional model of the PLIC of top: the UART is source 1, M-mode and S-mode
+# external interrupts are targets 0 and 1, priorities are 2 bits
+class PlicModel():
+    def __init__(self, sources, targets=(MIP_MEIP, MIP_SEIP), prio_bits=2):
+        self.sources     = sources
+        self.targets     = targets
+        self.prio_mask   = (1 << prio_bits) - 1
+        self.prio        = [0] * (len(sources) + 1)
+        self.enable      = [0] * len(targets)
+        self.threshold   = [0] * len(targets)
+        self.claimed     = [False] * (len(sources) + 1)
+        self.claimed_tgt = [0] * (len(sources) + 1)
+
+    def pending(self, src):
+        return self.sources[src - 1].interrupt() and not self.claimed[src]
+
+    # Source with the highest priority for a target (lowest ID on ties), and its priority
+    def max_source(self, tgt):
+        best, best_prio = 0, 0
+        for src in range(1, len(self.prio)):
+            prio = self.prio[src] if (self.enable[tgt] >> src) & 1 and self.pending(src) else 0
+            if prio > best_prio:
+                best, best_prio = src, prio
+        return best, best_prio
+
+    def read(self, offset):
+        if offset & 3:
+            raise BusError()
+        src, tgt = (offset >> 2) & 0x1f, (offset >> 12) & 0x1f
+        if offset >> 7 == 0 and 0 < src < len(self.prio):
+            return self.prio[src]
+        if offset == 0x1000:
+            return sum(1 << src for src in range(1, len(self.prio)) if self.pending(src))
+        tgt_enable = (offset >> 7) & 0x1f
+        if offset >> 12 == 0x2 and offset & 0x7c == 0 and tgt_enable < len(self.targets):
+            return self.enable[tgt_enable]
+        if offset >> 17 == 0x10 and offset & 0xffc == 0 and tgt < len(self.targets):
+            return self.threshold[tgt]
+        if offset >> 17 == 0x10 and offset & 0xffc == 4 and tgt < len(self.targets):
+            # Claim
+            src, _ = self.max_source(tgt)
+            if src:
+                self.claimed[src]     = True
+                self.claimed_tgt[src] = tgt
+            return src
+        return 0
+
+    def write(self, offset, value, mask):
+        if offset & 3 or mask != M32:
+            raise BusError()
+        src, tgt = (offset >> 2) & 0x1f, (offset >> 12) & 0x1f
+        if offset >> 7 == 0 and 0 < src < len(self.prio):
+            self.prio[src] = value & self.prio_mask
+            return
+        tgt_enable = (offset >> 7) & 0x1f
+        if offset >> 12 == 0x2 and offset & 0x7c == 0 and tgt_enable < len(self.targets):
+            self.enable[tgt_enable] = value & (((1 << len(self.prio)) - 1) & ~1)
+        elif offset >> 17 == 0x10 and offset & 0xffc == 0 and tgt < len(self.targets):
+            self.threshold[tgt] = value & self.prio_mask
+        elif offset >> 17 == 0x10 and offset & 0xffc == 4 and tgt < len(self.targets):
+            # Complete
+            src = value
+            if 0 < src < len(self.prio) and self.claimed_tgt[src] == tgt:
+                self.claimed[src] = False
+
+    def tick(self, cycles):
+        pass
+
+    def irq(self):
+        ip = 0
+        for tgt, bit in enumerate(self.targets):
+            if self.max_source(tgt)[1] > self.threshold[tgt]:
+                ip |= bit
+        return ip
+
+    # Backdoor the registers into u_plic
+    def handoff(self, dut):
+        for src in range(1, len(self.prio)):
+            dut.u_reg.g_src[src].u_int_prio_flop.q.value = self.prio[src]
+            dut.g_src[src].u_gateway.claimed.value       = int(self.claimed[src])
+            dut.g_src[src].u_gateway.claimed_tgt.value   = self.claimed_tgt[src]
+        for tgt in range(len(self.targets)):
+            dut.u_reg.g_tgt[tgt].u_int_enable_flop.q.value = self.enable[tgt] >> 1
+            dut.u_reg.g_tgt[tgt].u_threshold_flop.q.value  = self.threshold[tgt]
+
+
+# Write the architectural state of the ISS into a core: the RAM words written by
+# the ISS, the registers, the PC, the CSRs and the reservation. This is done on the
+# first falling edge of the clock after the reset, before the core fetches anything.
+async def handoff(core, iss):
+    await FallingEdge(core.clk)
+    while not core.rst_n.value.integer:
+        await RisingEdge(core.rst_n)
+        await FallingEdge(core.clk)
+
+    for idx in sorted(iss.dirty):
+        region = iss.pages[idx >> 10]
+        word   = ((idx << 2) - region.base) >> 2
+        region.ram.mem[word].value = iss.words[idx]
+        if region.ram.tracking:
+            region.ram.dirty.add(word)
+    iss.dirty.clear()
+
+    for i in range(1, 32):
+        core.u_reg_file.reg_mem[i].value = iss.regs[i]
+    core.u_stage_fetch.curr_pc.value      = iss.pc
+    core.u_stage_mem.rsv_addr_valid.value = int(iss.rtl_rsv_valid)
+    core.u_stage_mem.rsv_addr.value       = iss.rtl_rsv_addr
+    _handoff_csr(core.u_csr, iss)
+
+
+def _handoff_csr(csr, iss):
+    csr.priv.value      = iss.priv
+    csr.sie.value       = iss.sie
+    csr.mie.value       = iss.mie
+    csr.spie.value      = iss.spie
+    csr.mpie.value      = iss.mpie
+    csr.spp.value       = iss.spp
+    csr.mpp.value       = iss.mpp
+    csr.mprv.value      = iss.mprv
+    csr.mcycle.value    = iss.mcycle
+    csr.minstret.value  = iss.minstret
+    csr.sepc_base.value = iss.sepc >> 2
+    csr.mepc_base.value = iss.mepc >> 2
+    csr.scause.value    = iss.scause
+    csr.mcause.value    = iss.mcause
+    csr.stval.value     = iss.stval
+    csr.mtval.value     = iss.mtval
+    csr.u_flop_sstatus.q.value       = (iss.mxr << 1) | iss.sum
+    csr.u_flop_mstatus.q.value       = (iss.tsr << 2) | (iss.tw << 1) | iss.tvm
+    csr.u_flop_stvec_base.q.value    = iss.stvec >> 2
+    csr.u_flop_stvec_mode.q.value    = iss.stvec & 3
+    csr.u_flop_mtvec_base.q.value    = iss.mtvec >> 2
+    csr.u_flop_mtvec_mode.q.value    = iss.mtvec & 3
+    csr.u_flop_medeleg.q.value       = sum(((iss.medeleg >> cause) & 1) << (len(MEDELEG_BITS) - 1 - i)
+                                           for i, cause in enumerate(MEDELEG_BITS))
+    csr.u_flop_mideleg.q.value       = (((iss.mideleg >> 1) & 1) << 2) | (((iss.mideleg >> 5) & 1) << 1) | ((iss.mideleg >> 9) & 1)
+    csr.u_flop_sie.q.value           = (((iss.ie >> 9) & 1) << 2) | (((iss.ie >> 5) & 1) << 1) | ((iss.ie >> 1) & 1)
+    csr.u_flop_mie.q.value           = (((iss.ie >> 11) & 1) << 1) | ((iss.ie >> 7) & 1)
+    csr.u_flop_sip.q.value           = (iss.ip >> 1) & 1
+    csr.u_flop_mip.q.value           = (((iss.ip >> 9) & 1) << 1) | ((iss.ip >> 5) & 1)
+    csr.u_flop_scounteren.q.value    = iss.scounteren & 7
+    csr.u_flop_mcounteren.q.value    = iss.mcounteren & 7
+    csr.u_flop_mcountinhibit.q.value = (((iss.mcountinhibit >> 2) & 1) << 1) | (iss.mcountinhibit & 1)
+    csr.u_flop_mideleg_lcof.q.value  = (iss.mideleg >> 13) & 1
+    csr.u_flop_lcofie.q.value        = (iss.ie >> 13) & 1
+    csr.lcofip.value                 = (iss.ip >> 13) & 1
+    csr.u_flop_sscratch.q.value      = iss.sscratch
+    csr.u_flop_mscratch.q.value      = iss.mscratch
+    csr.u_flop_senvcfg.q.value       = iss.senvcfg
+    csr.u_flop_menvcfg.q.value       = iss.menvcfg
+    csr.u_flop_satp.q.value          = iss.satp
+
+    # HPM counters, their enables and their events
+    csr.u_flop_scounteren_hpm.q.value    = iss.scounteren >> 3
+    csr.u_flop_mcounteren_hpm.q.value    = iss.mcounteren >> 3
+    csr.u_flop_mcountinhibit_hpm.q.value = iss.mcountinhibit >> 3
+    csr.mhpmevent_of.value               = sum((iss.mhpmeventh[i] >> 31) << i for i in range(HPM_NUM))
+    for i in range(HPM_NUM):
+        csr.mhpmcounter[i].value                 = iss.mhpmcounter[i]
+        csr.gen_hpm[i].u_flop_mhpmevent.q.value  = iss.mhpmevent[i]
+        csr.gen_hpm[i].u_flop_mhpmeventh.q.value = (iss.mhpmeventh[i] >> 28) & 7
+
+
+# Run the start of a program on the ISS, with functional models of the devices of
+# top, then transfer the architectural state into the RTL which continues from there
+class FastForward():
+    def __init__(self, tb, ram, rom, cpi=FAST_FORWARD_CPI):
+        self.tb     = tb
+        self.mtimer = MtimerModel()
+        self.uart   = UartModel()
+        self.plic   = PlicModel([self.uart])
+        self.rams   = {ram: RAM_BASE, rom: ROM_BASE}
+        self.iss    = Iss([Region(RAM_BASE, 4 * ram.size, ram),
+                           Region(UART_BASE, UART_SIZE, device=self.uart),
+                           Region(MTIMER_BASE, MTIMER_SIZE, device=self.mtimer),
+                           Region(PLIC_BASE, PLIC_SIZE, device=self.plic),
+                           Region(ROM_BASE, 4 * rom.size, rom, read_only=True)],
+                          pc=RESET_VECTOR, timer=self.mtimer)
+        self.iss.cpi = cpi
+
+    # Load a binary file into a RAM and into the ISS, which then does not have to
+    # read these words back from the RTL
+    def load_bin(self, ram, filename, addr=0):
+        ram.load_bin(filename, addr)
+        with open(filename, "rb") as file:
+            data = file.read()
+        if is_elf(data):
+            for seg in Elf(data).segments():
+                self.__preload(ram, seg.paddr, seg.data)
+        else:
+            self.__preload(ram, addr, data)
+
+    def __preload(self, ram, addr, data):
+        data = bytes(data).ljust((len(data) + 3) & ~3, b'\x00')
+        words = array('I')
+        words.frombytes(data)
+        if sys.byteorder == "big":
+            words.byteswap()
+        base = (self.rams[ram] >> 2) + (addr >> 2) % ram.size
+        self.iss.words.update(zip(range(base, base + len(words)), words))
+
+    # Run n instructions on the ISS
+    def run(self, n):
+        start = time.perf_counter()
+        self.iss.run(n)
+        elapsed = time.perf_counter() - start
+        self.tb._log.info(f"Fast-forwarded {n} instructions in {elapsed:.1f}s "
+                          f"({n / elapsed / 1e3 if elapsed > 0 else 0:.0f} kIPS), pc={self.iss.pc:#010x}")
+
+    # Write the state of the ISS and of the device models into the RTL. From then
+    # on, the ISS reads the MMIO values from the RTL and can be used for cosim.
+    async def handoff(self):
+        dut = self.tb.dut
+        await handoff(dut.u_core, self.iss)
+        self.mtimer.handoff(dut.u_mtimer)
+        self.uart.handoff(dut.u_uart)
+        self.plic.handoff(dut.u_plic)
+        self.iss.detach_devices()
+        self.tb._log.info(f"Handed off to the RTL at pc={self.iss.pc:#010x} after {self.iss.instret} "
+                          f"instructions ({len(self.uart.text)} characters sent)")
@@ -0,0 +1,89 @@
+import cocotb
+from cocotb.triggers import Edge, FallingEdge, RisingEdge, Timer
+from cocotb.utils import get_sim_time
+
+# The monitors of the testbench run on every cycle or every edge of a signal,
+# where a BinaryValue per read and a trip through the scheduler per trigger
+# cost ten times more than the work they do. The helpers below go down to the
+# GPI handles and callbacks of cocotb 1.x for that, the only place of the
+# testbench touching these internals. Without them (a newer cocotb) they fall
+# back on .value and on triggers awaited from a task, slower but alike.
+try:
+    from cocotb import simulator
+    GPI = all(hasattr(simulator, name) for name in
+              ("register_value_change_callback", "register_timed_callback", "get_sim_time"))
+except ImportError:
+    GPI = False
+
+EDGE_RISING  = 1   # Edge types of the GPI value change callbacks
+EDGE_FALLING = 2
+EDGE_ANY     = 3
+
+EDGE_TRIGGERS = {EDGE_RISING: RisingEdge, EDGE_FALLING: FallingEdge, EDGE_ANY: Edge}
+
+
+# Reader of the integer value of a signal. Signals of 32 bits or more may read
+# back signed from the GPI handle, mask them.
+def raw(signal):
+    read = getattr(getattr(signal, "_handle", None), "get_signal_val_long", None) if GPI else None
+    if read is None:
+        return lambda: int(signal.value)
+    return read
+
+
+# Current simulation time in simulator steps
+def sim_steps():
+    if GPI:
+        high, low = simulator.get_sim_time()
+        return (high << 32) | low
+    return get_sim_time("step")
+
+
+# Task standing for a callback of the fallback, deregistered by killing it
+class TaskCallback():
+    def __init__(self, coro):
+        self.task = cocotb.start_soon(coro)
+
+    def deregister(self):
+        self.task.kill()
+
+
+# Call func on every edge of a signal, from a callback kept under the signal in
+# callbacks: deregister the callbacks of the dict to stop.
+# The GPI callbacks fire once, so each one registers the next. It is still
+# armed while it runs, deregistering it first saves the warning the GPI
+# prints on every rearm.
+def watch(callbacks, signal, func, edge=EDGE_RISING):
+    handle = getattr(signal, "_handle", None) if GPI else None
+    if handle is None:
+        async def run():
+            trigger = EDGE_TRIGGERS[edge](signal)
+            while True:
+                await trigger
+                func()
+        callbacks[signal] = TaskCallback(run())
+        return
+
+    def callback(*args):
+        func()
+        callbacks[signal].deregister()
+        callbacks[signal] = simulator.register_value_change_callback(handle, callback, edge)
+
+    callbacks[signal] = simulator.register_value_change_callback(handle, callback, edge)
+
+
+# Call func every steps simulator steps, from a callback kept under key in callbacks
+def every(callbacks, key, steps, func):
+    if not GPI:
+        async def run():
+            while True:
+                await Timer(steps, "step")
+                func()
+        callbacks[key] = TaskCallback(run())
+        return
+
+    def callback():
+        func()
+        callbacks[key] = simulator.register_timed_callback(steps, callback)
+
+    callbacks[key] = simulator.register_timed_callback(steps, callback)
@@ -0,0 +1,1083 @@
+import os, cocotb
+from collections import deque
+from cocotb.triggers import ReadOnly, RisingEdge
+
+COSIM = os.environ.get("COSIM", "0") == "1"   # Run the ISS in lockstep with the core
+
+M32         = 0xffffffff
+MAX_TRAPS   = 16           # Traps in a row before giving up on a retirement
+POLL_INSTRS = 64           # Instructions between two samples of the device models
+
+# Privilege levels
+PRIV_U = 0
+PRIV_S = 1
+PRIV_M = 3
+
+# Memory access types, same encoding as mem_dir_e
+MEM_EXEC     = 0
+MEM_READ     = 1
+MEM_WRITE    = 2
+MEM_READ_AMO = 3
+
+# Exception causes
+EX_INSTR_MISALIGNED   = 0
+EX_INSTR_ACCESS_FAULT = 1
+EX_ILLEGAL_INSTR      = 2
+EX_BREAKPOINT         = 3
+EX_LOAD_MISALIGNED    = 4
+EX_LOAD_ACCESS_FAULT  = 5
+EX_STORE_MISALIGNED   = 6
+EX_STORE_ACCESS_FAULT = 7
+EX_ECALL_UMODE        = 8
+EX_ECALL_SMODE        = 9
+EX_ECALL_MMODE        = 11
+EX_INSTR_PAGE_FAULT   = 12
+EX_LOAD_PAGE_FAULT    = 13
+EX_STORE_PAGE_FAULT   = 15
+
+ACCESS_FAULT = [EX_INSTR_ACCESS_FAULT, EX_LOAD_ACCESS_FAULT, EX_STORE_ACCESS_FAULT, EX_STORE_ACCESS_FAULT]
+PAGE_FAULT   = [EX_INSTR_PAGE_FAULT, EX_LOAD_PAGE_FAULT, EX_STORE_PAGE_FAULT, EX_STORE_PAGE_FAULT]
+ECALL        = {PRIV_U: EX_ECALL_UMODE, PRIV_S: EX_ECALL_SMODE, PRIV_M: EX_ECALL_MMODE}
+
+# Interrupt causes, in priority order
+INT_M_EXTERNAL = 11
+INT_M_TIMER    = 7
+INT_S_EXTERNAL = 9
+INT_S_SOFTWARE = 1
+INT_S_TIMER    = 5
+INT_LCOF       = 13
+INT_PRIORITY   = [INT_M_EXTERNAL, INT_M_TIMER, INT_S_EXTERNAL, INT_S_SOFTWARE, INT_S_TIMER, INT_LCOF]
+
+# Known deviations of the RTL from the reference behavior (Spike) of the ISS.
+# The ISS follows the RTL on the deviations it is allowed, and reports them.
+RTL_LR_FAULT      = "lr-fault-reservation"    # A LR.W whose access faults sets the reservation
+RTL_RSV_VIRTUAL   = "virtual-reservation"     # The reservation is kept on the virtual address
+RTL_SC_FAIL_KEEP  = "sc-fail-reservation"     # A failing SC.W leaves the reservation in place
+RTL_SC_FAIL_FAULT = "sc-fail-no-fault"        # A failing SC.W raises no misaligned or page fault
+KNOWN_DEVIATIONS  = (RTL_LR_FAULT, RTL_RSV_VIRTUAL, RTL_SC_FAIL_KEEP, RTL_SC_FAIL_FAULT)
+
+# Writable bits of medeleg/mideleg
+MEDELEG_MASK = 0b1100_1011_0011_1111_1111
+MIDELEG_MASK = (1 << 13) | (1 << 9) | (1 << 5) | (1 << 1)
+SIE_MASK     = (1 << 13) | (1 << 9) | (1 << 5) | (1 << 1)
+SIP_MASK     = (1 << 13) | (1 << 1)
+
+# Event counters mhpmcounter3 and up, the others are hardwired to 0
+HPM_NUM        = 8
+COUNTEREN_MASK = (1 << (3 + HPM_NUM)) - 1
+MHPMEVENT_MASK = 0x1f
+MHPMEVENTH_MASK = 0xf0000000
+MIE_MASK     = (1 << 11) | (1 << 7) | SIE_MASK
+
+# PTE bits
+PTE_V = 1 << 0
+PTE_R = 1 << 1
+PTE_W = 1 << 2
+PTE_X = 1 << 3
+PTE_U = 1 << 4
+PTE_A = 1 << 6
+PTE_D = 1 << 7
+
+# CSR addresses
+CSR_CYCLE         = 0xC00
+CSR_TIME          = 0xC01
+CSR_INSTRET       = 0xC02
+CSR_CYCLEH        = 0xC80
+CSR_TIMEH         = 0xC81
+CSR_INSTRETH      = 0xC82
+CSR_SSTATUS       = 0x100
+CSR_SIE           = 0x104
+CSR_STVEC         = 0x105
+CSR_SCOUNTEREN    = 0x106
+CSR_SENVCFG       = 0x10A
+CSR_SSCRATCH      = 0x140
+CSR_SEPC          = 0x141
+CSR_SCAUSE        = 0x142
+CSR_STVAL         = 0x143
+CSR_SIP           = 0x144
+CSR_SATP          = 0x180
+CSR_MVENDORID     = 0xF11
+CSR_MARCHID       = 0xF12
+CSR_MIMPID        = 0xF13
+CSR_MHARTID       = 0xF14
+CSR_MCONFIGPTR    = 0xF15
+CSR_MSTATUS       = 0x300
+CSR_MISA          = 0x301
+CSR_MEDELEG       = 0x302
+CSR_MIDELEG       = 0x303
+CSR_MIE           = 0x304
+CSR_MTVEC         = 0x305
+CSR_MCOUNTEREN    = 0x306
+CSR_MENVCFG       = 0x30A
+CSR_MSTATUSH      = 0x310
+CSR_MEDELEGH      = 0x312
+CSR_MENVCFGH      = 0x31A
+CSR_MCOUNTINHIBIT = 0x320
+CSR_MSCRATCH      = 0x340
+CSR_MEPC          = 0x341
+CSR_MCAUSE        = 0x342
+CSR_MTVAL         = 0x343
+CSR_MIP           = 0x344
+CSR_MSECCFG       = 0x747
+CSR_MSECCFGH      = 0x757
+CSR_MCYCLE        = 0xB00
+CSR_MINSTRET      = 0xB02
+CSR_MCYCLEH       = 0xB80
+CSR_MINSTRETH     = 0xB82
+CSR_SCOUNTOVF     = 0xDA0
+CSR_MHPMCOUNTER   = 0xB00     # + n for mhpmcounter<n>
+CSR_MHPMCOUNTERH  = 0xB80
+CSR_MHPMEVENT     = 0x320
+CSR_MHPMEVENTH    = 0x720
+CSR_HPMCOUNTER    = 0xC00
+CSR_HPMCOUNTERH   = 0xC80
+
+MISA = (1 << 30) | (1 << 20) | (1 << 18) | (1 << 12) | (1 << 8) | (1 << 0)  # RV32IMASU
+
+# User counters and their enable bit in [ms]counteren
+COUNTERS = {CSR_CYCLE: 0, CSR_TIME: 1, CSR_INSTRET: 2, CSR_CYCLEH: 0, CSR_TIMEH: 1, CSR_INSTRETH: 2}
+COUNTERS.update({base + i: i for base in (CSR_HPMCOUNTER, CSR_HPMCOUNTERH) for i in range(3, 32)})
+# Supervisor CSRs, accessible from S-mode
+S_CSRS   = {CSR_SSTATUS, CSR_SIE, CSR_STVEC, CSR_SCOUNTEREN, CSR_SENVCFG, CSR_SSCRATCH,
+            CSR_SEPC, CSR_SCAUSE, CSR_STVAL, CSR_SIP, CSR_SATP}
+# Machine read-only CSRs
+M_RO     = {CSR_MVENDORID, CSR_MARCHID, CSR_MIMPID, CSR_MHARTID, CSR_MCONFIGPTR}
+# Machine read/write CSRs (the hpm counters and events above HPM_NUM are hardwired to 0)
+M_RW     = {CSR_MSTATUS, CSR_MISA, CSR_MEDELEG, CSR_MIDELEG, CSR_MIE, CSR_MTVEC, CSR_MCOUNTEREN,
+            CSR_MSTATUSH, CSR_MEDELEGH, CSR_MSCRATCH, CSR_MEPC, CSR_MCAUSE, CSR_MTVAL, CSR_MIP,
+            CSR_MENVCFG, CSR_MENVCFGH, CSR_MSECCFG, CSR_MSECCFGH, CSR_MCYCLE, CSR_MINSTRET,
+            CSR_MCYCLEH, CSR_MINSTRETH, CSR_MCOUNTINHIBIT}
+M_RW    |= {base + i for base in (CSR_MHPMCOUNTER, CSR_MHPMCOUNTERH, CSR_MHPMEVENT, CSR_MHPMEVENTH)
+            for i in range(3, 32)}
+# CSRs whose value comes from outside the core or depends on the timing.
+# The ISS does not model the events of the hpm counters, nor their overflow.
+VOLATILE = {CSR_CYCLE, CSR_TIME, CSR_INSTRET, CSR_CYCLEH, CSR_TIMEH, CSR_INSTRETH,
+            CSR_MCYCLE, CSR_MINSTRET, CSR_MCYCLEH, CSR_MINSTRETH, CSR_MIP, CSR_SIP, CSR_SCOUNTOVF}
+VOLATILE |= {base + i for base in (CSR_MHPMCOUNTER, CSR_MHPMCOUNTERH, CSR_HPMCOUNTER, CSR_HPMCOUNTERH,
+                                   CSR_MHPMEVENTH) for i in range(3, 3 + HPM_NUM)}
+
+# Marker of the physical pages outside of all the regions
+UNMAPPED = "unmapped"
+
+
+def s32(value):
+    return value - (1 << 32) if value & 0x80000000 else value
+
+
+def sext(value, bits):
+    sign = 1 << (bits - 1)
+    return ((value & (sign - 1)) - (value & sign)) & M32
+
+
+# Raised by a device model to answer an access with an error (PSLVERR)
+class BusError(Exception):
+    pass
+
+
+# Raised by an instruction to take a synchronous trap
+class Trap(Exception):
+    def __init__(self, cause, tval=0):
+        self.cause = cause
+        self.tval  = tval
+
+
+# A physical memory range of the system
+# - ram is the Ram model backing it
+# - device is a functional model of an MMIO device, with read(offset) and
+#   write(offset, value, mask) methods and an irq() method returning its mip bits
+# - with neither, it is MMIO whose read values come from the RTL
+class Region():
+    def __init__(self, base, size, ram=None, read_only=False, device=None):
+        self.base      = base
+        self.size      = size
+        self.ram       = ram
+        self.read_only = read_only
+        self.device    = device
+
+
+# Instruction-set simulator of the core: RV32IMA, Zicsr, M/S/U modes, Sv32 without Svadu.
+# Implementation-defined behaviors (CSR set, tval values, WARL fields, WFI as a no-op,
+# stores of the hart clearing its reservation) follow the RTL. The LR/SC reservation
+# follows Spike: it is kept on the physical address, set by a LR.W that completes and
+# cleared by any SC.W. The reservation of the RTL is modelled alongside, so that the
+# known deviations (KNOWN_DEVIATIONS) can be told apart from bugs.
+# The RAM words are copied from the Ram models the first time they are touched.
+class Iss():
+    def __init__(self, regions, pc=0, timer=None):
+        self.regions  = regions
+        self.devices  = [r.device for r in regions if r.device is not None]
+        self.timer    = timer       # Device model providing mtime, None to read mcycle
+        self.pages    = {}          # Physical page number -> Region or UNMAPPED
+        self.words    = {}          # Physical word address -> value
+        self.dirty    = set()       # Physical word addresses written by the ISS
+        self.decoded  = {}          # Instruction word -> (handler, rd, is_amo)
+        self.regs     = [0] * 32
+        self.pc       = pc
+        self.sync     = False       # Last instruction read a value the ISS cannot predict
+        self.instret  = 0
+        self.cpi      = 1           # Cycles counted per instruction by mcycle and the devices
+        self.ext_ip   = 0           # External interrupt lines, as mip bits
+        self.allow    = set()       # Known RTL deviations the ISS follows
+        self.deviations = deque(maxlen=16)  # (name, pc) of the last RTL deviations met, for the caller to report
+        self.reset()
+
+    def reset(self):
+        self.priv          = PRIV_M
+        self.sie           = 0
+        self.mie           = 0
+        self.spie          = 1
+        self.mpie          = 1
+        self.spp           = PRIV_U
+        self.mpp           = PRIV_U
+        self.mprv          = 0
+        self.sum           = 0
+        self.mxr           = 0
+        self.tvm           = 0
+        self.tw            = 0
+        self.tsr           = 0
+        self.stvec         = 0
+        self.mtvec         = 0
+        self.medeleg       = 0
+        self.mideleg       = 0
+        self.ie            = 0      # mie CSR
+        self.ip            = 0      # Software-writable mip bits
+        self.scounteren    = 0
+        self.mcounteren    = 0
+        self.mcountinhibit = 0
+        self.sscratch      = 0
+        self.mscratch      = 0
+        self.sepc          = 0
+        self.mepc          = 0
+        self.scause        = 0
+        self.mcause        = 0
+        self.stval         = 0
+        self.mtval         = 0
+        self.senvcfg       = 0
+        self.menvcfg       = 0
+        self.satp          = 0
+        self.mcycle        = 0
+        self.minstret      = 0
+        self.mhpmcounter   = [0] * HPM_NUM
+        self.mhpmevent     = [0] * HPM_NUM
+        self.mhpmeventh    = [0] * HPM_NUM
+        self.rsv_valid     = False
+        self.rsv_addr      = 0      # Physical word address
+        self.rtl_rsv_valid = False
+        self.rtl_rsv_addr  = 0      # Virtual word address, like in the RTL
+        self.rtl_rsv_from  = None   # Deviation that left the RTL reservation valid, if any
+
+    # Drop the copied RAM words, to be called after the testbench writes to a RAM
+    def flush_memory(self):
+        self.words.clear()
+
+    # ------------------- Memory ---------------------
+    # Region of a physical page, UNMAPPED if none
+    def __region(self, ppn):
+        region = UNMAPPED
+        for r in self.regions:
+            if r.base <= ppn << 12 < r.base + r.size:
+                region = r
+                break
+        self.pages[ppn] = region
+        return region
+
+    def read_phys(self, paddr, access, vaddr):
+        value = self.words.get(paddr >> 2)
+        if value is not None:
+            return value
+        region = self.pages.get(paddr >> 12) or self.__region(paddr >> 12)
+        if region is UNMAPPED:
+            raise Trap(ACCESS_FAULT[access], vaddr)
+        if region.ram is None:
+            if region.device is not None:
+                return self.__device_read(region, paddr, access, vaddr)
+            self.sync = True
+            return 0
+        value = self.words[paddr >> 2] = region.ram.at(paddr - region.base).value.integer
+        return value
+
+    def write_phys(self, paddr, value, mask, vaddr):
+        region = self.pages.get(paddr >> 12) or self.__region(paddr >> 12)
+        if region is UNMAPPED or region.read_only:
+            raise Trap(EX_STORE_ACCESS_FAULT, vaddr)
+        if region.ram is not None:
+            if mask != M32:
+                value = (self.read_phys(paddr, MEM_WRITE, vaddr) & ~mask) | (value & mask)
+            self.words[paddr >> 2] = value
+            self.dirty.add(paddr >> 2)
+        elif region.device is not None:
+            try:
+                region.device.write(paddr - region.base, value & mask, mask)
+            except BusError:
+                raise Trap(EX_STORE_ACCESS_FAULT, vaddr)
+            self.poll()
+
+    def __device_read(self, region, paddr, access, vaddr):
+        try:
+            value = region.device.read(paddr - region.base)
+        except BusError:
+            raise Trap(ACCESS_FAULT[access], vaddr)
+        # Reads can have side effects, like a PLIC claim
+        self.poll()
+        return value
+
+    # Sample the interrupt lines of the device models, advancing their time by some cycles
+    def poll(self, cycles=0):
+        ext_ip = 0
+        for device in self.devices:
+            if cycles:
+                device.tick(cycles)
+            ext_ip |= device.irq()
+        self.ext_ip = ext_ip
+
+    # Forget the device models, the MMIO values come from the RTL again
+    def detach_devices(self):
+        for region in self.regions:
+            region.device = None
+        self.devices = []
+        self.timer   = None
+        self.ext_ip  = 0
+
+    # Sv32 translation, the A and D bits are never set by hardware
+    def translate(self, vaddr, access):
+        priv = self.priv if access == MEM_EXEC else (self.mpp if self.mprv else self.priv)
+        if not self.satp >> 31 or priv == PRIV_M:
+            return vaddr
+        pte = self.read_phys(((self.satp & 0x3fffff) << 12) | ((vaddr >> 22) << 2), access, vaddr)
+        if not pte & PTE_V or (pte & PTE_W and not pte & PTE_R):
+            raise Trap(PAGE_FAULT[access])
+        if pte & (PTE_R | PTE_X):
+            # Megapage
+            if pte & (0x3ff << 10):
+                raise Trap(PAGE_FAULT[access])
+            self.__check_leaf(pte, access, priv)
+            return ((pte >> 20) << 22) | (vaddr & 0x3fffff)
+        pte = self.read_phys(((pte >> 10) << 12) | (((vaddr >> 12) & 0x3ff) << 2), access, vaddr)
+        if not pte & PTE_V or (pte & PTE_W and not pte & PTE_R) or not pte & (PTE_R | PTE_X):
+            raise Trap(PAGE_FAULT[access])
+        self.__check_leaf(pte, access, priv)
+        return ((pte >> 10) << 12) | (vaddr & 0xfff)
+
+    def __check_leaf(self, pte, access, priv):
+        if access == MEM_EXEC:
+            ok = pte & PTE_X
+        elif access == MEM_READ:
+            ok = pte & (PTE_R | PTE_X) if self.mxr else pte & PTE_R
+        else:
+            ok = pte & PTE_W
+        if priv == PRIV_U:
+            ok = ok and pte & PTE_U
+        elif pte & PTE_U and not (self.sum and access != MEM_EXEC):
+            ok = False
+        if not pte & PTE_A or (access >= MEM_WRITE and not pte & PTE_D):
+            ok = False
+        if not ok:
+            raise Trap(PAGE_FAULT[access])
+
+    def load(self, vaddr, access=MEM_READ):
+        return self.read_phys(self.translate(vaddr, access), access, vaddr)
+
+    # A store clears a matching reservation. The RTL compares the virtual address,
+    # as soon as the store reaches the memory stage, even when the access faults.
+    def store(self, vaddr, value, mask=M32):
+        if self.rtl_rsv_valid and self.rtl_rsv_addr == vaddr >> 2:
+            self.rtl_rsv_valid = False
+        paddr = self.translate(vaddr, MEM_WRITE)
+        if self.rsv_valid and self.rsv_addr == paddr >> 2:
+            self.rsv_valid = False
+        self.write_phys(paddr, value, mask, vaddr)
+
+    # Record a known deviation of the RTL, return whether the ISS follows it
+    def deviate(self, name):
+        self.deviations.append((name, self.pc))
+        return name in self.allow
+
+    # --------------------- CSR ----------------------
+    def mstatus(self):
+        return ((self.tsr << 22) | (self.tw << 21) | (self.tvm << 20) | (self.mxr << 19) |
+                (self.sum << 18) | (self.mprv << 17) | (self.mpp << 11) | (self.spp << 8) |
+                (self.mpie << 7) | (self.spie << 5) | (self.mie << 3) | (self.sie << 1))
+
+    def sstatus(self):
+        return (self.mxr << 19) | (self.sum << 18) | (self.spp << 8) | (self.spie << 5) | (self.sie << 1)
+
+    def mip(self):
+        return self.ip | self.ext_ip
+
+    # Read a CSR, the legality has already been checked
+    def csr_read(self, csr):
+        if csr in VOLATILE:
+            self.sync = True
+        if csr in (CSR_TIME, CSR_TIMEH) and self.timer is not None:
+            return self.timer.mtime & M32 if csr == CSR_TIME else self.timer.mtime >> 32
+        if csr in (CSR_CYCLE, CSR_MCYCLE, CSR_TIME):  return self.mcycle & M32
+        if csr in (CSR_CYCLEH, CSR_MCYCLEH, CSR_TIMEH): return self.mcycle >> 32
+        if csr in (CSR_INSTRET, CSR_MINSTRET):        return self.minstret & M32
+        if csr in (CSR_INSTRETH, CSR_MINSTRETH):      return self.minstret >> 32
+        if csr == CSR_SSTATUS:       return self.sstatus()
+        if csr == CSR_SIE:           return self.ie & SIE_MASK
+        if csr == CSR_STVEC:         return self.stvec
+        if csr == CSR_SCOUNTEREN:    return self.scounteren
+        if csr == CSR_SENVCFG:       return self.senvcfg
+        if csr == CSR_SSCRATCH:      return self.sscratch
+        if csr == CSR_SEPC:          return self.sepc
+        if csr == CSR_SCAUSE:        return self.scause
+        if csr == CSR_STVAL:         return self.stval
+        if csr == CSR_SIP:           return self.mip() & SIE_MASK
+        if csr == CSR_SATP:          return self.satp
+        if csr == CSR_MSTATUS:       return self.mstatus()
+        if csr == CSR_MISA:          return MISA
+        if csr == CSR_MEDELEG:       return self.medeleg
+        if csr == CSR_MIDELEG:       return self.mideleg
+        if csr == CSR_MIE:           return self.ie
+        if csr == CSR_MTVEC:         return self.mtvec
+        if csr == CSR_MCOUNTEREN:    return self.mcounteren
+        if csr == CSR_MENVCFG:       return self.menvcfg
+        if csr == CSR_MCOUNTINHIBIT: return self.mcountinhibit
+        if csr == CSR_MSCRATCH:      return self.mscratch
+        if csr == CSR_MEPC:          return self.mepc
+        if csr == CSR_MCAUSE:        return self.mcause
+        if csr == CSR_MTVAL:         return self.mtval
+        if csr == CSR_MIP:           return self.mip()
+        if csr == CSR_SCOUNTOVF:
+            of = sum(((self.mhpmeventh[i] >> 31) & 1) << (3 + i) for i in range(HPM_NUM))
+            return of if self.priv == PRIV_M else of & self.mcounteren
+        base, i = csr & ~0x1f, (csr & 0x1f) - 3
+        if 0 <= i < HPM_NUM:
+            if base in (CSR_MHPMCOUNTER, CSR_HPMCOUNTER):   return self.mhpmcounter[i] & M32
+            if base in (CSR_MHPMCOUNTERH, CSR_HPMCOUNTERH): return self.mhpmcounter[i] >> 32
+            if base == CSR_MHPMEVENT:                       return self.mhpmevent[i]
+            if base == CSR_MHPMEVENTH:                      return self.mhpmeventh[i]
+        return 0
+
+    def csr_write(self, csr, value):
+        if csr in (CSR_MSTATUS, CSR_SSTATUS):
+            self.sie  = (value >> 1) & 1
+            self.spie = (value >> 5) & 1
+            self.spp  = (value >> 8) & 1
+            self.sum  = (value >> 18) & 1
+            self.mxr  = (value >> 19) & 1
+            if csr == CSR_MSTATUS:
+                self.mie  = (value >> 3) & 1
+                self.mpie = (value >> 7) & 1
+                if (value >> 11) & 3 != 2:
+                    self.mpp = (value >> 11) & 3
+                self.mprv = (value >> 17) & 1
+                self.tvm  = (value >> 20) & 1
+                self.tw   = (value >> 21) & 1
+                self.tsr  = (value >> 22) & 1
+        elif csr == CSR_SIE:           self.ie = (self.ie & ~SIE_MASK) | (value & SIE_MASK)
+        elif csr == CSR_MIE:           self.ie = value & MIE_MASK
+        elif csr == CSR_SIP:           self.ip = (self.ip & ~SIP_MASK) | (value & SIP_MASK)
+        elif csr == CSR_MIP:           self.ip = value & SIE_MASK
+        elif csr in (CSR_STVEC, CSR_MTVEC):
+            old  = self.stvec if csr == CSR_STVEC else self.mtvec
+            mode = value & 3 if value & 3 < 2 else old & 3
+            if csr == CSR_STVEC:
+                self.stvec = (value & ~3 & M32) | mode
+            else:
+                self.mtvec = (value & ~3 & M32) | mode
+        elif csr == CSR_SCOUNTEREN:    self.scounteren = value & COUNTEREN_MASK
+        elif csr == CSR_MCOUNTEREN:    self.mcounteren = value & COUNTEREN_MASK
+        elif csr == CSR_MCOUNTINHIBIT: self.mcountinhibit = value & COUNTEREN_MASK & ~2
+        elif csr == CSR_SENVCFG:       self.senvcfg = value & 1
+        elif csr == CSR_MENVCFG:       self.menvcfg = value & 1
+        elif csr == CSR_SSCRATCH:      self.sscratch = value
+        elif csr == CSR_MSCRATCH:      self.mscratch = value
+        elif csr == CSR_SEPC:          self.sepc = value & ~3 & M32
+        elif csr == CSR_MEPC:          self.mepc = value & ~3 & M32
+        elif csr == CSR_SCAUSE:        self.scause = value
+        elif csr == CSR_MCAUSE:        self.mcause = value
+        elif csr == CSR_STVAL:         self.stval = value
+        elif csr == CSR_MTVAL:         self.mtval = value
+        elif csr == CSR_SATP:          self.satp = value
+        elif csr == CSR_MEDELEG:       self.medeleg = value & MEDELEG_MASK
+        elif csr == CSR_MIDELEG:       self.mideleg = value & MIDELEG_MASK
+        elif csr == CSR_MCYCLE:        self.mcycle = (self.mcycle & ~M32) | value
+        elif csr == CSR_MCYCLEH:       self.mcycle = (self.mcycle & M32) | (value << 32)
+        elif csr == CSR_MINSTRET:      self.minstret = (self.minstret & ~M32) | value
+        elif csr == CSR_MINSTRETH:     self.minstret = (self.minstret & M32) | (value << 32)
+        elif 0 <= (csr & 0x1f) - 3 < HPM_NUM:
+            base, i = csr & ~0x1f, (csr & 0x1f) - 3
+            if base == CSR_MHPMCOUNTER:    self.mhpmcounter[i] = (self.mhpmcounter[i] & ~M32) | value
+            elif base == CSR_MHPMCOUNTERH: self.mhpmcounter[i] = (self.mhpmcounter[i] & M32) | (value << 32)
+            elif base == CSR_MHPMEVENT:    self.mhpmevent[i] = value & MHPMEVENT_MASK
+            elif base == CSR_MHPMEVENTH:   self.mhpmeventh[i] = value & MHPMEVENTH_MASK
+
+    def csr_legal(self, csr, read, write):
+        priv = self.priv
+        if priv == PRIV_M:
+            if read and not (csr in COUNTERS or csr in S_CSRS or csr in M_RO or csr in M_RW):
+                return False
+            return not write or csr in S_CSRS or csr in M_RW
+        if csr in COUNTERS:
+            enabled = (self.mcounteren >> COUNTERS[csr]) & 1
+            if priv == PRIV_U:
+                enabled &= (self.scounteren >> COUNTERS[csr])
+            return enabled and not write
+        if priv == PRIV_S and csr == CSR_SCOUNTOVF:
+            return not write
+        if priv == PRIV_S and csr in S_CSRS:
+            return not (csr == CSR_SATP and self.tvm)
+        return False
+
+    # --------------------- Traps --------------------
+    # Take a trap, to M-mode unless delegated
+    def trap(self, cause, tval=0, interrupt=False):
+        deleg = self.mideleg if interrupt else self.medeleg
+        if self.priv != PRIV_M and (deleg >> cause) & 1:
+            self.sepc   = self.pc
+            self.scause = (cause | (1 << 31)) if interrupt else cause
+            self.stval  = tval
+            self.spie   = self.sie
+            self.sie    = 0
+            self.spp    = self.priv
+            self.priv   = PRIV_S
+            vector      = self.stvec
+        else:
+            self.mepc   = self.pc
+            self.mcause = (cause | (1 << 31)) if interrupt else cause
+            self.mtval  = tval
+            self.mpie   = self.mie
+            self.mie    = 0
+            self.mpp    = self.priv
+            self.priv   = PRIV_M
+            vector      = self.mtvec
+        self.pc = (vector & ~3) + (4 * cause if interrupt and vector & 1 else 0)
+
+    # Highest-priority interrupt that would be taken now, or None.
+    # Interrupts to M-mode go before the delegated ones.
+    def pending_interrupt(self):
+        pending = self.mip() & self.ie
+        if not pending:
+            return None
+        m_enable = self.priv != PRIV_M or self.mie
+        s_enable = self.priv == PRIV_U or (self.priv == PRIV_S and self.sie)
+        for delegated, enable in ((0, m_enable), (1, s_enable)):
+            if not enable:
+                continue
+            for cause in INT_PRIORITY:
+                if (pending >> cause) & 1 and (self.mideleg >> cause) & 1 == delegated:
+                    return cause
+        return None
+
+    # ------------------- Execution ------------------
+    # Execute instructions until one retires, taking the synchronous traps on the way.
+    # Return the decoded entry of the retired instruction and its PC.
+    def step(self):
+        for _ in range(MAX_TRAPS):
+            pc = self.pc
+            self.sync = False
+            try:
+                word  = self.load(pc, MEM_EXEC)
+                entry = self.decoded.get(word)
+                if entry is None:
+                    entry = self.decoded[word] = self.decode(word)
+                entry[0]()
+            except Trap as trap:
+                self.trap(trap.cause, trap.tval)
+                continue
+            self.regs[0] = 0
+            self.instret += 1
+            if not self.mcountinhibit & 4:
+                self.minstret += 1
+            if not self.mcountinhibit & 1:
+                self.mcycle += self.cpi
+            return entry, pc, word
+        raise RuntimeError(f"ISS stuck in a trap loop at {self.pc:#010x}")
+
+    # Run n instructions without an RTL, taking the pending interrupts.
+    # The device models are advanced and sampled every POLL_INSTRS instructions
+    # or when they are accessed.
+    def run(self, n):
+        for i in range(n):
+            if self.devices and i % POLL_INSTRS == 0:
+                self.poll(self.cpi * POLL_INSTRS)
+            cause = self.pending_interrupt()
+            if cause is not None:
+                self.trap(cause, interrupt=True)
+            self.step()
+
+    # Build the handler of an instruction word
+    def decode(self, word):
+        regs   = self.regs
+        opcode = word & 0x7f
+        rd     = (word >> 7) & 0x1f
+        funct3 = (word >> 12) & 7
+        rs1    = (word >> 15) & 0x1f
+        rs2    = (word >> 20) & 0x1f
+        funct7 = word >> 25
+        imm_i  = sext(word >> 20, 12)
+        imm_s  = sext(((word >> 25) << 5) | rd, 12)
+        imm_b  = sext(((word >> 31) << 12) | (((word >> 7) & 1) << 11) | (((word >> 25) & 0x3f) << 5) | (((word >> 8) & 0xf) << 1), 13)
+        imm_u  = word & 0xfffff000
+        imm_j  = sext(((word >> 31) << 20) | (((word >> 12) & 0xff) << 12) | (((word >> 20) & 1) << 11) | (((word >> 21) & 0x3ff) << 1), 21)
+
+        def illegal():
+            raise Trap(EX_ILLEGAL_INSTR, word)
+
+        # Register-register and register-immediate ALU ops
+        if opcode in (0x33, 0x13):
+            if opcode == 0x33:
+                op = R_OPS.get((funct7, funct3))
+            elif funct3 == 1:
+                op = R_OPS.get((funct7, 1))
+            elif funct3 == 5:
+                op = R_OPS.get((funct7, 5))
+            else:
+                op = R_OPS.get((0, funct3))
+            if op is None or (opcode == 0x13 and funct7 == 1 and funct3 in (1, 5)):
+                return illegal, 0, False
+            if opcode == 0x33:
+                def alu():
+                    regs[rd] = op(regs[rs1], regs[rs2])
+                    self.pc = (self.pc + 4) & M32
+            else:
+                b = rs2 if funct3 in (1, 5) else imm_i
+                def alu():
+                    regs[rd] = op(regs[rs1], b)
+                    self.pc = (self.pc + 4) & M32
+            return alu, rd, False
+
+        if opcode == 0x37:
+            def lui():
+                regs[rd] = imm_u
+                self.pc = (self.pc + 4) & M32
+            return lui, rd, False
+
+        if opcode == 0x17:
+            def auipc():
+                regs[rd] = (self.pc + imm_u) & M32
+                self.pc = (self.pc + 4) & M32
+            return auipc, rd, False
+
+        if opcode == 0x6f:
+            def jal():
+                target = (self.pc + imm_j) & M32
+                if target & 3:
+                    raise Trap(EX_INSTR_MISALIGNED, target)
+                regs[rd] = (self.pc + 4) & M32
+                self.pc = target
+            return jal, rd, False
+
+        if opcode == 0x67:
+            def jalr():
+                target = (regs[rs1] + imm_i) & M32 & ~1
+                if target & 3:
+                    raise Trap(EX_INSTR_MISALIGNED, target)
+                regs[rd] = (self.pc + 4) & M32
+                self.pc = target
+            return jalr, rd, False
+
+        if opcode == 0x63:
+            cond = BRANCHES.get(funct3)
+            if cond is None:
+                return illegal, 0, False
+            def branch():
+                if cond(regs[rs1], regs[rs2]):
+                    target = (self.pc + imm_b) & M32
+                    if target & 3:
+                        raise Trap(EX_INSTR_MISALIGNED, target)
+                    self.pc = target
+                else:
+                    self.pc = (self.pc + 4) & M32
+            return branch, 0, False
+
+        if opcode == 0x03:
+            if funct3 not in (0, 1, 2, 4, 5):
+                return illegal, 0, False
+            size   = 1 << (funct3 & 3)
+            signed = not funct3 & 4
+            def load():
+                addr = (regs[rs1] + imm_i) & M32
+                if addr & (size - 1):
+                    raise Trap(EX_LOAD_MISALIGNED, addr)
+                value = self.load(addr) >> (8 * (addr & 3))
+                if size < 4:
+                    value &= (1 << (8 * size)) - 1
+                    if signed:
+                        value = sext(value, 8 * size)
+                regs[rd] = value
+                self.pc = (self.pc + 4) & M32
+            return load, rd, False
+
+        if opcode == 0x23:
+            if funct3 > 2:
+                return illegal, 0, False
+            size = 1 << funct3
+            def store():
+                addr = (regs[rs1] + imm_s) & M32
+                if addr & (size - 1):
+                    raise Trap(EX_STORE_MISALIGNED, addr)
+                shift = 8 * (addr & 3)
+                self.store(addr, (regs[rs2] << shift) & M32, (((1 << (8 * size)) - 1) << shift) & M32)
+                self.pc = (self.pc + 4) & M32
+            return store, 0, False
+
+        if opcode == 0x0f:
+            # FENCE, FENCE.I: no caches nor buffers
+            def fence():
+                self.pc = (self.pc + 4) & M32
+            return fence, 0, False
+
+        if opcode == 0x2f:
+            return self.__decode_amo(word, rd, rs1, rs2, funct3, illegal)
+
+        if opcode == 0x73:
+            return self.__decode_system(word, rd, rs1, funct3, illegal)
+
+        return illegal, 0, False
+
+    def __decode_amo(self, word, rd, rs1, rs2, funct3, illegal):
+        regs = self.regs
+        amo  = word >> 27
+        if funct3 != 2 or (amo not in AMO_OPS and amo not in (0b00010, 0b00011)):
+            return illegal, 0, False
+
+        # LR.W, the RTL sets its reservation even when the access faults
+        if amo == 0b00010:
+            def lr():
+                addr = regs[rs1]
+                if addr & 3:
+                    raise Trap(EX_LOAD_MISALIGNED, addr)
+                self.rtl_rsv_valid = True
+                self.rtl_rsv_addr  = addr >> 2
+                self.rtl_rsv_from  = RTL_LR_FAULT
+                paddr = self.translate(addr, MEM_READ)
+                value = self.read_phys(paddr, MEM_READ, addr)
+                self.rtl_rsv_from  = None
+                self.rsv_valid = True
+                self.rsv_addr  = paddr >> 2
+                regs[rd] = value
+                self.pc = (self.pc + 4) & M32
+            return lr, rd, False
+
+        # SC.W, a failing SC does not reach the memory stage of the RTL
+        if amo == 0b00011:
+            def sc():
+                addr   = regs[rs1]
+                rtl_ok = self.rtl_rsv_valid and self.rtl_rsv_addr == addr >> 2
+                try:
+                    if addr & 3:
+                        raise Trap(EX_STORE_MISALIGNED, addr)
+                    paddr = self.translate(addr, MEM_WRITE)
+                except Trap:
+                    if rtl_ok or not self.deviate(RTL_SC_FAIL_FAULT):
+                        raise
+                    regs[rd] = 1
+                    self.rsv_valid = False
+                    if self.rtl_rsv_valid:
+                        self.rtl_rsv_from = self.rtl_rsv_from or RTL_SC_FAIL_KEEP
+                    self.pc = (self.pc + 4) & M32
+                    return
+                ok = self.rsv_valid and self.rsv_addr == paddr >> 2
+                if ok != rtl_ok and self.deviate(self.rtl_rsv_from or RTL_RSV_VIRTUAL):
+                    ok = rtl_ok
+                if ok:
+                    self.write_phys(paddr, regs[rs2], M32, addr)
+                self.rsv_valid = False
+                if rtl_ok:
+                    self.rtl_rsv_valid = False
+                elif self.rtl_rsv_valid:
+                    self.rtl_rsv_from = self.rtl_rsv_from or RTL_SC_FAIL_KEEP
+                regs[rd] = 0 if ok else 1
+                self.pc = (self.pc + 4) & M32
+            return sc, rd, False
+
+        op = AMO_OPS[amo]
+        def amo_op():
+            addr = regs[rs1]
+            if addr & 3:
+                raise Trap(EX_STORE_MISALIGNED, addr)
+            paddr = self.translate(addr, MEM_READ_AMO)
+            value = self.read_phys(paddr, MEM_READ_AMO, addr)
+            if self.rtl_rsv_valid and self.rtl_rsv_addr == addr >> 2:
+                self.rtl_rsv_valid = False
+            if self.rsv_valid and self.rsv_addr == paddr >> 2:
+                self.rsv_valid = False
+            self.write_phys(paddr, op(value, regs[rs2]), M32, addr)
+            regs[rd] = value
+            self.pc = (self.pc + 4) & M32
+        return amo_op, rd, True
+
+    def __decode_system(self, word, rd, rs1, funct3, illegal):
+        regs = self.regs
+        csr  = word >> 20
+
+        if funct3 == 0:
+            if csr == 0x000:
+                def ecall():
+                    raise Trap(ECALL[self.priv])
+                return ecall, 0, False
+            if csr == 0x001:
+                def ebreak():
+                    raise Trap(EX_BREAKPOINT)
+                return ebreak, 0, False
+            if csr == 0x302:
+                def mret():
+                    if self.priv != PRIV_M:
+                        raise Trap(EX_ILLEGAL_INSTR, word)
+                    self.priv = self.mpp
+                    self.mie  = self.mpie
+                    self.mpie = 1
+                    if self.mpp != PRIV_M:
+                        self.mprv = 0
+                    self.mpp  = PRIV_U
+                    self.pc   = self.mepc
+                return mret, 0, False
+            if csr == 0x102:
+                def sret():
+                    if self.priv == PRIV_U or (self.priv == PRIV_S and self.tsr):
+                        raise Trap(EX_ILLEGAL_INSTR, word)
+                    self.priv = self.spp
+                    self.sie  = self.spie
+                    self.spie = 1
+                    self.mprv = 0
+                    self.spp  = PRIV_U
+                    self.pc   = self.sepc
+                return sret, 0, False
+            if csr == 0x105:
+                def wfi():
+                    if self.priv == PRIV_U or (self.priv == PRIV_S and self.tw):
+                        raise Trap(EX_ILLEGAL_INSTR, word)
+                    self.pc = (self.pc + 4) & M32
+                return wfi, 0, False
+            if csr >> 5 == 0b0001001:
+                def sfence_vma():
+                    if self.priv == PRIV_U or (self.priv == PRIV_S and self.tvm):
+                        raise Trap(EX_ILLEGAL_INSTR, word)
+                    self.pc = (self.pc + 4) & M32
+                return sfence_vma, 0, False
+            return illegal, 0, False
+
+        if funct3 == 4:
+            return illegal, 0, False
+
+        # Zicsr
+        kind  = funct3 & 3
+        read  = kind != 1 or rd != 0
+        write = kind == 1 or rs1 != 0
+        def csr_op():
+            if not self.csr_legal(csr, read, write):
+                raise Trap(EX_ILLEGAL_INSTR, word)
+            old = self.csr_read(csr)
+            src = rs1 if funct3 & 4 else regs[rs1]
+            if write:
+                if kind == 1:
+                    self.csr_write(csr, src)
+                elif kind == 2:
+                    self.csr_write(csr, old | src)
+                else:
+                    self.csr_write(csr, old & ~src)
+            regs[rd] = old
+            self.pc = (self.pc + 4) & M32
+        return csr_op, rd, False
+
+
+def _div(a, b):
+    if b == 0:
+        return M32
+    q = abs(s32(a)) // abs(s32(b))
+    return (-q if (s32(a) < 0) != (s32(b) < 0) else q) & M32
+
+
+def _rem(a, b):
+    if b == 0:
+        return a
+    r = abs(s32(a)) % abs(s32(b))
+    return (-r if s32(a) < 0 else r) & M32
+
+
+# (funct7, funct3) -> operation
+R_OPS = {
+    (0x00, 0): lambda a, b: (a + b) & M32,
+    (0x20, 0): lambda a, b: (a - b) & M32,
+    (0x00, 1): lambda a, b: (a << (b & 31)) & M32,
+    (0x00, 2): lambda a, b: int(s32(a) < s32(b)),
+    (0x00, 3): lambda a, b: int(a < b),
+    (0x00, 4): lambda a, b: a ^ b,
+    (0x00, 5): lambda a, b: a >> (b & 31),
+    (0x20, 5): lambda a, b: (s32(a) >> (b & 31)) & M32,
+    (0x00, 6): lambda a, b: a | b,
+    (0x00, 7): lambda a, b: a & b,
+    (0x01, 0): lambda a, b: (a * b) & M32,
+    (0x01, 1): lambda a, b: ((s32(a) * s32(b)) >> 32) & M32,
+    (0x01, 2): lambda a, b: ((s32(a) * b) >> 32) & M32,
+    (0x01, 3): lambda a, b: (a * b) >> 32,
+    (0x01, 4): _div,
+    (0x01, 5): lambda a, b: a // b if b else M32,
+    (0x01, 6): _rem,
+    (0x01, 7): lambda a, b: a % b if b else a,
+}
+
+BRANCHES = {
+    0: lambda a, b: a == b,
+    1: lambda a, b: a != b,
+    4: lambda a, b: s32(a) < s32(b),
+    5: lambda a, b: s32(a) >= s32(b),
+    6: lambda a, b: a < b,
+    7: lambda a, b: a >= b,
+}
+
+# amo funct5 -> operation(memory, rs2)
+AMO_OPS = {
+    0b00001: lambda m, r: r,
+    0b00000: lambda m, r: (m + r) & M32,
+    0b00100: lambda m, r: m ^ r,
+    0b01100: lambda m, r: m & r,
+    0b01000: lambda m, r: m | r,
+    0b10000: lambda m, r: m if s32(m) < s32(r) else r,
+    0b10100: lambda m, r: m if s32(m) > s32(r) else r,
+    0b11000: lambda m, r: min(m, r),
+    0b11100: lambda m, r: max(m, r),
+}
+
+
+# Lockstep comparison of the ISS against the core.
+# Every retirement (instr_done) steps the ISS and compares the PC and the register
+# written, interrupts taken by the core are replayed on the ISS.
+# Values the ISS cannot know (MMIO loads, counters, mip) are copied from the core.
+# The ISS follows the known RTL deviations in allow, each one met is logged and kept
+# in deviations as (name, pc), any other one is a divergence.
+class Cosim():
+    def __init__(self, core, iss, history=16, allow=KNOWN_DEVIATIONS):
+        self.core       = core
+        self.iss        = iss
+        self.retired    = 0
+        self.history    = deque(maxlen=history)
+        self.deviations = []
+        self.task       = None
+        self.tasks      = []
+        iss.allow       = set(allow)
+
+    # Start comparing once the core is out of reset
+    def start(self):
+        self.task = cocotb.start_soon(self.__run())
+        return self.task
+
+    # Copy the architectural registers of the core
+    def sync_state(self):
+        core = self.core
+        self.iss.regs[:] = [core.u_reg_file.reg_mem[i].value.integer for i in range(32)]
+        self.iss.regs[0] = 0
+        self.iss.pc      = core.u_stage_fetch.curr_pc.value.integer
+
+    def stop(self):
+        for task in self.tasks:
+            task.kill()
+        self.tasks = []
+        if self.task is not None:
+            self.task.kill()
+            self.task = None
+
+    def __fail(self, msg):
+        trace = "\n".join(f"  {pc:#010x}: {word:08x}" for pc, word in self.history)
+        for name, pc in self.iss.deviations:
+            msg += f"\nRTL deviation {name} at pc {pc:#010x} is not allowed"
+        raise AssertionError(f"Cosim divergence after {self.retired} instructions: {msg}\n"
+                             f"Last retired instructions:\n{trace}")
+
+    # Report the known deviations met by the last instruction, the others are kept
+    # for the divergence they lead to
+    def __report(self):
+        iss = self.iss
+        for name, pc in iss.deviations:
+            if name in iss.allow:
+                self.core._log.warning(f"Cosim: RTL deviation {name} at pc {pc:#010x}")
+                self.deviations.append((name, pc))
+        rejected = [dev for dev in iss.deviations if dev[0] not in iss.allow]
+        iss.deviations.clear()
+        iss.deviations.extend(rejected)
+
+    async def __run(self):
+        core = self.core
+
+        # A reset sequence started at the same time only drives rst_n at the end of the step
+        await ReadOnly()
+        if not core.rst_n.value.integer:
+            await RisingEdge(core.rst_n)
+        self.sync_state()
+
+        # One loop per event, a First() on every retirement costs more than the ISS itself
+        trap = core.u_trap_handler
+        self.tasks = [cocotb.start_soon(self.__interrupts(trap.m_interrupt_valid, trap.m_interrupt_cause)),
+                      cocotb.start_soon(self.__interrupts(trap.s_interrupt_valid, trap.s_interrupt_cause))]
+        try:
+            await self.__retire()
+        finally:
+            for task in self.tasks:
+                task.kill()
+
+    # Interrupt taken by the core before fetching
+    async def __interrupts(self, valid, cause):
+        core  = self.core
+        iss   = self.iss
+        fetch = core.u_stage_fetch
+        edge  = RisingEdge(valid)
+
+        while True:
+            await edge
+            iss.ext_ip = ((core.int_m_ext.value.integer << 11) | (core.mtimer_int.value.integer << 7) |
+                          (core.int_s_ext.value.integer << 9))
+            rtl_cause  = cause.value.integer
+            rtl_pc     = fetch.curr_pc.value.integer
+            if rtl_pc != iss.pc:
+                self.__fail(f"interrupt {rtl_cause} taken at pc {rtl_pc:#010x}, expected {iss.pc:#010x}")
+            iss_cause = iss.pending_interrupt()
+            if iss_cause != rtl_cause:
+                self.__fail(f"interrupt {rtl_cause} taken at pc {rtl_pc:#010x}, expected {iss_cause}")
+            iss.trap(iss_cause, interrupt=True)
+
+    async def __retire(self):
+        core     = self.core
+        iss      = self.iss
+        regs     = iss.regs
+        old_pc   = core.u_stage_fetch.old_pc
+        reg_file = core.u_reg_file
+        reg_mem  = reg_file.reg_mem
+        d_en     = reg_file.reg_d_en
+        d_write  = reg_file.reg_d_write
+        d_id     = reg_file.reg_d_id
+        d_value  = reg_file.reg_d_value
+        done     = core.u_controller.instr_done
+        edge     = RisingEdge(done)
+        clk      = RisingEdge(core.clk)
+        settle   = ReadOnly()
+
+        # The instructions fetched ahead retire on consecutive cycles with instr_done
+        # staying high, the cycles after a retirement are checked until it falls
+        retiring = False
+        while True:
+            if retiring:
+                await clk
+                await settle
+                retiring = done.value.integer
+            if not retiring:
+                await edge
+                retiring = True
+            (_, rd, is_amo), pc, word = iss.step()
+            self.retired += 1
+            self.history.append((pc, word))
+            rtl_pc = old_pc.value.integer
+            if rtl_pc != pc:
+                self.__fail(f"core retired pc {rtl_pc:#010x}, ISS retired pc {pc:#010x} ({word:08x})")
+
+            # The register write of an AMO is done in its first phase
+            if is_amo:
+                rtl_rd    = rd
+                rtl_value = reg_mem[rd].value.integer if rd else 0
+            elif d_en.value.integer and d_write.value.integer:
+                rtl_rd    = d_id.value.integer
+                rtl_value = d_value.value.integer if rtl_rd else 0
+            else:
+                rtl_rd, rtl_value = 0, 0
+
+            if rtl_rd != rd:
+                self.__fail(f"pc {pc:#010x} ({word:08x}) core wrote x{rtl_rd}, ISS wrote x{rd}")
+            if rd and rtl_value != regs[rd]:
+                if iss.sync:
+                    regs[rd] = rtl_value
+                else:
+                    self.__fail(f"pc {pc:#010x} ({word:08x}) x{rd} core={rtl_value:#010x} ISS={regs[rd]:#010x}")
+            if iss.deviations:
+                self.__report()
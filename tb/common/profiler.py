@@ -0,0 +1,300 @@
+import os, re, atexit, cocotb
+from array import array
+from bisect import bisect_right
+from cocotb.triggers import ReadOnly, RisingEdge
+from cocotb.utils import get_sim_time
+from elf import Elf, is_elf
+from gpi import raw, watch, every, sim_steps
+from retire_trace import watch_retire
+
+PROFILE         = os.environ.get("PROFILE")                  # Directory to write the profiles to
+PROFILE_EVERY   = int(os.environ.get("PROFILE_EVERY", "0"))  # Cycles between two samples, 0 samples every retirement
+PROFILE_SYMBOLS = os.environ.get("PROFILE_SYMBOLS", "")      # Extra symbol files, comma separated
+
+PAGE_BITS = 12
+PAGE_PCS  = 1 << (PAGE_BITS - 2)   # Instructions in a page of the histogram
+MAX_DEPTH = 64                     # Frames kept in the shadow call stack
+
+PRIV_NAMES = {0: "U", 1: "S", 3: "M"}
+UNKNOWN    = "[unknown]"
+USER       = "[user]"
+
+_active = None                     # Profile started by the last call to start_profile
+
+# Instructions ending a trap handler
+MRET = 0x30200073
+SRET = 0x10200073
+
+# Link registers of the calling convention
+LINK_REGS = (1, 5)
+
+# '80000000 <_start>:' in an objdump disassembly
+DUMP_SYMBOL = re.compile(r"^([0-9a-f]+) <([^>]+)>:$")
+
+
+# Address to name table of an ELF, a System.map or an objdump disassembly
+class Symbols():
+    def __init__(self):
+        self.entries = []   # (address, size, name), size 0 when unknown
+        self.starts  = []
+        self.cache   = {}
+
+    def add(self, addr, size, name):
+        self.entries.append((addr, size, name))
+        self.starts = None
+        self.cache  = {}
+
+    # Load a symbol file, its type is found from its content.
+    # offset is added to the addresses, for programs linked at 0 but loaded in a RAM
+    def load(self, filename, offset=0):
+        with open(filename, "rb") as file:
+            data = file.read()
+        if is_elf(data):
+            for addr, size, name in Elf(data).symbols():
+                self.add(addr + offset, size, name)
+            return self
+
+        for line in data.decode(errors="replace").splitlines():
+            match = DUMP_SYMBOL.match(line)
+            if match:
+                self.add(int(match.group(1), 16) + offset, 0, match.group(2))
+                continue
+            # System.map: address, type, name. Only the text symbols are kept.
+            fields = line.split()
+            if len(fields) == 3 and fields[1] in "tTwW":
+                self.add(int(fields[0], 16) + offset, 0, fields[2])
+        return self
+
+    # Name of the symbol holding an address
+    def lookup(self, addr):
+        name = self.cache.get(addr)
+        if name is not None:
+            return name
+        if self.starts is None:
+            # A sized symbol wins over a label at the same address
+            self.entries.sort(key=lambda entry: (entry[0], entry[1] != 0))
+            self.starts = [entry[0] for entry in self.entries]
+        i = bisect_right(self.starts, addr) - 1
+        name = UNKNOWN
+        if i >= 0:
+            start, size, sym = self.entries[i]
+            if not size or addr < start + size:
+                name = sym
+        self.cache[addr] = name
+        return name
+
+
+# Statistical profile of the pc of the core.
+# With every=N the fetch pc is sampled every N cycles from a timer callback,
+# which costs nothing between two samples. Otherwise each retirement is
+# sampled with the cycles it took, and a shadow call stack built from the
+# jal/jalr and the traps gives the stacks of a flame graph.
+# The histogram is a page table of arrays of cycles, indexed by privilege and
+# pc page, so a sample is two lookups and an add.
+class Profiler():
+    def __init__(self, core, every=0, symbols=None):
+        self.core      = core
+        self.every     = every
+        self.symbols   = symbols or Symbols()
+        self.pages     = {}
+        self.stacks    = {}
+        self.stack     = ()
+        self.period    = 1
+        self.last      = 0
+        self.task      = None
+        self.path      = None
+        self.callbacks = {}
+
+    # Start sampling once the core is out of reset
+    def start(self):
+        self.task = cocotb.start_soon(self.__run())
+        return self.task
+
+    def stop(self):
+        if self.task is not None:
+            self.task.kill()
+            self.task = None
+        for callback in self.callbacks.values():
+            callback.deregister()
+        self.callbacks = {}
+
+    async def __run(self):
+        core = self.core
+
+        # A reset sequence started at the same time only drives rst_n at the end of the step
+        await ReadOnly()
+        if not core.rst_n.value.integer:
+            await RisingEdge(core.rst_n)
+
+        # Cycles are counted in clock periods of simulation time
+        await RisingEdge(core.clk)
+        start = get_sim_time()
+        await RisingEdge(core.clk)
+        self.period = get_sim_time() - start
+        self.last   = get_sim_time()
+
+        if self.every:
+            self.__sample_every()
+            return
+        trap  = core.u_trap_handler
+        fetch = core.u_stage_fetch
+        watch_retire(self.callbacks, core, self.__retire())
+        watch(self.callbacks, trap.exception_valid, self.__trap(fetch.pc))
+        watch(self.callbacks, trap.m_interrupt_valid, self.__trap(fetch.curr_pc))
+        watch(self.callbacks, trap.s_interrupt_valid, self.__trap(fetch.curr_pc))
+
+    def __add(self, priv, pc, cycles):
+        key  = (priv, pc >> PAGE_BITS)
+        page = self.pages.get(key)
+        if page is None:
+            page = self.pages[key] = array('Q', bytes(8 * PAGE_PCS))
+        page[(pc >> 2) & (PAGE_PCS - 1)] += cycles
+
+    def __sample_every(self):
+        pc    = raw(self.core.u_stage_fetch.curr_pc)
+        priv  = raw(self.core.u_csr.priv)
+        steps = self.every * self.period
+
+        def sample():
+            self.__add(priv(), pc() & 0xffffffff, self.every)
+
+        every(self.callbacks, None, steps, sample)
+
+    def __retire(self):
+        core   = self.core
+        old_pc = raw(core.u_stage_fetch.old_pc)
+        instr  = raw(core.u_stage_fetch.instr)
+        priv   = raw(core.u_csr.priv)
+        stacks = self.stacks
+
+        def retire():
+            now       = sim_steps()
+            cycles    = (now - self.last) // self.period
+            self.last = now
+
+            pc   = old_pc() & 0xffffffff
+            mode = priv()
+            self.__add(mode, pc, cycles)
+            key = (self.stack, mode, pc)
+            stacks[key] = stacks.get(key, 0) + cycles
+
+            # Calls push the pc of the caller, returns pop it
+            word   = instr() & 0xffffffff
+            opcode = word & 0x7f
+            rd     = (word >> 7) & 0x1f
+            if opcode == 0x6f and rd in LINK_REGS:
+                self.__push(pc | mode << 32)
+            elif opcode == 0x67:
+                rs1 = (word >> 15) & 0x1f
+                if rd in LINK_REGS:
+                    self.__push(pc | mode << 32)
+                elif rd == 0 and rs1 in LINK_REGS and self.stack and not self.stack[-1] & 1:
+                    self.stack = self.stack[:-1]
+            elif word == MRET or word == SRET:
+                # Back to the trapped code, with the frames the handler left behind
+                stack = self.stack
+                while stack and not stack[-1] & 1:
+                    stack = stack[:-1]
+                self.stack = stack[:-1]
+        return retire
+
+    # Traps push the trapped pc, marked by its bit 0
+    def __trap(self, signal):
+        pc   = raw(signal)
+        priv = raw(self.core.u_csr.priv)
+
+        def trap():
+            self.__push((pc() & 0xffffffff) | priv() << 32 | 1)
+        return trap
+
+    def __push(self, frame):
+        stack = self.stack
+        if len(stack) == MAX_DEPTH:
+            stack = stack[1:]
+        self.stack = stack + (frame,)
+
+    def __name(self, priv, pc):
+        # The user programs are not symbolised, their addresses overlap the firmware
+        if priv == 0:
+            return USER
+        return self.symbols.lookup(pc & 0xfffffffc)
+
+    # Cycles per (privilege, symbol)
+    def flat(self):
+        total = {}
+        for (priv, page), counts in self.pages.items():
+            base = page << PAGE_BITS
+            for i, cycles in enumerate(counts):
+                if cycles:
+                    key = (priv, self.__name(priv, base | (i << 2)))
+                    total[key] = total.get(key, 0) + cycles
+        return total
+
+    # Write the flat profile, by privilege then by symbol
+    def write_flat(self, filename):
+        flat  = self.flat()
+        total = sum(flat.values()) or 1
+        by_priv = {}
+        for (priv, _), cycles in flat.items():
+            by_priv[priv] = by_priv.get(priv, 0) + cycles
+
+        with open(filename, "w") as file:
+            file.write(f"# {total} cycles sampled\n")
+            for priv, cycles in sorted(by_priv.items(), key=lambda item: -item[1]):
+                file.write(f"# {PRIV_NAMES.get(priv, priv)}-mode {100 * cycles / total:6.2f}%\n")
+            file.write(f"{'%':>7} {'cycles':>14}  priv  symbol\n")
+            for (priv, name), cycles in sorted(flat.items(), key=lambda item: -item[1]):
+                file.write(f"{100 * cycles / total:7.2f} {cycles:14}  {PRIV_NAMES.get(priv, priv):>4}  {name}\n")
+
+    # Write the stacks in the folded format of flamegraph.pl
+    def write_folded(self, filename):
+        folded = {}
+        for (stack, priv, pc), cycles in self.stacks.items():
+            # Frames are pc | priv << 32, plus bit 0 for the trapped pcs
+            frames = [self.__name(frame >> 32, frame) for frame in stack]
+            frames.append(self.__name(priv, pc))
+            key = ";".join(frames)
+            folded[key] = folded.get(key, 0) + cycles
+
+        with open(filename, "w") as file:
+            for key, cycles in sorted(folded.items()):
+                file.write(f"{key} {cycles}\n")
+
+    # Write the profile to its path, once.
+    # Also registered to run at the exit of the simulator, for the profile
+    # still sampling when the last test ends: its callbacks cannot be
+    # deregistered anymore at that point.
+    def save(self):
+        if self.path is not None:
+            self.write(self.path)
+            self.path = None
+
+    # Write <path>.flat and, when sampling retirements, <path>.folded
+    def write(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.write_flat(f"{path}.flat")
+        if not self.every:
+            self.write_folded(f"{path}.folded")
+
+
+# Profile the core into PROFILE/<name>.flat and .folded when PROFILE is set.
+# The symbols are read from the given files, then from PROFILE_SYMBOLS.
+# The callbacks outlive the test that registered them, so starting a profile
+# ends and writes the one of the previous test.
+def start_profile(core, name, symbol_files=()):
+    global _active
+    if not PROFILE:
+        return None
+    if _active is not None:
+        _active.stop()
+        _active.save()
+
+    symbols = Symbols()
+    for filename in list(symbol_files) + [f for f in PROFILE_SYMBOLS.split(",") if f]:
+        if os.path.exists(filename):
+            symbols.load(filename)
+    _active = Profiler(core, PROFILE_EVERY, symbols)
+    _active.path = f"{PROFILE}/{name}"
+    _active.start()
+    atexit.register(_active.save)
+    return _active
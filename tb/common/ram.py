@@ -1,32 +1,127 @@
-import struct
+import sys, time
+from array import array
+from itertools import compress
+from cocotb.triggers import ReadOnly, RisingEdge
+from elf import Elf, is_elf
+from gpi import raw, watch
 
 class Ram():
-    def __init__(self, obj):
+    # base is the physical address of the first word, used to place ELF segments
+    def __init__(self, obj, base=0):
         self.obj = obj
+        self.base = base
+        self.mem = obj.mem_array
+        self.size = len(self.mem)
+        self.paddr = raw(obj.paddr)
+        self.tracking = False
+        self.callbacks = {}
+        self.dirty = set()  # Word indexes written since the last clear, when tracking
 
     # Get the word in RAM at byte-address
     def at(self, addr):
-        return self.obj.mem_array[addr >> 2]
+        return self.mem[(addr >> 2) % self.size]
 
-    # Load a binary file into the RAM of the machine
-    def load_bin(self, filename):
-        i = 0
-        with open(filename, "rb") as file:
-            while True:
-                # Read 4 bytes
-                data = file.read(4)
-                eof  = len(data) < 4
-                # Write the value to RAM
-                if len(data) > 0:
-                    # Pad the data to have 4 bytes
-                    data = data.ljust(4, b'\x00')
-                    # Convert to an integer
-                    word = struct.unpack('<i', data)[0]  # <i means little-endian
-                    # Backdoor the value
-                    self.at(i << 2).value = word
-                    i += 1
-                # EOF
-                if eof:
-                    break
-        self.obj._log.info(f"Loaded {i << 2} bytes into the RAM")
+    # Read n words starting at byte-address.
+    # cocotb caches the handles of the words, what remains is one raw read per word
+    # since a BinaryValue per word costs ten times more.
+    def read_block(self, addr, n):
+        idx = (addr >> 2) % self.size
+        assert idx + n <= self.size, "Block does not fit in the RAM"
+        mem = self.mem
+        return array('I', [raw(mem[i])() & 0xffffffff for i in range(idx, idx + n)])
+
+    # Write a sequence of words starting at byte-address
+    def write_block(self, addr, words):
+        idx = (addr >> 2) % self.size
+        assert idx + len(words) <= self.size, "Block does not fit in the RAM"
+        mem = self.mem
+        for i, word in enumerate(words, idx):
+            mem[i].value = word & 0xffffffff
+        if self.tracking:
+            self.dirty.update(range(idx, idx + len(words)))
+
+    # Record the words written by the backdoor and through the APB port as dirty.
+    # A callback on the write strobe of the RAM only runs on the writes, and does
+    # not go through the scheduler like a coroutine would.
+    def track_writes(self):
+        self.tracking = True
+        if not self.callbacks:
+            watch(self.callbacks, self.obj.write_en, self.__on_write)
+
+    # The callbacks outlive the test that registered them
+    def stop_tracking(self):
+        self.tracking = False
+        for callback in self.callbacks.values():
+            callback.deregister()
+        self.callbacks = {}
+
+    def __on_write(self):
+        self.dirty.add((self.paddr() >> 2) % self.size)
 
+    # Zero all the dirty words
+    def clear_dirty(self):
+        for idx in self.dirty:
+            self.mem[idx].value = 0
+        self.dirty.clear()
+
+    # Wait for a write through the APB port to the word at byte-address with a value
+    # matching the predicate (any write by default), resume on the clock edge
+    # committing it and return the new value of the word.
+    # Waiting on the write strobe costs nothing per read access, and catches the
+    # writes of the value the word already holds, unlike a value change of the word.
+    async def watch_write(self, addr, predicate=None):
+        idx   = (addr >> 2) % self.size
+        word  = self.at(addr)
+        obj   = self.obj
+        write = RisingEdge(obj.write_en)
+        while True:
+            await write
+            await ReadOnly()
+            if not obj.write_en.value or (self.paddr() >> 2) % self.size != idx:
+                continue
+            # The word as written by the byte strobes
+            mask  = sum(0xff << (8 * i) for i in range(4) if (obj.pwstrb.value.integer >> i) & 1)
+            value = (word.value.integer & ~mask) | (obj.pwdata.value.integer & mask)
+            await RisingEdge(obj.clk)
+            if predicate is None or predicate(value):
+                return value
+
+    # Backdoor a byte buffer in RAM starting at byte-address, zero words are skipped
+    # since the RAM is zero-initialised
+    def write_bytes(self, addr, data):
+        assert addr % 4 == 0, "Address must be word aligned"
+        assert addr + len(data) <= 4 * self.size, f"Block at {addr:#x} does not fit in the RAM"
+        # Pad the data to a multiple of 4 bytes
+        data = bytes(data)
+        data = data.ljust((len(data) + 3) & ~3, b'\x00')
+        # Convert to little-endian words in one go
+        words = array('I')
+        words.frombytes(data)
+        if sys.byteorder == "big":
+            words.byteswap()
+        # Backdoor the non-zero values
+        base = addr >> 2
+        for i in compress(range(len(words)), words):
+            idx = base + i
+            self.mem[idx].value = words[i]
+        if self.tracking:
+            self.dirty.update(compress(range(base, base + len(words)), words))
+        return len(data)
+
+    # Load a binary file into the RAM of the machine, ELF files are loaded segment by
+    # segment at their physical addresses, which must fall in the RAM
+    def load_bin(self, filename, addr=0):
+        start = time.perf_counter()
+        with open(filename, "rb") as file:
+            data = file.read()
+        if is_elf(data):
+            size = 0
+            for seg in Elf(data).segments():
+                assert self.base <= seg.paddr < self.base + 4 * self.size, \
+                    f"Segment at {seg.paddr:#x} is outside of the RAM at {self.base:#x}"
+                size += self.write_bytes(seg.paddr - self.base, seg.data)
+        else:
+            size = self.write_bytes(addr, data)
+        elapsed = time.perf_counter() - start
+        rate = size / elapsed / 1e6 if elapsed > 0 else 0
+        self.obj._log.info(f"Loaded {size} bytes into the RAM ({rate:.1f} MB/s)")
@@ -0,0 +1,181 @@
+import os, sys, json, random, argparse, subprocess, importlib
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+import runner
+from utils import get_proj_dir
+
+
+SCOPES     = ["core", "uart", "plic", "top"]
+MAX_SHARDS = 8   # Jobs a module with many tests is dealt into
+
+# Modules whose stimulus comes from random, run once per seed of the sweep
+RANDOMISED = {
+    "core": ["test_seq_mul", "test_seq_div", "test_translate_gather", "test_translate_scatter", "test_fast_forward"],
+    "uart": ["test_err"],
+    "plic": ["test_zero_prio", "test_threshold", "test_order", "test_pending", "test_normal", "test_routing", "test_burst"],
+}
+
+
+def out_dir():
+    return f"{get_proj_dir()}/build/sim/regress"
+
+
+# Default MODULE of a scope, as set by its Makefile
+def scope_modules(scope):
+    out = subprocess.run(["make", "-s", "--no-print-directory", "-C", f"{get_proj_dir()}/tb/{scope}",
+                          "--eval=print-module: ; @echo $(MODULE)", "print-module"],
+                         capture_output=True, text=True, check=True).stdout
+    return [m.strip() for m in out.replace('"', "").split(",") if m.strip()]
+
+
+# Names of the cocotb tests of some modules, None for a module that does not
+# import outside of the simulator. Run in a fresh process per scope, as the
+# scopes have modules of the same name (sequences)
+def list_tests(scope, modules):
+    import cocotb.decorators
+    sys.path.insert(0, f"{get_proj_dir()}/tb/{scope}")
+    tests = {}
+    for module in modules:
+        try:
+            mod = importlib.import_module(module)
+            tests[module] = [name for name, obj in vars(mod).items() if isinstance(obj, cocotb.decorators.test)]
+        except Exception:
+            tests[module] = None
+    return tests
+
+
+def discover(scopes, modules=None):
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(len(scopes)) as pool:
+        results = {scope: pool.apply_async(list_tests, (scope, modules or scope_modules(scope))) for scope in scopes}
+        return {scope: result.get() for scope, result in results.items()}
+
+
+# Wall time of every test in the previous runs, to start the slowest first
+def load_timings():
+    path = f"{out_dir()}/timings.json"
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+# One job per test, or the tests of a large module dealt round-robin into
+# MAX_SHARDS jobs, for every seed
+def make_jobs(tests, seeds, max_shards):
+    specs = []
+    for scope, modules in tests.items():
+        for module, names in modules.items():
+            if names is None:
+                groups = [None]   # The whole module in one job
+            elif len(names) > max_shards:
+                groups = [names[i::max_shards] for i in range(max_shards)]
+            else:
+                groups = [[name] for name in names]
+            module_seeds = seeds if module in RANDOMISED.get(scope, []) else seeds[:1]
+            specs += [(scope, module, group, seed) for group in groups for seed in module_seeds]
+
+    jobs = []
+    for i, (scope, module, group, seed) in enumerate(specs):
+        name = f"{scope}.{module}.{group[0] if group and len(group) == 1 else i}.{seed}"
+        variables = {"MODULE": module}
+        if group is not None:
+            variables["TESTCASE"] = ",".join(group)
+        job = runner.Job(name, scope,
+            results = f"{out_dir()}/{scope}/{name}.xml",
+            log     = f"{out_dir()}/{scope}/{name}.log",
+            env     = {"RANDOM_SEED": str(seed)},
+            **variables)
+        job.module, job.tests, job.seed = module, group, seed
+        jobs.append(job)
+    return jobs
+
+
+# Expected wall time of a job, the unknown tests first
+def job_time(job, timings):
+    if job.tests is None:
+        keys = [k for k in timings if k.startswith(f"{job.scope}.{job.module}.")]
+    else:
+        keys = [f"{job.scope}.{job.module}.{test}" for test in job.tests]
+    if not keys or any(key not in timings for key in keys):
+        return float("inf")
+    return sum(timings[key] for key in keys)
+
+
+def repro_cmd(scope, module, test, seed):
+    testcase = f" TESTCASE={test}" if test else ""
+    return f"RANDOM_SEED={seed} make -C tb/{scope} MODULE={module}{testcase}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the tests of the scopes in parallel simulators, with seed sweeps")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="number of parallel simulators")
+    parser.add_argument("-s", "--scope", action="append", choices=SCOPES, help="scope to run (default: all)")
+    parser.add_argument("-m", "--module", action="append", help="module to run (default: MODULE of the scopes)")
+    parser.add_argument("-n", "--seeds", type=int, default=1, help="number of seeds of the randomised modules")
+    parser.add_argument("--seed", type=int, help="first seed, the others follow (default: random)")
+    parser.add_argument("--shards", type=int, default=MAX_SHARDS, help="jobs a module with more tests is dealt into")
+    parser.add_argument("-o", "--results", default=f"{out_dir()}/results.xml", help="merged results file")
+    parser.add_argument("-l", "--list", action="store_true", help="list the jobs without running them")
+    args = parser.parse_args()
+    if args.module and len(args.scope or SCOPES) != 1:
+        parser.error("--module needs a single --scope")
+
+    scopes = args.scope or SCOPES
+    first  = args.seed if args.seed is not None else random.randrange(1 << 31)
+    seeds  = [first + i for i in range(max(1, args.seeds))]
+
+    tests   = discover(scopes, args.module)
+    timings = load_timings()
+    jobs    = make_jobs(tests, seeds, args.shards)
+    jobs.sort(key=lambda job: job_time(job, timings), reverse=True)
+    if args.list:
+        for job in jobs:
+            print(f"{job.name:<50}  RANDOM_SEED={job.seed} {' '.join(job.cmd()[3:])}")
+        return 0
+
+    # Each scope builds into its own SIM_BUILD, the jobs of a scope share it
+    for scope in scopes:
+        os.makedirs(f"{out_dir()}/{scope}", exist_ok=True)
+    print(f"Building {' '.join(runner.sim_binary(scope) for scope in scopes)}")
+    with ThreadPoolExecutor(len(scopes)) as pool:
+        list(pool.map(lambda scope: runner.build(scope, log=f"{out_dir()}/{scope}/build.log"), scopes))
+
+    def on_done(job):
+        print(f"{job.name} done in {job.time:.1f}s (exit {job.proc.returncode}, log {job.log})")
+
+    print(f"Running {len(jobs)} jobs with seeds {seeds[0]}..{seeds[-1]}, {args.jobs} in parallel")
+    runner.run_jobs(jobs, args.jobs, on_done)
+
+    # Merge the results, and keep the timings for the order of the next run
+    runner.merge_results([job.results for job in jobs], args.results)
+    cases, expected, failed = [], [], []
+    for job in jobs:
+        job_cases = runner.parse_results(job.results)
+        cases    += job_cases
+        expected += job.tests or [c.name for c in job_cases]
+        for c in job_cases:
+            timings[f"{job.scope}.{job.module}.{c.name}"] = c.time
+            if c.status == "FAIL":
+                failed.append(repro_cmd(job.scope, job.module, c.name, c.seed or job.seed))
+        # The tests without results crashed the simulator
+        names = {c.name for c in job_cases}
+        for test in job.tests or []:
+            if test not in names:
+                failed.append(repro_cmd(job.scope, job.module, test, job.seed))
+        if job.tests is None and not job_cases:
+            failed.append(repro_cmd(job.scope, job.module, None, job.seed))
+    with open(f"{out_dir()}/timings.json", "w") as file:
+        json.dump(timings, file, indent=2, sort_keys=True)
+
+    num_fail = runner.print_report(cases, expected=expected)
+    if failed:
+        print("Reproduce the failures with:")
+        for cmd in failed:
+            print(f"  {cmd}")
+    print(f"Merged results written to {args.results}")
+    return 1 if num_fail or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+import os, sys, gzip, struct, atexit, argparse, cocotb
+from cocotb.triggers import ReadOnly, RisingEdge
+from cocotb.utils import get_sim_time
+from gpi import raw, watch, sim_steps, EDGE_FALLING
+
+TRACE = os.environ.get("TRACE")   # Directory to write the retirement traces to
+
+M32           = 0xffffffff
+TRACE_MAGIC   = b"RVTRACE\0"
+TRACE_VERSION = 1
+CHUNK_RECORDS = 1 << 16            # Records compressed and written at once
+
+_active = None                     # Trace started by the last call to start_trace
+
+# Header: magic, version, record size, clock period in simulator steps
+HEADER = struct.Struct("<8sIIQ")
+
+# Record: cycle, pc, instruction, info, rd value, memory address, store data or tval
+# info = rd | priv << 5 | kind << 8 | flags << 10 | cause << 16
+RECORD = struct.Struct("<QIIIIII")
+
+# Record kinds
+KIND_RETIRE    = 0
+KIND_EXCEPTION = 1
+KIND_INTERRUPT = 2
+
+# Record flags
+FLAG_RD    = 1 << 0   # Wrote rd
+FLAG_LOAD  = 1 << 1   # Read the memory
+FLAG_STORE = 1 << 2   # Wrote the memory
+
+# Opcodes with a data memory access
+OP_LOAD  = 0x03
+OP_STORE = 0x23
+OP_AMO   = 0x2f
+
+# Names of the causes in the Spike commit log
+EXCEPTION_NAMES = {
+    0:  "trap_instruction_address_misaligned",
+    1:  "trap_instruction_access_fault",
+    2:  "trap_illegal_instruction",
+    3:  "trap_breakpoint",
+    4:  "trap_load_address_misaligned",
+    5:  "trap_load_access_fault",
+    6:  "trap_store_address_misaligned",
+    7:  "trap_store_access_fault",
+    8:  "trap_user_ecall",
+    9:  "trap_supervisor_ecall",
+    11: "trap_machine_ecall",
+    12: "trap_instruction_page_fault",
+    13: "trap_load_page_fault",
+    15: "trap_store_page_fault",
+}
+INTERRUPT_NAMES = {
+    1:  "interrupt_supervisor_software",
+    5:  "interrupt_supervisor_timer",
+    7:  "interrupt_machine_timer",
+    9:  "interrupt_supervisor_external",
+    11: "interrupt_machine_external",
+}
+
+
+# Call func on every cycle a signal of the core is high, for the events that can
+# happen on consecutive cycles. The signal is sampled on the falling edges of the
+# clock, once the cycle has settled, rather than watched for its edges.
+# The callback is kept under the clock in callbacks, so only one per dict.
+def watch_cycles(callbacks, core, signal, func):
+    value = raw(signal)
+
+    def sample():
+        if value():
+            func()
+
+    watch(callbacks, core.clk, sample, EDGE_FALLING)
+
+
+# Call func on every retirement of the core. The instructions fetched ahead
+# retire on consecutive cycles, with instr_done staying high.
+def watch_retire(callbacks, core, func):
+    watch_cycles(callbacks, core, core.u_controller.instr_done, func)
+
+
+# Record every retirement and trap of the core into a compressed file.
+# The records are packed into a preallocated buffer, compressed and written
+# out once it is full, so the file is readable up to the last chunk even if
+# the simulation is killed.
+# The events are taken from GPI value change callbacks rather than triggers:
+# waking up a coroutine through the scheduler on every retirement costs ten
+# times more than building the record.
+class RetireTrace():
+    def __init__(self, core, filename, chunk=CHUNK_RECORDS):
+        self.core      = core
+        self.filename  = filename
+        self.buffer    = bytearray(RECORD.size * chunk)
+        self.size      = len(self.buffer)
+        self.offset    = 0
+        self.records   = 0
+        self.period    = 1
+        self.file      = None
+        self.task      = None
+        self.callbacks = {}
+
+    # Start recording once the core is out of reset
+    def start(self):
+        self.task = cocotb.start_soon(self.__run())
+        return self.task
+
+    def stop(self):
+        if self.task is not None:
+            self.task.kill()
+            self.task = None
+        for callback in self.callbacks.values():
+            callback.deregister()
+        self.callbacks = {}
+        self.close()
+
+    # Write the pending records. Also registered to run at the exit of the
+    # simulator, for the traces still recording when the last test ends.
+    def close(self):
+        if self.file is None:
+            return
+        self.__flush()
+        self.file.close()
+        self.file = None
+
+    def __flush(self):
+        if self.offset:
+            self.file.write(memoryview(self.buffer)[:self.offset])
+            self.offset = 0
+
+    def __record(self, pc, instr, info, value, addr, data):
+        RECORD.pack_into(self.buffer, self.offset, sim_steps() // self.period,
+                         pc, instr, info, value, addr, data)
+        self.records += 1
+        self.offset  += RECORD.size
+        if self.offset == self.size:
+            self.__flush()
+
+    async def __run(self):
+        core = self.core
+
+        # A reset sequence started at the same time only drives rst_n at the end of the step
+        await ReadOnly()
+        if not core.rst_n.value.integer:
+            await RisingEdge(core.rst_n)
+
+        # Cycles are counted in clock periods of simulation time
+        await RisingEdge(core.clk)
+        start = get_sim_time()
+        await RisingEdge(core.clk)
+        self.period = get_sim_time() - start
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.filename)), exist_ok=True)
+        self.file   = gzip.open(self.filename, "wb", compresslevel=1)
+        atexit.register(self.close)
+        self.file.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION, RECORD.size, self.period))
+
+        trap = core.u_trap_handler
+        watch_retire(self.callbacks, core, self.__retire())
+        watch(self.callbacks, trap.exception_valid, self.__exception())
+        watch(self.callbacks, trap.m_interrupt_valid, self.__interrupt(trap.m_interrupt_cause))
+        watch(self.callbacks, trap.s_interrupt_valid, self.__interrupt(trap.s_interrupt_cause))
+
+    def __exception(self):
+        core  = self.core
+        trap  = core.u_trap_handler
+        cause = raw(trap.exception_cause)
+        value = raw(trap.exception_value)
+        pc    = raw(core.u_stage_fetch.pc)
+        priv  = raw(core.u_csr.priv)
+
+        def exception():
+            info = priv() << 5 | KIND_EXCEPTION << 8 | cause() << 16
+            self.__record(pc() & M32, 0, info, 0, 0, value() & M32)
+        return exception
+
+    # Interrupt taken by the core before fetching
+    def __interrupt(self, cause):
+        core  = self.core
+        cause = raw(cause)
+        pc    = raw(core.u_stage_fetch.curr_pc)
+        priv  = raw(core.u_csr.priv)
+
+        def interrupt():
+            info = priv() << 5 | KIND_INTERRUPT << 8 | cause() << 16
+            self.__record(pc() & M32, 0, info, 0, 0, 0)
+        return interrupt
+
+    def __retire(self):
+        core     = self.core
+        fetch    = core.u_stage_fetch
+        reg_file = core.u_reg_file
+        reg_mem  = [raw(reg_file.reg_mem[i]) for i in range(32)]
+        old_pc   = raw(fetch.old_pc)
+        instr    = raw(fetch.instr)
+        priv     = raw(core.u_csr.priv)
+        d_en     = raw(reg_file.reg_d_en)
+        d_write  = raw(reg_file.reg_d_write)
+        d_id     = raw(reg_file.reg_d_id)
+        d_value  = raw(reg_file.reg_d_value)
+        mem_addr = raw(core.u_stage_mem.mem_addr)
+        wdata    = raw(core.u_stage_mem.mem_wdata)
+
+        def retire():
+            word   = instr() & M32
+            opcode = word & 0x7f
+            info   = priv() << 5
+            value, addr, data = 0, 0, 0
+
+            # The register write of an AMO is done in its first phase
+            if opcode == OP_AMO:
+                rd = (word >> 7) & 0x1f
+                if rd:
+                    value = reg_mem[rd]() & M32
+                    info |= rd | FLAG_RD << 10
+            elif d_en() and d_write():
+                rd = d_id()
+                if rd:
+                    value = d_value() & M32
+                    info |= rd | FLAG_RD << 10
+
+            if opcode == OP_LOAD:
+                addr  = mem_addr() & M32
+                info |= FLAG_LOAD << 10
+            elif opcode == OP_STORE:
+                addr  = mem_addr() & M32
+                data  = wdata() & M32
+                info |= FLAG_STORE << 10
+            elif opcode == OP_AMO:
+                addr  = mem_addr() & M32
+                data  = wdata() & M32
+                # lr.w only reads, sc.w only writes
+                funct5 = word >> 27
+                if funct5 == 0b00010:
+                    info |= FLAG_LOAD << 10
+                elif funct5 == 0b00011:
+                    info |= FLAG_STORE << 10
+                else:
+                    info |= (FLAG_LOAD | FLAG_STORE) << 10
+
+            self.__record(old_pc() & M32, word, info, value, addr, data)
+        return retire
+
+
+# Record the retirements of the core into TRACE/<name>.trace.gz when TRACE is set.
+# The callbacks outlive the test that registered them, so starting a trace
+# ends the one of the previous test.
+def start_trace(core, name):
+    global _active
+    if not TRACE:
+        return None
+    if _active is not None:
+        _active.stop()
+    _active = RetireTrace(core, f"{TRACE}/{name}.trace.gz")
+    _active.start()
+    return _active
+
+
+# Iterate over the records of a trace file as (cycle, pc, instr, info, value, addr, data).
+# A file cut short by a killed simulation ends at its last complete record.
+def read_trace(filename):
+    with gzip.open(filename, "rb") as file:
+        header = file.read(HEADER.size)
+        magic, version, size, _ = HEADER.unpack(header)
+        if magic != TRACE_MAGIC or version != TRACE_VERSION or size != RECORD.size:
+            raise ValueError(f"{filename}: not a version {TRACE_VERSION} retirement trace")
+
+        data = b""
+        while True:
+            try:
+                chunk = file.read(RECORD.size * 1024)
+            except EOFError:
+                chunk = b""
+            if not chunk:
+                break
+            data += chunk
+            end   = len(data) - len(data) % RECORD.size
+            yield from RECORD.iter_unpack(data[:end])
+            data  = data[end:]
+
+
+# Format a trace as a Spike commit log (--log-commits)
+def commit_log(records, cycles=False):
+    for cycle, pc, instr, info, value, addr, data in records:
+        rd    = info & 0x1f
+        priv  = (info >> 5) & 0x3
+        kind  = (info >> 8) & 0x3
+        flags = (info >> 10) & 0x3f
+        cause = info >> 16
+        stamp = f"{cycle:>10} " if cycles else ""
+
+        if kind == KIND_EXCEPTION:
+            name = EXCEPTION_NAMES.get(cause, f"trap_#{cause}")
+            yield f"{stamp}core   0: exception {name}, epc 0x{pc:08x}"
+            yield f"{stamp}core   0:           tval 0x{data:08x}"
+            continue
+        if kind == KIND_INTERRUPT:
+            name = INTERRUPT_NAMES.get(cause, f"interrupt_#{cause}")
+            yield f"{stamp}core   0: interrupt {name}, epc 0x{pc:08x}"
+            continue
+
+        line = f"{stamp}core   0: {priv} 0x{pc:08x} (0x{instr:08x})"
+        if flags & FLAG_RD:
+            line += f" x{rd:<2} 0x{value:08x}"
+        if flags & (FLAG_LOAD | FLAG_STORE):
+            line += f" mem 0x{addr:08x}"
+        if flags & FLAG_STORE:
+            # Width of the stored value from funct3, AMOs are always words
+            size  = 4 if (instr & 0x7f) == OP_AMO else 1 << ((instr >> 12) & 0x3)
+            line += f" 0x{data & ((1 << (8 * size)) - 1):0{2 * size}x}"
+        yield line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a retirement trace to a Spike-style commit log")
+    parser.add_argument("trace")
+    parser.add_argument("--cycles", action="store_true", help="Prefix each line with its cycle")
+    args = parser.parse_args()
+
+    try:
+        for line in commit_log(read_trace(args.trace), args.cycles):
+            print(line)
+    except BrokenPipeError:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+import os, subprocess, time
+import xml.etree.ElementTree as ET
+from utils import get_proj_dir
+
+
+# Path of the Verilator binary built for a testbench scope, with an I-cache
+# of icache sets and a D-cache of dcache sets if given (ICACHE=<sets>,
+# DCACHE=<sets> and DCACHE_WB=1 of tb/core/Makefile)
+def sim_binary(scope, icache=None, dcache=None, dcache_wb=False):
+    suffix  = f"_icache{icache}" if icache else ""
+    suffix += f"_dcache{dcache}{'wb' if dcache_wb else ''}" if dcache else ""
+    return f"{get_proj_dir()}/build/sim/{scope}{suffix}/Vtop"
+
+
+# Make variables of the caches of sim_binary()
+def cache_variables(icache=None, dcache=None, dcache_wb=False):
+    variables = {"ICACHE": icache} if icache else {}
+    if dcache:
+        variables["DCACHE"] = dcache
+        if dcache_wb:
+            variables["DCACHE_WB"] = 1
+    return variables
+
+
+# Command line of a make invocation in a testbench scope
+def make_cmd(scope, *targets, **variables):
+    cmd = ["make", "-C", f"{get_proj_dir()}/tb/{scope}"]
+    cmd += [f"{k}={v}" for k, v in variables.items()]
+    cmd += list(targets)
+    return cmd
+
+
+# Build the simulator of a scope without running any test
+def build(scope, log=None, **caches):
+    with open(log or os.devnull, "w") as file:
+        subprocess.run(make_cmd(scope, sim_binary(scope, **caches), **cache_variables(**caches)),
+                       stdout=file, stderr=subprocess.STDOUT, check=True)
+
+
+# A make invocation running some tests into its own results file
+class Job():
+    def __init__(self, name, scope, results, log, env=None, **variables):
+        self.name      = name
+        self.scope     = scope
+        self.results   = results
+        self.log       = log
+        self.env       = env or {}
+        self.variables = dict(variables, COCOTB_RESULTS_FILE=results)
+        self.proc      = None
+        self.time      = None
+
+    def cmd(self):
+        return make_cmd(self.scope, **self.variables)
+
+    def start(self):
+        if os.path.exists(self.results):
+            os.remove(self.results)
+        self.file  = open(self.log, "w")
+        self.start_time = time.perf_counter()
+        self.proc  = subprocess.Popen(self.cmd(), stdout=self.file, stderr=subprocess.STDOUT,
+                                      env=dict(os.environ, **self.env))
+
+    def poll(self):
+        if self.proc.poll() is None:
+            return False
+        if self.time is None:
+            self.time = time.perf_counter() - self.start_time
+            self.file.close()
+        return True
+
+
+# Run the jobs with at most num_workers in parallel, in the given order
+def run_jobs(jobs, num_workers, on_done=None):
+    pending = list(jobs)
+    running = []
+    while pending or running:
+        while pending and len(running) < num_workers:
+            job = pending.pop(0)
+            job.start()
+            running.append(job)
+        for job in [job for job in running if job.poll()]:
+            running.remove(job)
+            if on_done:
+                on_done(job)
+        time.sleep(0.05)
+    return [job.proc.returncode for job in jobs]
+
+
+# A test case read from a results file
+class TestCase():
+    def __init__(self, elem, seed=None):
+        self.name      = elem.get("name")
+        self.classname = elem.get("classname")
+        self.time      = float(elem.get("time", 0))
+        self.sim_time  = float(elem.get("sim_time_ns", 0))
+        self.seed      = seed
+        self.message   = None
+        failure = elem.find("failure")
+        if failure is None:
+            failure = elem.find("error")
+        if failure is not None:
+            self.status  = "FAIL"
+            self.message = failure.get("message")
+        elif elem.find("skipped") is not None:
+            self.status  = "SKIP"
+        else:
+            self.status  = "PASS"
+
+
+# Read the test cases of a results file, a missing file gives no test case
+def parse_results(path):
+    if not os.path.exists(path):
+        return []
+    cases = []
+    for suite in ET.parse(path).getroot().iter("testsuite"):
+        seed = None
+        for prop in suite.iter("property"):
+            if prop.get("name") == "random_seed":
+                seed = prop.get("value")
+        cases += [TestCase(elem, seed) for elem in suite.iter("testcase")]
+    return cases
+
+
+# Merge the test suites of several results files into one
+def merge_results(paths, out):
+    root = ET.Element("testsuites", name="results")
+    for path in paths:
+        if os.path.exists(path):
+            root.extend(ET.parse(path).getroot().findall("testsuite"))
+    ET.indent(root)
+    ET.ElementTree(root).write(out)
+
+
+# Print the test cases slowest first
+def print_report(cases, expected=None):
+    width = max([len(f"{c.classname}.{c.name}") for c in cases] + [4])
+    print(f"{'TEST':<{width}}  STATUS  WALL(s)   SIM(ns)")
+    for c in sorted(cases, key=lambda c: c.time, reverse=True):
+        print(f"{c.classname + '.' + c.name:<{width}}  {c.status:<6}  {c.time:7.2f}  {c.sim_time:10.0f}")
+    num_fail = sum(c.status == "FAIL" for c in cases)
+    print(f"TESTS={len(cases)} PASS={sum(c.status == 'PASS' for c in cases)} FAIL={num_fail} "
+          f"SKIP={sum(c.status == 'SKIP' for c in cases)}")
+    # Tests that did not report any result (crashed simulator)
+    missing = [] if expected is None else sorted(set(expected) - {c.name for c in cases})
+    if missing:
+        print(f"MISSING={len(missing)}: {' '.join(missing)}")
+    return num_fail + len(missing)
@@ -0,0 +1,20 @@
+# Targets of the Verilator model cache (tb/common/sim_cache.py), included by the
+# Makefile of each scope after Makefile.sim so that SIM_BUILD and COMPILE_ARGS are
+# final, knobs such as ICACHE or DCACHE included. The cache is keyed on them as make
+# builds the model with them rather than on a guess from the environment.
+
+SIM_CACHE_SCRIPT = python3 $(PROJ_DIR)/tb/common/sim_cache.py
+SIM_CACHE_ARGS   = $(notdir $(CURDIR)) --sim-build $(SIM_BUILD) --build-args='$(strip $(COMPILE_ARGS) $(EXTRA_ARGS))'
+
+.PHONY: cache-restore cache-save cache-build cache-hash
+
+cache-restore:
+	@$(SIM_CACHE_SCRIPT) restore $(SIM_CACHE_ARGS)
+
+cache-save:
+	@$(SIM_CACHE_SCRIPT) save $(SIM_CACHE_ARGS)
+
+cache-hash:
+	@$(SIM_CACHE_SCRIPT) hash $(SIM_CACHE_ARGS)
+
+cache-build: $(SIM_BUILD)/Vtop
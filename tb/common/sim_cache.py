@@ -0,0 +1,132 @@
+import os, sys, re, shutil, hashlib, subprocess, argparse
+from utils import get_proj_dir
+
+
+# Files kept in the cache, enough for make to consider the build up-to-date
+CACHED_FILES = ["Vtop.mk", "Vtop"]
+# Stamp left in the build directory with the hash of the restored/saved model
+STAMP_FILE   = ".sim_cache"
+# Make variables that can change the model, from the environment or the command line.
+# The build knobs of the tb Makefiles (ICACHE, DCACHE...) end up in the build arguments
+# passed by tb/common/sim_cache.mk, they are part of the key all the same.
+BUILD_VARS   = r"^(COMPILE_ARGS|EXTRA_ARGS|TRACE_ARGS|LIST_FILE|BUILD_ARGS|ICACHE|DCACHE|DCACHE_WB|BTB|VERILATOR_\w+|CFG_\w+|OPT_\w+)="
+
+
+def cache_dir():
+    return os.environ.get("SIM_CACHE_DIR", f"{get_proj_dir()}/build/sim_cache")
+
+
+# Expand a list file, following the -f includes
+def expand_list(path):
+    files = []
+    with open(path, "r") as file:
+        for line in file:
+            line = line.split("//")[0].strip().replace("${PROJ_DIR}", get_proj_dir())
+            if not line:
+                continue
+            if line.startswith("-f "):
+                include = line[3:].strip()
+                files += [include] + expand_list(include)
+            else:
+                files.append(line)
+    return files
+
+
+def command_output(cmd):
+    try:
+        return subprocess.run(cmd, capture_output=True, text=True).stdout
+    except FileNotFoundError:
+        return ""
+
+
+# Hash of everything the model of a scope is built from, build_args are the final
+# Verilator arguments of the tb Makefile
+def model_hash(scope, build_args):
+    h = hashlib.sha256()
+    tb_dir = f"{get_proj_dir()}/tb/{scope}"
+    files = [f"{tb_dir}/Makefile"]
+    for name in sorted(os.listdir(tb_dir)):
+        if name.endswith(".lst"):
+            files += [f"{tb_dir}/{name}"] + expand_list(f"{tb_dir}/{name}")
+    for path in files:
+        h.update(os.path.normpath(path).encode())
+        with open(path, "rb") as file:
+            h.update(file.read())
+    # Flags coming from the environment or the make command line
+    env_vars  = sorted(f"{k}={v}" for k, v in os.environ.items() if re.match(BUILD_VARS, f"{k}="))
+    make_vars = [arg for arg in os.environ.get("MAKEFLAGS", "").split() if re.match(BUILD_VARS, arg)]
+    # Make exports the command line variables to the environment, count them once
+    h.update(" ".join(sorted(set(env_vars + make_vars))).encode())
+    h.update(build_args.encode())
+    # Tools
+    h.update(command_output(["verilator", "--version"]).encode())
+    h.update(command_output(["cocotb-config", "--version"]).encode())
+    h.update(command_output(["cocotb-config", "--lib-dir"]).encode())
+    return h.hexdigest()
+
+
+# Copy the cached model into the build directory, return whether it was found
+def restore(scope, sim_build, build_args):
+    digest = model_hash(scope, build_args)
+    src    = f"{cache_dir()}/{scope}/{digest}"
+    dst    = sim_build
+    stamp  = f"{dst}/{STAMP_FILE}"
+    # Already in place
+    if os.path.exists(stamp) and open(stamp).read() == digest and os.path.exists(f"{dst}/Vtop"):
+        print(f"sim_cache: {os.path.basename(dst)} is up-to-date ({digest[:12]})")
+        return True
+    if not os.path.isdir(src):
+        print(f"sim_cache: {os.path.basename(dst)} not cached ({digest[:12]})")
+        return False
+    shutil.rmtree(dst, ignore_errors=True)
+    os.makedirs(dst)
+    for name in CACHED_FILES:
+        shutil.copy2(f"{src}/{name}", f"{dst}/{name}")
+    with open(stamp, "w") as file:
+        file.write(digest)
+    print(f"sim_cache: {os.path.basename(dst)} restored ({digest[:12]})")
+    return True
+
+
+# Store the model of the build directory in the cache
+def save(scope, sim_build, build_args):
+    digest = model_hash(scope, build_args)
+    src    = sim_build
+    dst    = f"{cache_dir()}/{scope}/{digest}"
+    if not os.path.exists(f"{src}/Vtop"):
+        print(f"sim_cache: {os.path.basename(src)} has no model to save")
+        return False
+    # Copy to a temporary directory first so that a partial entry is never used
+    tmp = f"{dst}.tmp{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    for name in CACHED_FILES:
+        shutil.copy2(f"{src}/{name}", f"{tmp}/{name}")
+    shutil.rmtree(dst, ignore_errors=True)
+    os.rename(tmp, dst)
+    with open(f"{src}/{STAMP_FILE}", "w") as file:
+        file.write(digest)
+    print(f"sim_cache: {os.path.basename(src)} saved ({digest[:12]})")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed cache of the Verilator models")
+    parser.add_argument("action", choices=["restore", "save", "hash"])
+    parser.add_argument("scope")
+    # Given by tb/common/sim_cache.mk, as the tb Makefile computed them
+    parser.add_argument("--sim-build", required=True, help="SIM_BUILD directory of the model")
+    parser.add_argument("--build-args", default="", help="COMPILE_ARGS and EXTRA_ARGS of the model")
+    args = parser.parse_args()
+
+    if args.action == "hash":
+        print(model_hash(args.scope, args.build_args))
+        return 0
+    if args.action == "restore":
+        ok = restore(args.scope, args.sim_build, args.build_args)
+    else:
+        ok = save(args.scope, args.sim_build, args.build_args)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
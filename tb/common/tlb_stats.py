@@ -0,0 +1,78 @@
+import cocotb
+from cocotb.triggers import ReadOnly, RisingEdge
+from cocotb.utils import get_sim_time
+from gpi import watch, sim_steps, EDGE_ANY
+from retire_trace import watch_cycles
+
+
+# TLB hits and page table walks of the memory interface of a core.
+# The cycles saved by the hits are estimated from the average length of the
+# walks, as a hit goes straight to the access a walk would have led to.
+class TlbStats():
+    def __init__(self, core):
+        self.core        = core
+        self.hits        = 0
+        self.walks       = 0
+        self.walk_cycles = 0
+        self.walk_since  = None
+        self.period      = 1
+        self.task        = None
+        self.callbacks   = {}
+
+    # Start counting once the core is out of reset
+    def start(self):
+        self.task = cocotb.start_soon(self.__run())
+        return self.task
+
+    def stop(self):
+        if self.task is not None:
+            self.task.kill()
+            self.task = None
+        for callback in self.callbacks.values():
+            callback.deregister()
+        self.callbacks = {}
+
+    async def __run(self):
+        core = self.core
+
+        # A reset sequence started at the same time only drives rst_n at the end of the step
+        await ReadOnly()
+        if not core.rst_n.value.integer:
+            await RisingEdge(core.rst_n)
+
+        await RisingEdge(core.clk)
+        start = get_sim_time()
+        await RisingEdge(core.clk)
+        self.period = get_sim_time() - start
+
+        mem_if = core.u_mem_if
+        watch_cycles(self.callbacks, core, mem_if.tlb_hit, self.__hit)
+        watch(self.callbacks, mem_if.walk_start, self.__walk)
+        watch(self.callbacks, mem_if.walk_active, self.__walk_active, EDGE_ANY)
+
+    def __now(self):
+        return sim_steps()
+
+    def __hit(self):
+        self.hits += 1
+
+    def __walk(self):
+        self.walks += 1
+
+    def __walk_active(self):
+        if self.core.u_mem_if.walk_active.value.integer:
+            self.walk_since = self.__now()
+        elif self.walk_since is not None:
+            self.walk_cycles += (self.__now() - self.walk_since) // self.period
+            self.walk_since = None
+
+    def hit_rate(self):
+        lookups = self.hits + self.walks
+        return self.hits / lookups if lookups else 0.0
+
+    def cycles_saved(self):
+        return round(self.hits * self.walk_cycles / self.walks) if self.walks else 0
+
+    def log(self, logger):
+        logger.info(f"TLB: {self.hits} hits, {self.walks} walks ({self.walk_cycles} cycles), "
+                    f"hit rate {100 * self.hit_rate():.1f}%, ~{self.cycles_saved()} cycles saved")
@@ -1,9 +1,15 @@
-import os, cocotb
+import os, time, cocotb
+from bisect import bisect_right
+from collections import deque
 from enum import Enum
 from cocotb.triggers import *
+from cocotb.utils import get_sim_steps, get_sim_time
+from gpi import raw, watch, sim_steps, EDGE_ANY
 
 
-PTY_POLL_TIME = 1000  # In sim microseconds
+PTY_POLL_TIME = 1000  # In sim microseconds, poll interval when idle
+PTY_POLL_MIN  = 10    # In sim microseconds, poll interval when active
+PTY_CHUNK     = 4096  # Max bytes per os.read/os.write
 
 
 # Utilities
@@ -15,6 +21,9 @@ def xor_all(data: int) -> int:
     return result
 
 
+PARITY_LUT = [xor_all(i) for i in range(256)]
+
+
 # Enums
 class WordLength(Enum):
     WORD_5 = 0b00
@@ -43,9 +52,9 @@ class ParityMode(Enum):
     FORCE0 = 0b111_000
     def gen(self, data):
         if self == ParityMode.ODD:
-            return xor_all(data) ^ 1
+            return PARITY_LUT[data & 0xff] ^ 1
         elif self == ParityMode.EVEN:
-            return xor_all(data)
+            return PARITY_LUT[data & 0xff]
         elif self == ParityMode.FORCE1:
             return 1
         elif self == ParityMode.FORCE0:
@@ -106,14 +115,33 @@ LSR_FIFO_ERR      = 0x80
 
 # UART class
 class Uart:
-    def __init__(self, tb, baud_rate=115200, word_len=WordLength.WORD_8, parity_mode=ParityMode.NONE):
+    def __init__(self, tb, baud_rate=115200, word_len=WordLength.WORD_8, parity_mode=ParityMode.NONE, frame_level=True):
         self.tb          = tb
         self.baud_rate   = baud_rate
         self.word_len    = word_len
         self.parity_mode = parity_mode
+        self.frame_level = frame_level
+        # PTY bridge counters
+        self.pty_rx_bytes = 0
+        self.pty_tx_bytes = 0
+        self.pty_polls    = 0
+        self.pty_start    = None
+        # Callbacks called with every character read from TX
+        self.listeners    = []
 
 
     async def read(self):
+        if self.frame_level:
+            data = await self.__read_frame()
+        else:
+            data = await self.__read_bit()
+        # Notify the listeners of every received character
+        for listener in self.listeners:
+            listener(data)
+        return data
+
+
+    async def __read_bit(self):
         char_time = round(1 / self.baud_rate, 9)
         # Wait for start bit
         await FallingEdge(self.tb.tx)
@@ -138,6 +166,48 @@ class Uart:
         return data
 
 
+    async def __read_frame(self):
+        char_time = round(1 / self.baud_rate, 9)
+        half_step = get_sim_steps(char_time / 2, 'sec')
+        bit_step  = get_sim_steps(char_time, 'sec')
+        parity    = self.parity_mode.gen(0) != None
+        num_bits  = 1 + self.word_len.length() + parity
+        tx        = raw(self.tb.tx)
+        # Wait for start bit
+        await FallingEdge(self.tb.tx)
+        start = get_sim_time('step')
+        # Record the line transitions until the center of the stop bit. A
+        # callback per transition does not go through the scheduler, so the whole
+        # frame costs a single timer.
+        times     = [start]
+        levels    = [0]
+        callbacks = {}
+        def on_edge():
+            times.append(sim_steps())
+            levels.append(tx())
+        watch(callbacks, self.tb.tx, on_edge, EDGE_ANY)
+        await Timer(half_step + num_bits * bit_step, 'step')
+        for callback in callbacks.values():
+            callback.deregister()
+        # Line level at the center of the n-th bit of the frame
+        def sample(n):
+            return levels[bisect_right(times, start + half_step + n * bit_step) - 1]
+        # Verify the start bit
+        assert sample(0) == 0, "Start bit is not zero"
+        # Read the data bits
+        data = 0
+        for i in range(self.word_len.length()):
+            data |= (sample(i + 1) << i)
+        # Verify the parity bit
+        parity_gen = self.parity_mode.gen(data)
+        if parity_gen != None:
+            assert sample(num_bits - 1) == parity_gen, "Parity does not match"
+        # Verify the stop bit
+        assert self.tb.tx.value == 1, "Stop bit is not one"
+        # Return the data
+        return data
+
+
     async def read_str(self, num):
         s = ""
         for i in range(num):
@@ -147,6 +217,8 @@ class Uart:
 
 
     async def write(self, data, flip_parity=False, flip_stop=False):
+        if self.frame_level:
+            return await self.__write_frame(data, flip_parity, flip_stop)
         char_time = round(1 / self.baud_rate, 9)
         # Start bit
         self.tb.rx.value = 0
@@ -165,6 +237,25 @@ class Uart:
         await Timer(char_time, 'sec')
 
 
+    async def __write_frame(self, data, flip_parity, flip_stop):
+        bit_step = get_sim_steps(round(1 / self.baud_rate, 9), 'sec')
+        # Start bit, data bits, parity bit and stop bit
+        bits = [0] + [(data >> i) & 1 for i in range(self.word_len.length())]
+        parity_gen = self.parity_mode.gen(data)
+        if parity_gen != None:
+            bits.append(parity_gen ^ flip_parity)
+        bits.append(1 if not flip_stop else 0)
+        # Drive only the transitions, runs of equal bits take a single timer
+        i = 0
+        while i < len(bits):
+            run = 1
+            while i + run < len(bits) and bits[i + run] == bits[i]:
+                run += 1
+            self.tb.rx.value = bits[i]
+            await Timer(run * bit_step, 'step')
+            i += run
+
+
     async def write_str(self, s):
         if isinstance(s, bytes):
             for c in s:
@@ -180,33 +271,84 @@ class Uart:
         os.set_blocking(master, False)
         self.tb._log.info(f"PTS opened at {os.ttyname(slave)}")
 
-        # Forward master read -> RX
+        self.pty_start  = time.perf_counter()
+        self.__rx_queue = deque()
+        self.__rx_event = Event()
+        self.__tx_buf   = bytearray()
+
+        # Poll master read -> RX queue, flush TX buffer -> master write
         pty_rx = cocotb.start_soon(self.__pty_rx(master))
-        # Forward TX -> master write
+        # Feed the RX queue back-to-back
+        pty_feed = cocotb.start_soon(self.__pty_feed())
+        # Forward TX -> TX buffer
         pty_tx = cocotb.start_soon(self.__pty_tx(master))
 
         # Wait for pty is done
         await pty_rx
+        await pty_feed
         await pty_tx
         # Close when done
         os.close(master)
         os.close(slave)
 
-    
+
+    # Bridge throughput since the PTY was opened
+    def pty_stats(self):
+        elapsed = time.perf_counter() - self.pty_start if self.pty_start else 0
+        return {
+            "rx_bytes" : self.pty_rx_bytes,
+            "tx_bytes" : self.pty_tx_bytes,
+            "polls"    : self.pty_polls,
+            "rx_rate"  : self.pty_rx_bytes / elapsed if elapsed > 0 else 0,
+            "tx_rate"  : self.pty_tx_bytes / elapsed if elapsed > 0 else 0,
+        }
+
+
     async def __pty_rx(self, master):
+        poll_time = PTY_POLL_MIN
         while True:
+            self.pty_polls += 1
+            # The TX bytes received since the last poll go out in one write
+            self.__pty_flush(master)
+            # Drain everything available from master
             try:
-                # Forward master read -> RX
-                data = os.read(master, 1)
-                await self.write(data[0])
+                data = os.read(master, PTY_CHUNK)
             except BlockingIOError:
-                # If no data is available, step the sim by some time
-                await Timer(PTY_POLL_TIME, "us")
+                data = b""
+            if data:
+                self.pty_rx_bytes += len(data)
+                self.__rx_queue.extend(data)
+                self.__rx_event.set()
+            # Snap back on RX activity, back off exponentially when idle. TX activity
+            # does not count: a character takes longer than the shortest interval,
+            # so each poll would flush a single byte.
+            poll_time = PTY_POLL_MIN if data else min(poll_time * 2, PTY_POLL_TIME)
+            await Timer(poll_time, "us")
+
+
+    async def __pty_feed(self):
+        while True:
+            while self.__rx_queue:
+                await self.write(self.__rx_queue.popleft())
+            self.__rx_event.clear()
+            await self.__rx_event.wait()
 
 
     async def __pty_tx(self, master):
         while True:
-            # Forward TX -> master write
+            # Forward TX -> TX buffer
             c = await self.read()
-            os.write(master, c.to_bytes())
+            self.__tx_buf.append(c)
+            if len(self.__tx_buf) >= PTY_CHUNK:
+                self.__pty_flush(master)
+
 
+    # Write the buffered TX bytes to master
+    def __pty_flush(self, master):
+        if self.__tx_buf:
+            try:
+                n = os.write(master, self.__tx_buf)
+            except BlockingIOError:
+                n = 0
+            self.pty_tx_bytes += n
+            del self.__tx_buf[:n]
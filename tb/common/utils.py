@@ -6,6 +6,12 @@ def get_proj_dir():
     return os.environ["PROJ_DIR"]
 
 
+# Wait for the ecall of a program, then for its last stores to leave the store buffer
 async def wait_ecall(core):
     await RisingEdge(core.u_stage_exec.ecall)
+    await drain_stores(core)
 
+
+async def drain_stores(core):
+    while core.u_mem_if.store_pending.value:
+        await RisingEdge(core.clk)
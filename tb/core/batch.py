@@ -0,0 +1,83 @@
+import os, cocotb
+import utils
+from cocotb.triggers import ClockCycles, First
+from ram import Ram
+from sequences import reset_sequence
+
+
+TIMEOUT_CLK  = 100000
+TO_HOST_ADDR = 0x1000
+
+
+# Outcome of one program of a batch
+class BatchResult():
+    def __init__(self, name, passed, cycles, instret, status):
+        self.name    = name
+        self.passed  = passed
+        self.cycles  = cycles
+        self.instret = instret
+        self.status  = status
+
+    def __str__(self):
+        return f"{self.name} {'PASS' if self.passed else 'FAIL'} cycles={self.cycles} instret={self.instret} {self.status}".rstrip()
+
+
+# Run many programs one after the other in the same simulation
+class Batch():
+    def __init__(self, tb):
+        self.tb      = tb
+        self.ram     = Ram(tb.u_ram)
+        self.results = []
+        # The words of a program are cleared before the next one
+        self.ram.track_writes()
+
+    # Reset the core and run a program until ecall (or a non-zero write to tohost)
+    # - setup(ram) is called after the program is loaded
+    # - check(ram) is called at the end and returns whether the program passed
+    async def run(self, filename, to_host=None, setup=None, check=None, timeout_clk=TIMEOUT_CLK):
+        tb   = self.tb
+        name = os.path.splitext(os.path.basename(filename))[0]
+
+        # Hold the core in reset while the memory is swapped
+        reset = await cocotb.start(reset_sequence(tb))
+        self.ram.clear_dirty()
+        self.ram.load_bin(filename)
+        if setup:
+            setup(self.ram)
+        await reset
+
+        # Run to completion
+        if to_host is not None:
+            done = cocotb.start_soon(self.ram.watch_write(to_host, lambda value: value != 0))
+        else:
+            done = cocotb.start_soon(utils.wait_ecall(tb.u_core))
+        await First(done, ClockCycles(tb.clk, timeout_clk))
+
+        # Collect the result
+        cycles  = tb.u_core.u_csr.mcycle.value.integer
+        instret = tb.u_core.u_csr.minstret.value.integer
+        if not done.done():
+            done.kill()
+            passed, status = False, "timeout"
+        elif to_host is not None:
+            value  = done.result()
+            passed = value == 1
+            status = "" if passed else f"tohost={value:#x}"
+        else:
+            passed = check(self.ram) if check else True
+            status = "" if passed else "check failed"
+
+        result = BatchResult(name, passed, cycles, instret, status)
+        tb._log.info(str(result))
+        self.results.append(result)
+        return result
+
+    # Stop tracking the writes to the RAM
+    def close(self):
+        self.ram.stop_tracking()
+
+    # Write one line per program
+    def write_report(self, filename):
+        with open(filename, "w") as file:
+            for result in self.results:
+                file.write(f"{result}\n")
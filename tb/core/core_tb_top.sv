@@ -2,7 +2,11 @@
 // Consists of the core, a RAM, a clock generator, and a MTIME counter.
 module core_tb_top #(
     parameter  RESET_VECTOR = 32'h8000_0000,    // Value of PC when reset
-    parameter  RAM_SIZE = 32'h0100_0000         // RAM size in bytes (16MB)
+    parameter  RAM_SIZE = 32'h0100_0000,        // RAM size in bytes (16MB)
+    parameter  BTB_ENTRIES = 16,                // Branch target buffer of the core, 0 for no prediction
+    parameter  ICACHE_SETS = 0,                 // I-cache of the core (2-way, 16B lines), 0 for none
+    parameter  DCACHE_SETS = 0,                 // D-cache of the core (2-way, 4B lines), 0 for none
+    parameter  DCACHE_WRITE_BACK = 0            // Write-through D-cache otherwise
 )(
     input  logic  rst_n,
     // External interrupt
@@ -29,8 +33,15 @@ module core_tb_top #(
     logic         invalid_access;
 
     // --------------------- Core ---------------------
+    // The RAM is the cacheable region
     core_top #(
-        .RESET_VECTOR  (RESET_VECTOR)
+        .RESET_VECTOR      (RESET_VECTOR),
+        .BTB_ENTRIES       (BTB_ENTRIES),
+        .ICACHE_SETS       (ICACHE_SETS),
+        .DCACHE_SETS       (DCACHE_SETS),
+        .DCACHE_WRITE_BACK (DCACHE_WRITE_BACK),
+        .CACHEABLE_BASE    (34'h0_8000_0000),
+        .CACHEABLE_ADDR_W  ($clog2(RAM_SIZE))
     ) u_core(
         .clk           (clk),
         .rst_n         (rst_n),
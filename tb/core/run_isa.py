@@ -0,0 +1,63 @@
+import os, sys, argparse
+import runner
+from utils import get_proj_dir
+
+
+SUITES = ["rv32ui", "rv32um", "rv32ua", "rv32mi", "rv32si"]
+
+
+# Names of the cocotb tests generated by test_isa.py
+def isa_tests(suites):
+    tests = []
+    for suite in suites:
+        with open(f"{get_proj_dir()}/prog/isa/{suite}.txt", "r") as file:
+            tests += [f"test_{line.strip().replace('-', '_')}" for line in file if line.strip()]
+    return tests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the ISA tests sharded across parallel simulators")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="number of shards")
+    parser.add_argument("-s", "--suite", action="append", choices=SUITES, help="ISA suite to run (default: all)")
+    parser.add_argument("-o", "--results", default=f"{get_proj_dir()}/tb/core/results.xml", help="merged results file")
+    parser.add_argument("--icache", type=int, help="run on a core with an I-cache of this many sets")
+    parser.add_argument("--dcache", type=int, help="run on a core with a write-through D-cache of this many sets")
+    args = parser.parse_args()
+
+    tests = isa_tests(args.suite or SUITES)
+    num_shards = max(1, min(args.jobs, len(tests)))
+    caches = {"icache": args.icache, "dcache": args.dcache}
+    out_dir = f"{os.path.dirname(runner.sim_binary('core', **caches))}/isa"
+    os.makedirs(out_dir, exist_ok=True)
+    variables = runner.cache_variables(**caches)
+
+    # Build once, all the shards reuse the same simulator
+    print(f"Building {runner.sim_binary('core', **caches)}")
+    runner.build("core", log=f"{out_dir}/build.log", **caches)
+
+    # Deal the tests round-robin across the shards
+    jobs = []
+    for i in range(num_shards):
+        jobs.append(runner.Job(f"shard{i}", "core",
+            results  = f"{out_dir}/results_{i}.xml",
+            log      = f"{out_dir}/shard_{i}.log",
+            MODULE   = "test_isa",
+            TESTCASE = ",".join(tests[i::num_shards]),
+            **variables))
+
+    def on_done(job):
+        print(f"{job.name} done in {job.time:.1f}s (exit {job.proc.returncode}, log {job.log})")
+
+    print(f"Running {len(tests)} tests in {num_shards} shards")
+    runner.run_jobs(jobs, num_shards, on_done)
+
+    # Merge the per-shard results into one report
+    runner.merge_results([job.results for job in jobs], args.results)
+    cases = []
+    for job in jobs:
+        cases += runner.parse_results(job.results)
+    return 1 if runner.print_report(cases, expected=tests) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
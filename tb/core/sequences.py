@@ -1,4 +1,8 @@
-from cocotb.triggers import ClockCycles
+from cocotb.triggers import ClockCycles, ReadOnly
+from fast_forward import handoff
+from iss import COSIM, Cosim, Iss, Region
+
+RAM_BASE = 0x80000000
 
 # Reset
 async def reset_sequence(tb):
@@ -8,3 +12,22 @@ async def reset_sequence(tb):
     tb.mtimer_int.value = 0
     await ClockCycles(tb.clk, 5)   # Reset for 5 cycles
     tb.rst_n.value      = 1
+
+# Check every retirement of the core against the ISS when COSIM=1
+# Must be called once the program and its data are in the RAM
+def start_cosim(tb, ram):
+    if not COSIM:
+        return None
+    cosim = Cosim(tb.u_core, Iss([Region(RAM_BASE, 4 * ram.size, ram)]))
+    cosim.start()
+    return cosim
+
+# Run the first n instructions of the program on the ISS, then continue on the core
+# from the same state. Must be called once the program and its data are in the RAM.
+async def fast_forward(tb, ram, n):
+    # Let the writes of the program to the RAM take effect
+    await ReadOnly()
+    iss = Iss([Region(RAM_BASE, 4 * ram.size, ram)], pc=RAM_BASE)
+    iss.run(n)
+    await handoff(tb.u_core, iss)
+    return iss
@@ -1,7 +1,7 @@
 import os, random, cocotb
 import utils
 from ram import Ram
-from sequences import reset_sequence
+from sequences import reset_sequence, start_cosim
 
 
 PROJ_DIR    = utils.get_proj_dir()
@@ -18,6 +18,9 @@ async def test_access_fault(tb):
     ram = Ram(tb.u_ram)
     ram.load_bin(f"{PROJ_DIR}/build/asm/access_fault.bin")
 
+    # Compare against the ISS (COSIM=1)
+    start_cosim(tb, ram)
+
     # Wait for ecall
     await utils.wait_ecall(tb.u_core)
 
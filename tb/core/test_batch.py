@@ -0,0 +1,78 @@
+import os, random, cocotb
+import utils
+from batch import Batch, TO_HOST_ADDR
+
+
+PROJ_DIR     = utils.get_proj_dir()
+BATCH_LIST   = os.environ.get("BATCH_LIST")      # File with one binary per line
+BATCH_REPORT = os.environ.get("BATCH_REPORT")    # Optional report of the batch
+ISA_SUITES   = ["rv32ui", "rv32um", "rv32ua", "rv32mi", "rv32si"]
+SEQ_SIZE     = 1024
+BASE_FIB     = 0x1000
+BASE_A       = 0x1000
+BASE_B       = 0x2000
+BASE_MUL     = 0x3000
+
+
+def isa_binaries():
+    binaries = []
+    for suite in ISA_SUITES:
+        with open(f"{PROJ_DIR}/prog/isa/{suite}.txt", "r") as file:
+            binaries += [f"{PROJ_DIR}/build/isa/{line.strip()}.bin" for line in file if line.strip()]
+    return binaries
+
+
+@cocotb.test()
+async def test_batch_isa(tb):
+    # Programs of the batch, the ISA tests by default
+    if BATCH_LIST:
+        with open(BATCH_LIST, "r") as file:
+            binaries = [line.strip() for line in file if line.strip()]
+    else:
+        binaries = isa_binaries()
+
+    # Run all of them in the same simulation
+    batch = Batch(tb)
+    for binary in binaries:
+        await batch.run(binary, to_host=TO_HOST_ADDR)
+    batch.close()
+
+    if BATCH_REPORT:
+        batch.write_report(BATCH_REPORT)
+
+    # Verify that all the programs passed
+    failed = [result.name for result in batch.results if not result.passed]
+    assert not failed, f"Failed programs: {' '.join(failed)}"
+
+
+@cocotb.test(timeout_time=100, timeout_unit="ms")
+async def test_batch_asm(tb):
+    # Expected output of the fibonacci program
+    with open(f"{PROJ_DIR}/prog/asm/fibonacci.ref", "r") as file:
+        fib = [int(line) for line in file]
+
+    # Operands of the multiplication program
+    all_a = [random.randint(0, 2**32 - 1) for _ in range(SEQ_SIZE)]
+    all_b = [random.randint(0, 2**32 - 1) for _ in range(SEQ_SIZE)]
+
+    def setup_mul(ram):
+        ram.write_block(BASE_A, all_a)
+        ram.write_block(BASE_B, all_b)
+
+    def check_mul(ram):
+        return list(ram.read_block(BASE_MUL, SEQ_SIZE)) == [(a * b) & 0xffffffff for a, b in zip(all_a, all_b)]
+
+    def check_fib(ram):
+        return list(ram.read_block(BASE_FIB, len(fib))) == fib
+
+    # The products must have been cleared before the last program
+    def check_fib_clean(ram):
+        return check_fib(ram) and not any(ram.read_block(BASE_MUL, SEQ_SIZE))
+
+    batch = Batch(tb)
+    await batch.run(f"{PROJ_DIR}/build/asm/fibonacci.bin", check=check_fib)
+    await batch.run(f"{PROJ_DIR}/build/asm/seq_mul.bin", setup=setup_mul, check=check_mul)
+    await batch.run(f"{PROJ_DIR}/build/asm/fibonacci.bin", check=check_fib_clean)
+    batch.close()
+
+    assert all(result.passed for result in batch.results)
@@ -0,0 +1,37 @@
+import cocotb
+import utils
+from ram import Ram
+from sequences import reset_sequence, start_cosim
+
+
+PROJ_DIR  = utils.get_proj_dir()
+OUTER     = 64
+INNER     = 8
+BASE_DATA = 0x1000
+
+
+def has_bpred(core):
+    return hasattr(core.u_stage_fetch.u_bpred, "g_bpred")
+
+
+@cocotb.test(timeout_time=10, timeout_unit="ms")
+async def test_bpred(tb):
+    cocotb.start_soon(reset_sequence(tb))
+
+    ram = Ram(tb.u_ram)
+    ram.load_bin(f"{PROJ_DIR}/build/asm/bpred.bin")
+    start_cosim(tb, ram)
+
+    await utils.wait_ecall(tb.u_core)
+    mispredict, refetch, result = ram.read_block(BASE_DATA, 3)
+
+    assert result == OUTER * (INNER * (INNER + 1) // 2 + 1)
+    assert refetch >= mispredict
+
+    if has_bpred(tb.u_core):
+        # The first of each of the 6 branches and jumps, the returns from the RAS,
+        # the exit of the inner loop at every call and the exit of the outer loop
+        assert mispredict == 6 + OUTER + 1
+    else:
+        # Every taken branch and jump (2 calls, 2 returns per call)
+        assert mispredict == OUTER * (INNER - 1 + 4) + OUTER - 1
@@ -0,0 +1,93 @@
+import cocotb
+import utils
+from array import array
+from cocotb.triggers import ClockCycles, with_timeout
+from iss import KNOWN_DEVIATIONS, RTL_SC_FAIL_KEEP, Cosim, Iss, Region
+from ram import Ram
+from sequences import reset_sequence, RAM_BASE
+
+
+PROJ_DIR = utils.get_proj_dir()
+RSV_ADDR = 0x80001000
+
+
+def lui(rd, imm):
+    return (imm << 12) | (rd << 7) | 0x37
+
+def addi(rd, rs1, imm):
+    return ((imm & 0xfff) << 20) | (rs1 << 15) | (rd << 7) | 0x13
+
+def lr_w(rd, rs1):
+    return (0b00010 << 27) | (rs1 << 15) | (2 << 12) | (rd << 7) | 0x2f
+
+def sc_w(rd, rs2, rs1):
+    return (0b00011 << 27) | (rs2 << 20) | (rs1 << 15) | (2 << 12) | (rd << 7) | 0x2f
+
+ECALL = 0x73
+
+# A failing SC.W keeps the reservation of the RTL, the next SC.W to the LR address succeeds
+SC_FAIL_PROG = [
+    lui(10, RSV_ADDR >> 12),
+    addi(11, 10, 4),
+    addi(12, 0, 42),
+    lr_w(5, 10),
+    sc_w(6, 12, 11),    # Fails, other address
+    sc_w(7, 12, 10),    # Succeeds on the RTL, fails on Spike
+    ECALL,
+]
+
+
+# Reset the core and compare it against the ISS, once the program is in the RAM
+def start_cosim(tb, ram, allow):
+    cocotb.start_soon(reset_sequence(tb))
+    cosim = Cosim(tb.u_core, Iss([Region(RAM_BASE, 4 * ram.size, ram)]), allow=allow)
+    cosim.start()
+    return cosim
+
+
+@cocotb.test(timeout_time=1, timeout_unit="ms")
+async def test_cosim_deviation(tb):
+    # The ISS follows the known deviation and reports it
+    ram = Ram(tb.u_ram)
+    ram.write_block(0, array('I', SC_FAIL_PROG))
+    cosim = start_cosim(tb, ram, KNOWN_DEVIATIONS)
+    await utils.wait_ecall(tb.u_core)
+    cosim.stop()
+
+    assert tb.u_core.u_reg_file.reg_mem[6].value == 1
+    assert tb.u_core.u_reg_file.reg_mem[7].value == 0
+    assert ram.at(RSV_ADDR - RAM_BASE).value == 42
+    assert cosim.deviations == [(RTL_SC_FAIL_KEEP, RAM_BASE + 4 * 5)]
+
+
+@cocotb.test(timeout_time=1, timeout_unit="ms")
+async def test_cosim_deviation_rejected(tb):
+    # Without the allowlist, the deviation is a divergence
+    ram = Ram(tb.u_ram)
+    ram.write_block(0, array('I', SC_FAIL_PROG))
+    cosim = start_cosim(tb, ram, ())
+    try:
+        await with_timeout(cosim.task, 100, "us")
+    except AssertionError as e:
+        assert RTL_SC_FAIL_KEEP in str(e)
+    else:
+        assert False, "Cosim did not flag the deviation"
+
+
+@cocotb.test(timeout_time=1, timeout_unit="ms")
+async def test_cosim_divergence(tb):
+    # Run a program, then corrupt the registers of the core behind the ISS
+    ram = Ram(tb.u_ram)
+    ram.load_bin(f"{PROJ_DIR}/build/asm/fibonacci.bin")
+    cosim = start_cosim(tb, ram, KNOWN_DEVIATIONS)
+    await ClockCycles(tb.clk, 50)
+    reg_mem = tb.u_core.u_reg_file.reg_mem
+    for i in range(1, 32):
+        reg_mem[i].value = reg_mem[i].value.integer ^ 0x100
+
+    try:
+        await with_timeout(cosim.task, 100, "us")
+    except AssertionError as e:
+        assert "Cosim divergence" in str(e)
+    else:
+        assert False, "Cosim did not flag the divergence"
@@ -0,0 +1,83 @@
+import cocotb
+import utils
+from cocotb.utils import get_sim_time
+from cpi_stack import CpiStack, CLASSES, FETCH_WALK, DATA_WALK, AMO_PHASE, TRAP_REDIRECT
+from ram import Ram
+from sequences import reset_sequence, RAM_BASE
+
+
+PROJ_DIR  = utils.get_proj_dir()
+ITERATION = 1024
+BASE_ADDR = 0x1000
+BASE_DATA = 0x2000
+BASE_ROOT = 0x3000
+BASE_PAGE = 0x800000
+VADDR     = 0x00401000
+
+PTE_V     = (1 << 0)
+PTE_R     = (1 << 1)
+PTE_A     = (1 << 6)
+
+
+# Load a program and its data words, and count its cycles from the reset
+async def cpi_base(tb, name, data={}):
+    cocotb.start_soon(reset_sequence(tb))
+
+    ram = Ram(tb.u_ram)
+    ram.load_bin(f"{PROJ_DIR}/build/asm/{name}.bin")
+    for addr, value in data.items():
+        ram.at(addr).value = value
+
+    cpi = CpiStack(tb.u_core)
+    await cpi.start()
+    return ram, cpi
+
+
+def count(cpi, name):
+    return cpi.counts[CLASSES.index(name)]
+
+
+@cocotb.test(timeout_time=100, timeout_unit="ms")
+async def test_cpi_stack_seq_mul(tb):
+    _, cpi = await cpi_base(tb, "seq_mul")
+    start = get_sim_time()
+
+    await utils.wait_ecall(tb.u_core)
+    cpi.stop()
+
+    # Every cycle up to the last retirement is accounted, in the class from the decoder
+    assert abs(cpi.cycles() - (get_sim_time() - start) // cpi.period) < 64
+    assert count(cpi, "mul")    == 4 * ITERATION
+    assert count(cpi, "load")   == 2 * ITERATION
+    assert count(cpi, "store")  == 4 * ITERATION
+    assert count(cpi, "branch") == ITERATION
+    assert count(cpi, "trap")   == 1   # The final ecall
+
+    # Bare mode, and no AMO
+    stack = cpi.stack()
+    assert stack[FETCH_WALK] == stack[DATA_WALK] == stack[AMO_PHASE] == 0
+    assert stack[TRAP_REDIRECT] == 1
+
+
+@cocotb.test(timeout_time=100, timeout_unit="ms")
+async def test_cpi_stack_page_walk(tb):
+    # Every load goes through the same 4 KiB page
+    table = BASE_PAGE
+    page  = BASE_PAGE + 0x1000
+    data  = {BASE_ROOT | (VADDR >> 22) << 2: ((RAM_BASE | table) >> 2) | PTE_V,
+             table | ((VADDR >> 12) & 0x3ff) << 2: ((RAM_BASE | page) >> 2) | PTE_V | PTE_R | PTE_A}
+    for i in range(ITERATION):
+        data[BASE_ADDR + 4 * i] = VADDR | (i << 2)
+        data[page + 4 * i] = i
+    ram, cpi = await cpi_base(tb, "translate_gather", data)
+
+    await utils.wait_ecall(tb.u_core)
+    cpi.stop()
+    assert list(ram.read_block(BASE_DATA, ITERATION)) == list(range(ITERATION))
+
+    # The first translated load walks the page table, the others hit in the
+    # TLB, the fetches run in M-mode
+    stack = cpi.stack()
+    assert count(cpi, "load") == 2 * ITERATION
+    assert 0 < stack[DATA_WALK] <= 4
+    assert stack[FETCH_WALK] == 0
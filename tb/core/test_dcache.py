@@ -0,0 +1,48 @@
+import random, cocotb
+import utils
+from array import array
+from cache_stats import CacheStats, has_cache
+from ram import Ram
+from sequences import reset_sequence, start_cosim
+
+
+PROJ_DIR   = utils.get_proj_dir()
+SEQ_SIZE   = 1024
+BYTE_SIZE  = 256
+ITERATION  = 16
+BASE_SRC   = 0x1000
+BASE_WORD  = 0x3000
+BASE_BYTE  = 0x5000
+BASE_RES   = 0x6000
+
+
+@cocotb.test(timeout_time=100, timeout_unit="ms")
+async def test_dcache_memcpy(tb):
+    cocotb.start_soon(reset_sequence(tb))
+
+    ram = Ram(tb.u_ram)
+    ram.load_bin(f"{PROJ_DIR}/build/asm/memcpy.bin")
+    words = array('I', [random.randint(0, 2**32 - 1) for _ in range(SEQ_SIZE)])
+    ram.write_block(BASE_SRC, words)
+    start_cosim(tb, ram)
+
+    stats = CacheStats(tb.u_core, "dcache")
+    await utils.wait_ecall(tb.u_core)
+    stats.stop()
+    stats.log(tb._log)
+    tb._log.info(f"{tb.u_core.u_csr.mcycle.value.integer} cycles")
+
+    # The copies, then the sum of the copied words, the LR/SC and AMO counters, and the failed SC
+    assert ram.read_block(BASE_WORD, SEQ_SIZE) == words
+    assert ram.read_block(BASE_BYTE, BYTE_SIZE // 4) == words[:BYTE_SIZE // 4]
+    total, lr_sc, amo, _, sc_fail = ram.read_block(BASE_RES, 5)
+    assert total == sum(words) & 0xffffffff
+    assert lr_sc == amo == ITERATION
+    assert sc_fail == 1
+
+    # Whatever the line size, the byte copy reads each word 4 times and misses at most once
+    if has_cache(tb.u_core, "dcache"):
+        assert stats.misses > 0
+        assert stats.hits >= 3 * BYTE_SIZE // 4
+    else:
+        assert stats.hits == stats.misses == 0
@@ -0,0 +1,90 @@
+import os, random, cocotb
+import utils
+from array import array
+from cocotb.triggers import ClockCycles, First
+from iss import Cosim
+from ram import Ram
+from sequences import reset_sequence, fast_forward
+
+
+PROJ_DIR = utils.get_proj_dir()
+
+
+# Fast-forward some instructions, then check the rest of the run against the ISS
+async def fast_forward_base(tb, ram, n):
+    iss = await fast_forward(tb, ram, n)
+    assert iss.instret == n
+    Cosim(tb.u_core, iss).start()
+
+
+@cocotb.test(timeout_time=1, timeout_unit="ms")
+async def test_fast_forward_fibonacci(tb):
+    # Start the reset sequence
+    cocotb.start_soon(reset_sequence(tb))
+
+    # Backdoor some instructions
+    ram = Ram(tb.u_ram)
+    ram.load_bin(f"{PROJ_DIR}/build/asm/fibonacci.bin")
+
+    # Run the first half on the ISS
+    await fast_forward_base(tb, ram, 120)
+
+    # Wait for ecall
+    await utils.wait_ecall(tb.u_core)
+
+    # Check the final result is RAM (starting at 0x1000)
+    with open(f"{PROJ_DIR}/prog/asm/fibonacci.ref", "r") as file:
+        for i, line in enumerate(file):
+            assert ram.at(0x1000 + (i << 2)).value == int(line)
+
+
+@cocotb.test(timeout_time=100, timeout_unit="ms")
+async def test_fast_forward_seq_mul(tb):
+    # Start the reset sequence
+    cocotb.start_soon(reset_sequence(tb))
+
+    # Backdoor some instructions and the multiplicands
+    ram = Ram(tb.u_ram)
+    ram.load_bin(f"{PROJ_DIR}/build/asm/seq_mul.bin")
+    all_a = array('I', [random.randint(0, 2**32 - 1) for _ in range(1024)])
+    all_b = array('I', [random.randint(0, 2**32 - 1) for _ in range(1024)])
+    ram.write_block(0x1000, all_a)
+    ram.write_block(0x2000, all_b)
+
+    # Part of the products are written by the ISS
+    await fast_forward_base(tb, ram, 5000)
+
+    # Wait for ecall
+    await utils.wait_ecall(tb.u_core)
+
+    # Check the low products
+    mul = ram.read_block(0x3000, 1024)
+    for (i, (a, b)) in enumerate(zip(all_a, all_b)):
+        assert mul[i] == (a * b) & 0xffffffff
+
+
+# The program is handed over in U-mode with MEIE set, the interrupt must reach M-mode
+@cocotb.test(timeout_time=1, timeout_unit="ms")
+async def test_fast_forward_umode_int(tb):
+    # Start the reset sequence
+    cocotb.start_soon(reset_sequence(tb))
+
+    # Backdoor some instructions
+    ram = Ram(tb.u_ram)
+    ram.load_bin(f"{PROJ_DIR}/build/asm/core_int.bin")
+    ram.at(0x1000).value = 0    # mie
+    ram.at(0x1004).value = 1    # meie
+    ram.at(0x1008).value = 1    # U-mode
+
+    # Stop in the main loop
+    await fast_forward_base(tb, ram, 40)
+    done = cocotb.start_soon(ram.watch_write(0x1014))
+
+    # Produce an interrupt
+    await ClockCycles(tb.clk, 100)
+    tb.int_m_ext.value = 1
+    await First(done, ClockCycles(tb.clk, 1000))
+
+    # Verify the cause and MIP
+    assert ram.at(0x1010).value == 0x80000000 + 11
+    assert ram.at(0x1014).value == (1 << 11)
@@ -1,7 +1,7 @@
 import os, cocotb
 import utils
 from ram import Ram
-from sequences import reset_sequence
+from sequences import reset_sequence, start_cosim
 
 
 PROJ_DIR = utils.get_proj_dir()
@@ -17,6 +17,9 @@ async def test_fibonacci(tb):
     ram = Ram(tb.u_ram)
     ram.load_bin(f"{PROJ_DIR}/build/asm/fibonacci.bin")
 
+    # Compare against the ISS (COSIM=1)
+    start_cosim(tb, ram)
+
     # Wait for ecall
     await utils.wait_ecall(tb.u_core)
 
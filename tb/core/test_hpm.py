@@ -0,0 +1,40 @@
+import cocotb
+import utils
+from ram import Ram
+from sequences import reset_sequence
+
+
+PROJ_DIR   = utils.get_proj_dir()
+ITERATION  = 16
+BASE_DATA  = 0x1000
+INT_LCOF   = 13
+MCAUSE_INT = 1 << 31
+OF         = 1 << 31
+
+
+@cocotb.test(timeout_time=1, timeout_unit="ms")
+async def test_hpm(tb):
+    cocotb.start_soon(reset_sequence(tb))
+
+    ram = Ram(tb.u_ram)
+    ram.load_bin(f"{PROJ_DIR}/build/asm/hpm.bin")
+
+    await utils.wait_ecall(tb.u_core)
+    mul, div, amo, branch, fetch_stall, mem_stall, inhibited, low, high, scountovf, mip, mcause = \
+        ram.read_block(BASE_DATA, 12)
+
+    # One amoadd.w, lr.w and sc.w per iteration, the last bnez is not taken
+    assert mul == div == ITERATION
+    assert amo == 3 * ITERATION
+    assert branch == ITERATION - 1
+    assert fetch_stall > 0 and mem_stall > 0
+
+    # mhpmcounter9 does not count in M-mode
+    assert inhibited == 0
+
+    # mhpmcounter10 wraps from 2^64 - 2, sets its OF bit and raises LCOFIP
+    assert (high << 32 | low) == ITERATION - 2
+    assert scountovf == 1 << 10
+    assert mip & (1 << INT_LCOF)
+    assert mcause == MCAUSE_INT | INT_LCOF
+    assert tb.u_core.u_csr.mhpmevent_of.value.integer == 1 << (10 - 3)
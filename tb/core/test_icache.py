@@ -0,0 +1,49 @@
+import cocotb
+import utils
+from cache_stats import CacheStats, has_cache
+from ram import Ram
+from sequences import reset_sequence, start_cosim
+
+
+PROJ_DIR  = utils.get_proj_dir()
+ITERATION = 4
+BASE_DATA = 0x1000
+
+
+@cocotb.test(timeout_time=1, timeout_unit="ms")
+async def test_icache_fence_i(tb):
+    cocotb.start_soon(reset_sequence(tb))
+
+    ram = Ram(tb.u_ram)
+    ram.load_bin(f"{PROJ_DIR}/build/asm/fence_i.bin")
+    start_cosim(tb, ram)
+
+    stats = CacheStats(tb.u_core, "icache")
+    await utils.wait_ecall(tb.u_core)
+    stats.stop()
+
+    # The rewritten instruction is fetched again after every FENCE.I
+    assert list(ram.read_block(BASE_DATA, ITERATION)) == list(range(1, ITERATION + 1))
+    if has_cache(tb.u_core, "icache"):
+        assert stats.misses > ITERATION
+    else:
+        assert stats.hits == stats.misses == 0
+
+
+@cocotb.test(timeout_time=100, timeout_unit="ms")
+async def test_icache_loop(tb):
+    cocotb.start_soon(reset_sequence(tb))
+
+    ram = Ram(tb.u_ram)
+    ram.load_bin(f"{PROJ_DIR}/build/asm/seq_mul.bin")
+    start_cosim(tb, ram)
+
+    stats = CacheStats(tb.u_core, "icache")
+    await utils.wait_ecall(tb.u_core)
+    stats.stop()
+    stats.log(tb._log)
+
+    # The program fits in the cache, only the first fetch of each line misses
+    if has_cache(tb.u_core, "icache"):
+        assert 0 < stats.misses < 32
+        assert stats.hits > 1000 * stats.misses
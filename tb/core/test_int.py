@@ -1,12 +1,11 @@
 import os, random, cocotb
 import utils
-from cocotb.triggers import ClockCycles
+from cocotb.triggers import ClockCycles, First
 from ram import Ram
-from sequences import reset_sequence
+from sequences import reset_sequence, start_cosim
 
 
 PROJ_DIR    = utils.get_proj_dir()
-EMIT_CLK    = 500
 TIMEOUT_CLK = 1000
 
 MIE_ADDR    = 0x1000
@@ -14,6 +13,7 @@ MEIE_ADDR   = 0x1004
 U_MODE_ADDR = 0x1008
 RESULT_ADDR = 0x1010
 MIP_ADDR    = 0x1014
+LOOP_ADDR   = 0x1018  # Written by core_int when it enters its loop
 
 INT_NONE    = 0x80000000
 INT_M_EXT   = 0x80000000 + 11
@@ -21,6 +21,13 @@ MIP_NONE    = 0
 MIP_M_EXT   = (1 << 11)
 
 
+# Wait until core_int enters the loop that the interrupt must break
+async def wait_loop(tb, ram):
+    loop = cocotb.start_soon(ram.watch_write(LOOP_ADDR))
+    await First(loop, ClockCycles(tb.clk, TIMEOUT_CLK))
+    assert loop.done(), "core_int did not reach its loop"
+
+
 async def test_int_base(tb, mie=True, meie=True, u_mode=False, emit_int=True, expect_int=True):
     # Start the reset sequence
     cocotb.start_soon(reset_sequence(tb))
@@ -34,13 +41,19 @@ async def test_int_base(tb, mie=True, meie=True, u_mode=False, emit_int=True, ex
     ram.at(MEIE_ADDR).value   = meie
     ram.at(U_MODE_ADDR).value = u_mode
 
-    # Produce an interrupt
-    await ClockCycles(tb.clk, EMIT_CLK)
+    # Compare against the ISS (COSIM=1)
+    start_cosim(tb, ram)
+
+    # MIP is the last value written by the trap handler
+    done = cocotb.start_soon(ram.watch_write(MIP_ADDR))
+
+    # Produce an interrupt once the program runs its loop
+    await wait_loop(tb, ram)
 
     if emit_int:
         tb.int_m_ext.value = 1
 
-    await ClockCycles(tb.clk, TIMEOUT_CLK - EMIT_CLK)
+    await First(done, ClockCycles(tb.clk, TIMEOUT_CLK))
 
     # Verify the expected code
     assert ram.at(RESULT_ADDR).value == (INT_M_EXT if expect_int else INT_NONE)
@@ -1,13 +1,13 @@
 import os, cocotb
 import utils
 from ram import Ram
-from sequences import reset_sequence
-from cocotb.triggers import ClockCycles
+from sequences import reset_sequence, start_cosim
+from retire_trace import start_trace
+from cocotb.triggers import ClockCycles, First
 
 
 PROJ_DIR     = utils.get_proj_dir()
-POLL_CLK     = 1000
-MAX_POLL     = 100
+TIMEOUT_CLK  = 100000
 TO_HOST_ADDR = 0x1000
 
 
@@ -19,11 +19,18 @@ async def test_isa(tb, test_name):
     ram = Ram(tb.u_ram)
     ram.load_bin(f"{PROJ_DIR}/build/isa/{test_name}.bin")
 
-    # Poll the mem at 0x1000 for changes
-    for poll in range(MAX_POLL):
-        await ClockCycles(tb.clk, POLL_CLK)
-        if ram.at(TO_HOST_ADDR).value != 0:
-            break
+    # Clear the result of the previous test, a test that never writes it must fail
+    ram.at(TO_HOST_ADDR).value = 0
+
+    # Compare against the ISS (COSIM=1)
+    start_cosim(tb, ram)
+
+    # Record the retirements (TRACE=<dir>)
+    start_trace(tb.u_core, test_name)
+
+    # Wait for a non-zero write to the mem at 0x1000
+    to_host = cocotb.start_soon(ram.watch_write(TO_HOST_ADDR, lambda value: value != 0))
+    await First(to_host, ClockCycles(tb.clk, TIMEOUT_CLK))
 
     # Check the final result in mem at 0x1000
     # A value of 1 means pass, > 1 means fail
@@ -0,0 +1,81 @@
+import os, cocotb
+import utils
+from cocotb.triggers import ClockCycles, First
+from cocotb.utils import get_sim_time
+from profiler import Profiler, Symbols
+from ram import Ram
+from sequences import reset_sequence, RAM_BASE
+
+
+PROJ_DIR    = utils.get_proj_dir()
+TIMEOUT_CLK = 1000
+MIE_ADDR    = 0x1000
+MEIE_ADDR   = 0x1004
+MIP_ADDR    = 0x1014
+LOOP_ADDR   = 0x1018
+
+
+# Load a program with its symbols and data words, and profile it from the reset
+async def profile_base(tb, name, every=0, data={}):
+    cocotb.start_soon(reset_sequence(tb))
+
+    ram = Ram(tb.u_ram)
+    ram.load_bin(f"{PROJ_DIR}/build/asm/{name}.bin")
+    for addr, value in data.items():
+        ram.at(addr).value = value
+
+    symbols = Symbols().load(f"{PROJ_DIR}/build/asm/{name}.o", RAM_BASE)
+    profiler = Profiler(tb.u_core, every, symbols)
+    await profiler.start()
+    return ram, profiler
+
+
+@cocotb.test(timeout_time=100, timeout_unit="ms")
+async def test_profiler_retire(tb):
+    _, profiler = await profile_base(tb, "seq_mul")
+    start = get_sim_time()
+
+    await utils.wait_ecall(tb.u_core)
+    profiler.stop()
+
+    # Every cycle up to the last retirement is in the profile, most of them in the loop
+    flat  = profiler.flat()
+    total = sum(flat.values())
+    assert abs(total - (get_sim_time() - start) // profiler.period) < 64
+    assert max(flat, key=flat.get) == (3, "loop")
+    assert sum(profiler.stacks.values()) == total
+
+
+@cocotb.test(timeout_time=100, timeout_unit="ms")
+async def test_profiler_every(tb):
+    _, profiler = await profile_base(tb, "seq_mul", every=10)
+    start = get_sim_time()
+
+    await utils.wait_ecall(tb.u_core)
+    profiler.stop()
+
+    # Samples are N cycles apart, and no stacks are built
+    total = sum(profiler.flat().values())
+    assert total % 10 == 0
+    assert abs(total - (get_sim_time() - start) // profiler.period) <= 10
+    assert not profiler.stacks
+
+
+@cocotb.test()
+async def test_profiler_trap(tb):
+    # Enable mie and meie
+    ram, profiler = await profile_base(tb, "core_int", data={MIE_ADDR: 1, MEIE_ADDR: 1})
+
+    # Interrupt the loop once core_int tells it runs, at 0x1018.
+    # The handler records mip and never returns.
+    done = cocotb.start_soon(ram.watch_write(MIP_ADDR))
+    await ram.watch_write(LOOP_ADDR)
+    tb.int_m_ext.value = 1
+    await First(done, ClockCycles(tb.clk, TIMEOUT_CLK))
+    profiler.stop()
+
+    # The handler runs on top of the trapped loop in the shadow call stack
+    stacks = {(tuple(profiler.symbols.lookup(frame & 0xfffffffc) for frame in stack),
+               profiler.symbols.lookup(pc)) for stack, _, pc in profiler.stacks}
+    assert (("loop",), "_trap_hdlr") in stacks
+    assert (("loop",), "output") in stacks
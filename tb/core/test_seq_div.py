@@ -1,7 +1,8 @@
 import os, random, cocotb
 import utils
+from array import array
 from ram import Ram
-from sequences import reset_sequence
+from sequences import reset_sequence, start_cosim
 
 
 PROJ_DIR  = utils.get_proj_dir()
@@ -24,27 +25,33 @@ async def test_seq_div(tb):
     ram.load_bin(f"{PROJ_DIR}/build/asm/seq_div.bin")
 
     # Backdoor the parameters
-    all_ab = []
-    for i in range(SEQ_SIZE):
-        a = random.randint(0, 2**32 - 1)
-        b = random.randint(0, 2**32 - 1)
-        all_ab.append((a, b))
-        ram.at(BASE_A + (i << 2)).value = a
-        ram.at(BASE_B + (i << 2)).value = b
+    all_a = array('I', [random.randint(0, 2**32 - 1) for _ in range(SEQ_SIZE)])
+    all_b = array('I', [random.randint(0, 2**32 - 1) for _ in range(SEQ_SIZE)])
+    ram.write_block(BASE_A, all_a)
+    ram.write_block(BASE_B, all_b)
+
+    # Compare against the ISS (COSIM=1)
+    start_cosim(tb, ram)
 
     # Wait for ecall
     await utils.wait_ecall(tb.u_core)
 
+    # Read back the results
+    all_div  = ram.read_block(BASE_DIV,  SEQ_SIZE)
+    all_divu = ram.read_block(BASE_DIVU, SEQ_SIZE)
+    all_rem  = ram.read_block(BASE_REM,  SEQ_SIZE)
+    all_remu = ram.read_block(BASE_REMU, SEQ_SIZE)
+
     # Check the results
-    for (i, (a, b)) in enumerate(all_ab):
+    for (i, (a, b)) in enumerate(zip(all_a, all_b)):
         sa = (a - 2**32) if a >= 2**31 else a
         sb = (b - 2**32) if b >= 2**31 else b
         div,  rem  = sdiv_model(sa, sb)
         divu, remu = udiv_model(a, b)
-        assert ram.at(BASE_DIV  + (i << 2)).value.signed_integer == div
-        assert ram.at(BASE_DIVU + (i << 2)).value                == divu
-        assert ram.at(BASE_REM  + (i << 2)).value.signed_integer == rem
-        assert ram.at(BASE_REMU + (i << 2)).value                == remu
+        assert all_div[i]  == div & 0xffffffff
+        assert all_divu[i] == divu
+        assert all_rem[i]  == rem & 0xffffffff
+        assert all_remu[i] == remu
 
 
 def udiv_model(a, b):
@@ -1,7 +1,8 @@
 import os, random, cocotb
 import utils
+from array import array
 from ram import Ram
-from sequences import reset_sequence
+from sequences import reset_sequence, start_cosim
 
 
 PROJ_DIR    = utils.get_proj_dir()
@@ -24,26 +25,32 @@ async def test_seq_mul(tb):
     ram.load_bin(f"{PROJ_DIR}/build/asm/seq_mul.bin")
 
     # Backdoor the multiplicands
-    all_ab = []
-    for i in range(SEQ_SIZE):
-        a = random.randint(0, 2**32 - 1)
-        b = random.randint(0, 2**32 - 1)
-        all_ab.append((a, b))
-        ram.at(BASE_A + (i << 2)).value = a
-        ram.at(BASE_B + (i << 2)).value = b
+    all_a = array('I', [random.randint(0, 2**32 - 1) for _ in range(SEQ_SIZE)])
+    all_b = array('I', [random.randint(0, 2**32 - 1) for _ in range(SEQ_SIZE)])
+    ram.write_block(BASE_A, all_a)
+    ram.write_block(BASE_B, all_b)
+
+    # Compare against the ISS (COSIM=1)
+    start_cosim(tb, ram)
 
     # Wait for ecall
     await utils.wait_ecall(tb.u_core)
 
+    # Read back the products
+    mul    = ram.read_block(BASE_MUL,    SEQ_SIZE)
+    mulh   = ram.read_block(BASE_MULH,   SEQ_SIZE)
+    mulhsu = ram.read_block(BASE_MULHSU, SEQ_SIZE)
+    mulhu  = ram.read_block(BASE_MULHU,  SEQ_SIZE)
+
     # Check the products
-    for (i, (a, b)) in enumerate(all_ab):
+    for (i, (a, b)) in enumerate(zip(all_a, all_b)):
         sa = (a - 2**32) if a >= 2**31 else a
         sb = (b - 2**32) if b >= 2**31 else b
         muluu = a  * b
         mulsu = sa * b
         mulss = sa * sb
-        assert ram.at(BASE_MUL    + (i << 2)).value                == muluu & 0xffffffff
-        assert ram.at(BASE_MULH   + (i << 2)).value.signed_integer == mulss >> 32
-        assert ram.at(BASE_MULHSU + (i << 2)).value.signed_integer == mulsu >> 32
-        assert ram.at(BASE_MULHU  + (i << 2)).value                == muluu >> 32
+        assert mul[i]    == muluu & 0xffffffff
+        assert mulh[i]   == (mulss >> 32) & 0xffffffff
+        assert mulhsu[i] == (mulsu >> 32) & 0xffffffff
+        assert mulhu[i]  == muluu >> 32
 
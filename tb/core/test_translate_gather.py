@@ -1,7 +1,8 @@
 import os, random, cocotb
 import utils
 from ram import Ram
-from sequences import reset_sequence
+from sequences import reset_sequence, start_cosim
+from tlb_stats import TlbStats
 
 
 PROJ_DIR  = utils.get_proj_dir()
@@ -24,8 +25,9 @@ PTE_R     = (1 << 1)
 PTE_A     = (1 << 6)
 
 
-@cocotb.test(timeout_time=100, timeout_unit="ms")
-async def test_translate_gather(tb):
+# The accesses go to random words of `pages` pages, each in its own megapage,
+# one page per access by default, so that every access walks the page table
+async def translate_gather(tb, pages):
     # Start the reset sequence
     await reset_sequence(tb)
 
@@ -34,31 +36,32 @@ async def test_translate_gather(tb):
     ram.load_bin(f"{PROJ_DIR}/build/asm/translate_gather.bin")
 
     # Generate the virtual addresses.
-    # VPN[1] ranges from 0 to 1023.
-    # The rest is random, but must be 4B-aligned.
-    vaddr = []
+    # VPN[1] of page j is j, VPN[0] is random.
+    # Access i goes to page i % pages, at a random word not used by another access.
+    vpn0s   = [random.randrange(1 << 10) for _ in range(pages)]
+    offsets = [random.sample(range(PAGE_SIZE >> 2), -(-ITERATION // pages)) for _ in range(pages)]
+    page    = [i % pages for i in range(ITERATION)]
+    vaddr   = []
     for i in range(ITERATION):
-        va = (i << 22) | random.randrange(1 << 22)
+        va = (page[i] << 22) | (vpn0s[page[i]] << 12) | (offsets[page[i]][i // pages] << 2)
         va &= MASK_34 & ~MASK_2
         vaddr.append(va)
 
-    # Generate 2k random non-repeating PPNs
+    # Generate 2 * pages random non-repeating PPNs
     # from address 0x80800_000 to 0x80fff_fff.
-    # 1k will be PPNs for second-level tables.
-    # 1k will be for data.
-    random_idx = list(range(2 * ITERATION))
-    random.shuffle(random_idx)
+    # Half will be PPNs for second-level tables.
+    # Half will be for data.
+    random_idx = random.sample(range(2 * ITERATION), 2 * pages)
 
     ppns       = [(BASE_PAGE >> 12) | i for i in random_idx]
-    table_ppns = ppns[:ITERATION]
-    data_ppns  = ppns[ITERATION:]
+    table_ppns = [ppns[page[i]] for i in range(ITERATION)]
+    data_ppns  = [ppns[pages + page[i]] for i in range(ITERATION)]
 
     # Generate random data
     data = [random.randrange(1 << 32) for _ in range(ITERATION)]
 
     # Prepare the root page table
-    for i in range(ITERATION):
-        ram.at(BASE_ROOT | (i << 2)).value = (RAM_BASE >> 2) | (table_ppns[i] << 10) | PTE_V;
+    ram.write_block(BASE_ROOT, [(RAM_BASE >> 2) | (ppn << 10) | PTE_V for ppn in ppns[:pages]])
 
     # Prepare the second-level page tables
     for i in range(ITERATION):
@@ -70,13 +73,34 @@ async def test_translate_gather(tb):
         ram.at((data_ppns[i] << 12) | (vaddr[i] & MASK_12)).value = data[i]
 
     # Backdoor the virtual addresses as input
-    for i in range(ITERATION):
-        ram.at(BASE_ADDR + (i << 2)).value = vaddr[i]
+    ram.write_block(BASE_ADDR, vaddr)
+
+    # Compare against the ISS (COSIM=1)
+    start_cosim(tb, ram)
+
+    # Count the TLB hits and the page table walks
+    tlb = TlbStats(tb.u_core)
+    await tlb.start()
 
     # Wait for ecall
     await utils.wait_ecall(tb.u_core)
+    tlb.stop()
+    tlb.log(tb._log)
 
     # Check the outputs
-    for i in range(ITERATION):
-        assert ram.at(BASE_DATA + (i << 2)).value == data[i]
+    assert list(ram.read_block(BASE_DATA, ITERATION)) == data
+
+    # Every translated access either hits in the TLB or walks
+    assert tlb.hits + tlb.walks == ITERATION
 
+
+
+@cocotb.test(timeout_time=100, timeout_unit="ms")
+async def test_translate_gather(tb):
+    await translate_gather(tb, ITERATION)
+
+
+# Few enough pages to stay in the TLB, all but the first accesses hit
+@cocotb.test(timeout_time=100, timeout_unit="ms")
+async def test_translate_gather_reuse(tb):
+    await translate_gather(tb, 4)
@@ -24,6 +24,14 @@ async def reset_sequence(tb):
     tb.rst_n.value = 1
 
 
+# Wait for n cycles from a rising edge of clk. A single timer to the middle of
+# the last cycle replaces the callback per cycle of ClockCycles
+async def wait_cycles(clk, n):
+    if n > 1:
+        await Timer(round((n - 0.5) * 1e9 / CLK_FREQ), 'ns')
+    await RisingEdge(clk)
+
+
 class PlicApb(Apb):
     async def set_int_prio(self, src_id, value):
         await self.write(0x0000000 + 4 * src_id, value)
@@ -38,6 +46,9 @@ class PlicApb(Apb):
     async def set_threshold(self, tgt_id, value):
         await self.write(0x0200000 + 0x1000 * tgt_id, value)
 
+    async def set_int_enable_threshold(self, tgt_id, enable, threshold):
+        await self.write_many([0x0002000 + 0x80 * tgt_id, 0x0200000 + 0x1000 * tgt_id], [enable, threshold])
+
     async def claim(self, tgt_id):
         return await self.read(0x0200004 + 0x1000 * tgt_id)
 
@@ -79,7 +90,7 @@ class IntSource:
             # Wait for some time
             wait_time = random.randint(0, max_interval)
             if wait_time > 0:
-                await ClockCycles(self.apb.clk, wait_time)
+                await wait_cycles(self.apb.clk, wait_time)
             # Add an interrupt
             self.add()
 
@@ -95,14 +106,16 @@ class IntTarget:
 
     # Setup the target
     async def setup(self, enable_int=True, set_threshold=True):
-        if enable_int:
-            # Build a bitmap of keys in src_dict
-            enable_map = 0
-            for src_id in self.src_dict.keys():
-                enable_map |= 1 << src_id;
-            # Set the bitmap
+        # Build a bitmap of keys in src_dict
+        enable_map = 0
+        for src_id in self.src_dict.keys():
+            enable_map |= 1 << src_id;
+        # Set the bitmap and the threshold in one burst
+        if enable_int and set_threshold:
+            await self.apb.set_int_enable_threshold(self.id, enable_map, self.threshold)
+        elif enable_int:
             await self.apb.set_int_enable(self.id, enable_map)
-        if set_threshold:
+        elif set_threshold:
             await self.apb.set_threshold(self.id, self.threshold)
 
     # Start the target's handling loop
@@ -112,12 +125,12 @@ class IntTarget:
             # a target may rest between loops
             rest_time = random.randint(0, max_rest)
             if rest_time > 0:
-                await ClockCycles(self.apb.clk, rest_time)
+                await wait_cycles(self.apb.clk, rest_time)
 
-            # Wait for notification
+            # Wait for notification, without polling int_tgt every cycle
             if wait_int:
                 while self.int_tgt.value == 0:
-                    await ClockCycles(self.apb.clk, 1)
+                    await RisingEdge(self.int_tgt)
 
             # Claim an interrupt
             src_id = await self.apb.claim(self.id)
@@ -132,7 +145,7 @@ class IntTarget:
             
             # Wait for some time before clearing the interrupt
             clear_time = random.randint(min_time, max_time)
-            await ClockCycles(self.apb.clk, clear_time)
+            await wait_cycles(self.apb.clk, clear_time)
             self.history.append(source)
             source.clear(self)
 
@@ -162,5 +175,5 @@ async def run_sim(tb, sources, targets, sim_clk, add_multi=None, run_target=True
             cocotb.start_soon(tgt.start(wait_int=wait_int))
 
     # Wait for some time
-    await ClockCycles(tb.clk, sim_clk)
+    await wait_cycles(tb.clk, sim_clk)
 
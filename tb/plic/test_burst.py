@@ -0,0 +1,25 @@
+import os, random, cocotb
+from cocotb.triggers import *
+from cocotb.utils import get_sim_time
+from sequences import *
+
+
+# Back-to-back transfers: 2 cycles each, read back what was written
+@cocotb.test()
+async def test_burst(tb):
+    # Start the reset sequence
+    await reset_sequence(tb)
+    apb = PlicApb(tb, shared=False)
+    await RisingEdge(tb.clk)
+
+    addrs = [4 * (i + 1) for i in range(SRC_N)]
+    prios = [random.randint(0, (1 << PRIO_W) - 1) for _ in range(SRC_N)]
+
+    start = get_sim_time("ns")
+    await apb.write_many(addrs, prios)
+    rdata = await apb.read_many(addrs)
+    cycles = round((get_sim_time("ns") - start) * 1e-9 * CLK_FREQ)
+
+    assert rdata == prios
+    assert cycles == 2 * 2 * SRC_N
+
@@ -2,6 +2,9 @@ import os, cocotb
 import utils
 from ram import Ram
 from uart import *
+from cpi_stack import start_cpi_stack
+from profiler import start_profile
+from retire_trace import start_trace
 from sequences import reset_sequence
 
 
@@ -17,6 +20,15 @@ async def demo_echo(tb):
     ram = Ram(tb.dut.u_ram)
     ram.load_bin(f"{PROJ_DIR}/build/c/demo_echo.bin")
 
+    # Record the retirements (TRACE=<dir>)
+    start_trace(tb.dut.u_core, "demo_echo")
+
+    # Profile the program (PROFILE=<dir>)
+    start_profile(tb.dut.u_core, "demo_echo", [f"{PROJ_DIR}/build/c/demo_echo.o"])
+
+    # Count the cycles per category (CPI_STACK=<dir>)
+    start_cpi_stack(tb.dut.u_core, "demo_echo")
+
     # Wait for CPU setup
     await ClockCycles(tb.clk, 200)
 
@@ -3,11 +3,26 @@ import utils
 from cocotb.triggers import *
 from ram import Ram
 from uart import *
+from checkpoint import Checkpoint, Console
+from fast_forward import FastForward
+from iss import COSIM, Cosim
+from cpi_stack import start_cpi_stack
+from profiler import start_profile
+from retire_trace import start_trace
 from sequences import reset_sequence
 
 
 PROJ_DIR = utils.get_proj_dir()
 
+# Checkpoint options
+CHECKPOINT_SAVE    = os.environ.get("CHECKPOINT_SAVE")      # File to save the checkpoint to
+CHECKPOINT_AT      = os.environ.get("CHECKPOINT_AT")        # Save after this many cycles
+CHECKPOINT_STRING  = os.environ.get("CHECKPOINT_STRING")    # Save when the console prints this
+CHECKPOINT_RESTORE = os.environ.get("CHECKPOINT_RESTORE")   # File to restore the checkpoint from
+
+# Instructions run on the ISS before the RTL takes over
+FAST_FORWARD       = int(os.environ.get("FAST_FORWARD", "0"))
+
 
 @cocotb.test()
 async def demo_linux(tb):
@@ -16,22 +31,63 @@ async def demo_linux(tb):
 
     ram = Ram(tb.dut.u_ram)
     rom = Ram(tb.dut.u_rom)
+    checkpoint = Checkpoint(tb, tb.clk, [ram, rom])
+
+    # The checkpoint needs the words written by the program and the loaders, the
+    # device tree in the ROM included
+    if CHECKPOINT_SAVE:
+        ram.track_writes()
+        rom.track_writes()
+
+    if CHECKPOINT_RESTORE:
+        # Continue from a previous run
+        state = await checkpoint.restore(CHECKPOINT_RESTORE)
+    elif FAST_FORWARD:
+        # Boot on the ISS, then hand the state over to the RTL
+        ff = FastForward(tb, ram, rom)
+        ff.load_bin(rom, f"{PROJ_DIR}/build/dt/riscv_machine.dtb")
+        ff.load_bin(ram, f"{PROJ_DIR}/build/fw_jump.bin")
+        ff.iss.regs[10] = 0             # Hart ID
+        ff.iss.regs[11] = 0xf0000000    # Device tree blob
+        ff.run(FAST_FORWARD)
+        await ff.handoff()
+        if COSIM:
+            Cosim(tb.dut.u_core, ff.iss).start()
+        state = {"console": ff.uart.text}
+    else:
+        # Load Device tree
+        rom.load_bin(f"{PROJ_DIR}/build/dt/riscv_machine.dtb")
 
-    # Load Device tree
-    rom.load_bin(f"{PROJ_DIR}/build/dt/riscv_machine.dtb")
+        # Load OpenSBI firmware
+        ram.load_bin(f"{PROJ_DIR}/build/fw_jump.bin")
 
-    # Load OpenSBI firmware
-    ram.load_bin(f"{PROJ_DIR}/build/fw_jump.bin")
+        # Backdoor initial register value
+        tb.dut.u_core.u_reg_file.reg_mem[10].value = 0            # Hart ID
+        tb.dut.u_core.u_reg_file.reg_mem[11].value = 0xf0000000   # Device tree blob
+        state = {}
 
-    # Backdoor initial register value
-    tb.dut.u_core.u_reg_file.reg_mem[10].value = 0            # Hart ID
-    tb.dut.u_core.u_reg_file.reg_mem[11].value = 0xf0000000   # Device tree blob
+    # Record the retirements (TRACE=<dir>)
+    start_trace(tb.dut.u_core, "demo_linux")
+
+    # Profile the boot (PROFILE=<dir>), against the symbols of OpenSBI and the kernel
+    start_profile(tb.dut.u_core, "demo_linux", [f"{PROJ_DIR}/build/fw_jump.elf", f"{PROJ_DIR}/build/System.map"])
+
+    # Count the cycles per category (CPI_STACK=<dir>)
+    start_cpi_stack(tb.dut.u_core, "demo_linux")
 
     # Open virtual terminal for UART
     uart = Uart(tb)
+    console = Console(uart, state.get("console", ""))
     cocotb.start_soon(uart.open_pty())
 
+    # Save the checkpoint at the requested cycle or console output
+    if CHECKPOINT_SAVE:
+        if CHECKPOINT_STRING:
+            await console.wait_for(CHECKPOINT_STRING)
+        else:
+            await ClockCycles(tb.clk, int(CHECKPOINT_AT or 0))
+        await checkpoint.save(CHECKPOINT_SAVE, {"console": console.text})
+
     # Await to infinity
     while True:
         await ClockCycles(tb.clk, 10000)
-
@@ -0,0 +1,221 @@
+import zlib, cocotb
+import utils
+from ram import Ram
+from bench_probe import report
+from cpi_stack import start_cpi_stack
+from profiler import start_profile
+from sequences import reset_sequence
+
+
+PROJ_DIR   = utils.get_proj_dir()
+CLK_FREQ   = 16 * 115200    # Clock of tb_top
+MAILBOX    = 0x00100000     # __mailbox of prog/c/link.ld
+BENCH_DONE = 0x600dbeef
+MASK       = 0xffffffff
+
+
+# Pseudo-random inputs of the programs, as lcg() of bench.h
+def lcg(x):
+    return (x * 1664525 + 1013904223) & MASK
+
+
+def signed(x):
+    return x - (1 << 32) if x & 0x80000000 else x
+
+
+def hash_words(checksum, words):
+    for word in words:
+        checksum = (checksum * 31 + word) & MASK
+    return checksum
+
+
+# Expected checksums, computed the same way as the programs
+def crc_checksum(iterations=4, size=256):
+    seed, buf = 1, []
+    for _ in range(size):
+        seed = lcg(seed)
+        buf.append(seed >> 24)
+    return zlib.crc32(bytes(buf) * iterations)
+
+
+def sort_checksum(iterations=8, size=64):
+    seed, checksum = 1, 0
+    for _ in range(iterations):
+        data = []
+        for _ in range(size):
+            seed = lcg(seed)
+            data.append(seed)
+        checksum = hash_words(checksum, sorted(data))
+    return checksum
+
+
+def matmul_checksum(iterations=2, n=16):
+    seed, checksum = 1, 0
+    for _ in range(iterations):
+        a = [[0] * n for _ in range(n)]
+        b = [[0] * n for _ in range(n)]
+        for i in range(n):
+            for j in range(n):
+                seed = lcg(seed)
+                a[i][j] = signed(seed) >> 20
+                seed = lcg(seed)
+                b[i][j] = signed(seed) >> 20
+        checksum = hash_words(checksum, [sum(a[i][k] * b[k][j] for k in range(n))
+                                         for i in range(n) for j in range(n)])
+    return checksum
+
+
+def string_checksum(iterations=8, length=128):
+    seed, checksum = 1, 0
+    for it in range(iterations):
+        src = ""
+        for _ in range(length):
+            seed = lcg(seed)
+            src += chr(ord("a") + (seed >> 28))
+        dst  = src[:it * 8] + src[it * 8:].upper()
+        diff = next((i for i in range(length) if src[i] != dst[i]), length)
+        cmp  = ord(src[diff]) - ord(dst[diff]) if diff < length else 0
+        checksum = hash_words(checksum, [len(dst), cmp, dst.count(chr(ord("A") + it))])
+    return checksum
+
+
+def crc16(crc, value):
+    crc ^= value & 0xffff
+    for _ in range(16):
+        crc = (crc >> 1) ^ (0xa001 if crc & 1 else 0)
+    return crc
+
+
+# Integers, decimals and invalid tokens of a comma separated input, as scan() of bench_mix.c
+def scan(text):
+    counts = {"int": 0, "decimal": 0, "invalid": 0}
+    for token in text.split(","):
+        if not token:
+            continue
+        if all(c.isdigit() for c in token):
+            counts["int"] += 1
+        elif token.count(".") == 1 and token[0].isdigit() and all(c.isdigit() for c in token.replace(".", "")):
+            counts["decimal"] += 1
+        else:
+            counts["invalid"] += 1
+    return counts["int"] | counts["decimal"] << 8 | counts["invalid"] << 16
+
+
+def mix_checksum(iterations=4, nodes=32, n=6, length=96):
+    seed   = 1
+    values = []
+    for _ in range(nodes):
+        seed = lcg(seed)
+        values.append(seed >> 16)
+    a = [[0] * n for _ in range(n)]
+    b = [[0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(n):
+            seed = lcg(seed)
+            a[i][j] = signed(seed) >> 24
+            seed = lcg(seed)
+            b[i][j] = signed(seed) >> 24
+    text = []
+    for _ in range(length):
+        seed = lcg(seed)
+        r = seed >> 28
+        text.append(str(r) if r < 10 else "," if r < 13 else "." if r < 15 else "x")
+
+    crc = 0
+    for it in range(iterations):
+        # The list is reversed in place at every iteration
+        values.reverse()
+        hash = 0
+        for value in values:
+            hash = (hash * 3 + value) & MASK
+        crc = crc16(crc16(crc, hash), hash >> 16)
+
+        total = sum(a[i][k] * b[k][j] for i in range(n) for j in range(n) for k in range(n))
+        crc = crc16(crc, total)
+        a[it][it] += 1
+
+        text[it * 13] = ","
+        tokens = scan("".join(text))
+        crc = crc16(crc16(crc, tokens), tokens >> 16)
+    return crc
+
+
+def ptr_chase_checksum(iterations=32, pages=64):
+    # The shuffle of the pages draws pages - 1 values first
+    seed = 1
+    for _ in range(pages - 1):
+        seed = lcg(seed)
+    values = []
+    for _ in range(pages):
+        seed = lcg(seed)
+        values.append(seed)
+    return hash_words(0, values * iterations)
+
+
+def amo_checksum(iterations=256):
+    return sum(range(iterations)) + iterations + 2 * iterations
+
+
+# Run a benchmark of prog/c to its ecall, check its checksum, then log and
+# report its results (BENCH=<file>, see tb/common/bench.py)
+async def run_bench(tb, name, checksum):
+    # Start the reset sequence
+    await reset_sequence(tb)
+
+    # Backdoor some instructions, and clear the mailbox of the previous test
+    ram = Ram(tb.dut.u_ram)
+    ram.load_bin(f"{PROJ_DIR}/build/c/{name}.bin")
+    ram.write_block(MAILBOX, [0] * 5)
+
+    # Profile the program (PROFILE=<dir>)
+    start_profile(tb.dut.u_core, name, [f"{PROJ_DIR}/build/c/{name}.o"])
+
+    # Count the cycles per category (CPI_STACK=<dir>)
+    start_cpi_stack(tb.dut.u_core, name)
+
+    await utils.wait_ecall(tb.dut.u_core)
+
+    done, iterations, cycles, instret, result = ram.read_block(MAILBOX, 5)
+    assert done == BENCH_DONE
+    assert result == checksum
+
+    cpi  = cycles / instret
+    rate = iterations * CLK_FREQ / cycles
+    tb._log.info(f"{name}: {iterations} iterations, {cycles} cycles, {instret} instructions, "
+                 f"CPI {cpi:.3f}, {rate:.1f} iterations/s at {CLK_FREQ / 1e6:.3f} MHz")
+    report(iterations=iterations, cycles=cycles, instret=instret, cpi=cpi, iterations_per_s=rate)
+
+
+@cocotb.test(timeout_time=1000, timeout_unit="ms")
+async def test_bench_crc(tb):
+    await run_bench(tb, "bench_crc", crc_checksum())
+
+
+@cocotb.test(timeout_time=1000, timeout_unit="ms")
+async def test_bench_sort(tb):
+    await run_bench(tb, "bench_sort", sort_checksum())
+
+
+@cocotb.test(timeout_time=1000, timeout_unit="ms")
+async def test_bench_matmul(tb):
+    await run_bench(tb, "bench_matmul", matmul_checksum())
+
+
+@cocotb.test(timeout_time=1000, timeout_unit="ms")
+async def test_bench_string(tb):
+    await run_bench(tb, "bench_string", string_checksum())
+
+
+@cocotb.test(timeout_time=1000, timeout_unit="ms")
+async def test_bench_mix(tb):
+    await run_bench(tb, "bench_mix", mix_checksum())
+
+
+@cocotb.test(timeout_time=1000, timeout_unit="ms")
+async def test_bench_ptr_chase(tb):
+    await run_bench(tb, "bench_ptr_chase", ptr_chase_checksum())
+
+
+@cocotb.test(timeout_time=1000, timeout_unit="ms")
+async def test_bench_amo(tb):
+    await run_bench(tb, "bench_amo", amo_checksum())
@@ -0,0 +1,62 @@
+import os, cocotb
+import utils
+from ram import Ram
+from uart import *
+from checkpoint import Checkpoint
+from sequences import reset_sequence
+
+
+PROJ_DIR   = utils.get_proj_dir()
+CHECKPOINT = f"{PROJ_DIR}/build/checkpoint/test_timer.ckpt"
+SAVE_AT    = 40     # Characters printed before the checkpoint
+MESSAGE    = ''.join(chr(i) for i in range(256))
+ROM_DATA   = bytes(range(256))      # Stands for the device tree of demo_linux
+
+
+@cocotb.test(timeout_time=200, timeout_unit="ms")
+async def test_checkpoint_save(tb):
+    # Start the reset sequence
+    await reset_sequence(tb)
+
+    # The checkpoint holds the RAM and ROM words written since the start
+    ram = Ram(tb.dut.u_ram)
+    rom = Ram(tb.dut.u_rom)
+    ram.track_writes()
+    rom.track_writes()
+    ram.load_bin(f"{PROJ_DIR}/build/c/test_timer.bin")
+    rom.write_bytes(0, ROM_DATA)
+
+    # Wait for CPU setup
+    await ClockCycles(tb.clk, 100)
+
+    # Save in the middle of the message
+    uart = Uart(tb)
+    tx_msg = await uart.read_str(SAVE_AT)
+    os.makedirs(os.path.dirname(CHECKPOINT), exist_ok=True)
+    await Checkpoint(tb, tb.clk, [ram, rom]).save(CHECKPOINT, {"console": tx_msg})
+
+    # The run goes on after the save
+    tx_msg += await uart.read_str(len(MESSAGE) - SAVE_AT)
+    assert tx_msg == MESSAGE
+
+    # Leave a zeroed RAM and ROM for the restore, like a fresh simulation
+    for mem in (ram, rom):
+        mem.clear_dirty()
+        mem.stop_tracking()
+
+
+@cocotb.test(timeout_time=200, timeout_unit="ms")
+async def test_checkpoint_restore(tb):
+    # Continue from the checkpoint of the previous test
+    ram = Ram(tb.dut.u_ram)
+    rom = Ram(tb.dut.u_rom)
+    state = await Checkpoint(tb, tb.clk, [ram, rom]).restore(CHECKPOINT)
+
+    # The ROM is back, although the program never touches it
+    words = [int.from_bytes(ROM_DATA[i:i + 4], "little") for i in range(0, len(ROM_DATA), 4)]
+    assert list(rom.read_block(0, len(words))) == words
+
+    # The rest of the message follows the part printed before the save
+    uart = Uart(tb)
+    tx_msg = state["console"] + await uart.read_str(len(MESSAGE) - SAVE_AT)
+    assert tx_msg == MESSAGE
@@ -0,0 +1,89 @@
+import os, struct, cocotb
+import utils
+from array import array
+from cocotb.triggers import ReadOnly
+from ram import Ram
+from elf import Elf, SHT_SYMTAB
+from sequences import reset_sequence
+
+
+PROJ_DIR = utils.get_proj_dir()
+ROM_BASE = 0xf0000000
+
+
+@cocotb.test()
+async def test_elf(tb):
+    # Start the reset sequence
+    await reset_sequence(tb)
+
+    # Load the ELF of a program, its segments are linked at the start of the RAM
+    ram = Ram(tb.dut.u_ram)
+    ram.load_bin(f"{PROJ_DIR}/build/c/test_timer.o")
+    await ReadOnly()
+
+    # The RAM must hold the same words as the flat binary
+    words = array('I')
+    with open(f"{PROJ_DIR}/build/c/test_timer.bin", "rb") as file:
+        data = file.read()
+    words.frombytes(data.ljust((len(data) + 3) & ~3, b'\x00'))
+    assert ram.read_block(0, len(words)) == words
+
+
+@cocotb.test()
+async def test_elf_outside(tb):
+    # Start the reset sequence
+    await reset_sequence(tb)
+
+    # Move the segments of the ELF to the ROM, they must not be wrapped into the RAM
+    with open(f"{PROJ_DIR}/build/c/test_timer.o", "rb") as file:
+        data = bytearray(file.read())
+    elf = Elf(bytes(data))
+    for i in range(elf.e_phnum):
+        off = elf.e_phoff + i * elf.e_phentsize
+        paddr = int.from_bytes(data[off + 12:off + 16], "little")
+        data[off + 12:off + 16] = (ROM_BASE + paddr).to_bytes(4, "little")
+    filename = f"{PROJ_DIR}/build/c/test_timer_rom.o"
+    with open(filename, "wb") as file:
+        file.write(data)
+
+    ram = Ram(tb.dut.u_ram)
+    try:
+        ram.load_bin(filename)
+    except AssertionError:
+        pass
+    else:
+        assert False, "ELF segments outside of the RAM were loaded"
+    finally:
+        os.remove(filename)
+
+
+@cocotb.test()
+async def test_elf_long_symbol(tb):
+    # Rename the symbol of main with a name longer than any fixed read of the string
+    # table, as the mangled names of C++ or Rust can be
+    with open(f"{PROJ_DIR}/build/c/test_timer.o", "rb") as file:
+        data = bytearray(file.read())
+    elf  = Elf(bytes(data))
+    main = [sym for sym in elf.symbols() if sym[2] == "main"]
+    assert len(main) == 1, "No main symbol in the ELF"
+    name = "_ZN4main" + "x" * 500
+
+    # Append a new string table with the long name at the end of the file
+    for i in range(elf.e_shnum):
+        off = elf.e_shoff + i * elf.e_shentsize
+        (sh_type, sh_offset, sh_size, sh_link, sh_entsize) = struct.unpack_from("<I8xIII8xI", data, off + 4)
+        if sh_type != SHT_SYMTAB:
+            continue
+        str_hdr = elf.e_shoff + sh_link * elf.e_shentsize
+        (str_off, str_size) = struct.unpack_from("<II", data, str_hdr + 16)
+        for sym in range(sh_offset, sh_offset + sh_size, sh_entsize):
+            st_name = struct.unpack_from("<I", data, sym)[0]
+            if data[str_off + st_name:str_off + st_name + 5] == b"main\0":
+                struct.pack_into("<I", data, sym, str_size)
+        strtab = data[str_off:str_off + str_size] + name.encode() + b"\0"
+        struct.pack_into("<II", data, str_hdr + 16, len(data), len(strtab))
+        data += strtab
+
+    symbols = list(Elf(bytes(data)).symbols())
+    assert (main[0][0], main[0][1], name) in symbols
+    assert not [sym for sym in symbols if sym[2] == "main"]
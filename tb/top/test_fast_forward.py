@@ -0,0 +1,39 @@
+import os, cocotb
+import utils
+from ram import Ram
+from uart import *
+from fast_forward import FastForward
+from iss import COSIM, Cosim
+from sequences import reset_sequence
+
+
+PROJ_DIR = utils.get_proj_dir()
+
+FAST_FORWARD = 20000    # Instructions run on the ISS before the RTL takes over
+
+
+@cocotb.test(timeout_time=200, timeout_unit="ms")
+async def test_fast_forward(tb):
+    # Start the reset sequence
+    await reset_sequence(tb)
+
+    # Run the start of the timer test on the ISS
+    ram = Ram(tb.dut.u_ram)
+    rom = Ram(tb.dut.u_rom)
+    ff = FastForward(tb, ram, rom)
+    ff.load_bin(ram, f"{PROJ_DIR}/build/c/test_timer.bin")
+    ff.run(FAST_FORWARD)
+    await ff.handoff()
+
+    # The ISS follows the RTL from the hand-off (COSIM=1)
+    if COSIM:
+        Cosim(tb.dut.u_core, ff.iss).start()
+
+    # The RTL continues the message where the ISS stopped
+    sent = ff.uart.text
+    assert 0 < len(sent) < 256, f"{len(sent)} characters sent by the ISS"
+    uart = Uart(tb)
+    tx_msg = await uart.read_str(256 - len(sent))
+
+    # Verify the message (256 bytes from 0 to 255)
+    assert sent + tx_msg == ''.join(chr(i) for i in range(256))
@@ -2,6 +2,8 @@ import os, cocotb
 import utils
 from ram import Ram
 from uart import *
+from cpi_stack import start_cpi_stack
+from profiler import start_profile
 from sequences import reset_sequence
 
 
@@ -17,6 +19,12 @@ async def test_timer(tb):
     ram = Ram(tb.dut.u_ram)
     ram.load_bin(f"{PROJ_DIR}/build/c/test_timer.bin")
 
+    # Profile the program (PROFILE=<dir>)
+    start_profile(tb.dut.u_core, "test_timer", [f"{PROJ_DIR}/build/c/test_timer.o"])
+
+    # Count the cycles per category (CPI_STACK=<dir>)
+    start_cpi_stack(tb.dut.u_core, "test_timer")
+
     # Wait for CPU setup
     await ClockCycles(tb.clk, 100)
 
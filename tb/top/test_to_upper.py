@@ -2,6 +2,8 @@ import os, cocotb
 import utils
 from ram import Ram
 from uart import *
+from cpi_stack import start_cpi_stack
+from profiler import start_profile
 from sequences import reset_sequence
 
 
@@ -25,6 +27,12 @@ async def test_to_upper(tb, bin_name="test_to_upper"):
     ram = Ram(tb.dut.u_ram)
     ram.load_bin(f"{PROJ_DIR}/build/c/{bin_name}.bin")
 
+    # Profile the program (PROFILE=<dir>)
+    start_profile(tb.dut.u_core, bin_name, [f"{PROJ_DIR}/build/c/{bin_name}.o"])
+
+    # Count the cycles per category (CPI_STACK=<dir>)
+    start_cpi_stack(tb.dut.u_core, bin_name)
+
     # Wait for CPU setup
     await ClockCycles(tb.clk, 500)
 
@@ -6,7 +6,7 @@ from apb import Apb
 
 BAUD_RATE = 115200
 CLK_FREQ  = BAUD_RATE * 16
-POLL_INTV = 100     # Poll interval to check for status (in clk)
+POLL_INTV = 100     # Poll interval to check for status (in clk), see UartApb
 
 
 # Reset
@@ -23,19 +23,75 @@ async def reset_sequence(tb):
     tb.rst_n.value = 1
 
 
+# Without poll_intv, the waits for THR empty and data ready enable their
+# interrupt on top of the IER of the test and sleep until uart_int rises,
+# LSR is polled every poll_intv cycles otherwise
 class UartApb(Apb):
+    def __init__(self, tb, shared=True, poll_intv=None):
+        super().__init__(tb, shared=shared)
+        self.uart_int  = tb.uart_int
+        self.poll_intv = poll_intv
+        self.lcr       = 0
+        self.ier       = 0
+
+
+    # Keep track of LCR and IER for the interrupt waits, when the writes are
+    # issued so that concurrent writes update them in the order of the bus
+    def _track(self, addr, wdata):
+        if addr == REG_LCR:
+            self.lcr = wdata
+        elif addr == REG_IER and not self.lcr & LCR_DLAB:
+            self.ier = wdata
+
+
+    async def write_byte(self, addr, wdata, expect_err=False):
+        self._track(addr, wdata)
+        await super().write_byte(addr, wdata, expect_err=expect_err)
+
+
+    async def write_byte_many(self, addrs, wdata, expect_err=False):
+        for addr, data in zip(addrs, wdata):
+            self._track(addr, data)
+        await super().write_byte_many(addrs, wdata, expect_err=expect_err)
+
+
+    # Wait until LSR has one of the bits of lsr_mask, returns LSR
+    async def wait_lsr(self, lsr_mask, ier_bit):
+        lsr = await self.read_byte(REG_LSR)
+        if lsr & lsr_mask:
+            return lsr
+
+        if self.poll_intv is not None:
+            while not lsr & lsr_mask:
+                await ClockCycles(self.clk, self.poll_intv)
+                lsr = await self.read_byte(REG_LSR)
+            return lsr
+
+        added = not self.ier & ier_bit
+        if added:
+            await self.write_byte(REG_IER, self.ier | ier_bit)
+        while True:
+            if self.uart_int.value == 0:
+                await RisingEdge(self.uart_int)
+            lsr = await self.read_byte(REG_LSR)
+            if lsr & lsr_mask:
+                break
+            # Another interrupt holds uart_int high
+            await First(FallingEdge(self.uart_int), ClockCycles(self.clk, POLL_INTV))
+        if added:
+            await self.write_byte(REG_IER, self.ier & ~ier_bit)
+        return lsr
+
+
     # Register setup
     async def line_setup(self, baud_rate=BAUD_RATE, word_len=WordLength.WORD_8, parity_mode=ParityMode.NONE, stop_mode=StopMode.SINGLE):
         # Calculate the div_const
         div_const = round(CLK_FREQ / (16 * baud_rate))
 
-        # Set the div_const
-        await self.write_byte(REG_LCR, LCR_DLAB)   # Enable DLAB
-        await self.write_byte(REG_DLL, div_const & 0xff)
-        await self.write_byte(REG_DLM, (div_const >> 8) & 0xff)
-
-        # Set LCR
-        await self.write_byte(REG_LCR, parity_mode.value | stop_mode.value | word_len.value)
+        # Set the div_const with DLAB enabled, then LCR
+        await self.write_byte_many(
+                [REG_LCR, REG_DLL, REG_DLM, REG_LCR],
+                [LCR_DLAB, div_const & 0xff, (div_const >> 8) & 0xff, parity_mode.value | stop_mode.value | word_len.value])
 
 
     async def fifo_setup(self, enable=False, trigger_level=TriggerLevel.TRIG_1):
@@ -45,14 +101,8 @@ class UartApb(Apb):
 
     # Write a character
     async def send_char(self, c):
-        while True:
-            lsr = await self.read_byte(REG_LSR)
-            thr_empty = (lsr & LSR_THR_EMPTY) != 0
-            if (thr_empty):
-                await self.write_byte(REG_THR, ord(c))
-                return
-            else:
-                await ClockCycles(self.clk, POLL_INTV)
+        await self.wait_lsr(LSR_THR_EMPTY, IER_THR_EMPTY)
+        await self.write_byte(REG_THR, ord(c))
 
 
     # Write a string
@@ -61,18 +111,14 @@ class UartApb(Apb):
             await self.send_char(c)
 
 
-    # Read a character
+    # Read a character, or None without data if poll is False
     async def recv_char(self, poll=True):
-        while True:
-            lsr = await self.read_byte(REG_LSR)
-            data_ready = (lsr & LSR_DATA_READY) != 0
-            if (data_ready):
-                data = await self.read_byte(REG_RHR)
-                return chr(data)
-            else:
-                if not poll:
-                    return None
-                await ClockCycles(self.clk, POLL_INTV)
+        if poll:
+            await self.wait_lsr(LSR_DATA_READY, IER_RX_DATA_READY)
+        elif not await self.read_byte(REG_LSR) & LSR_DATA_READY:
+            return None
+        data = await self.read_byte(REG_RHR)
+        return chr(data)
 
 
     # Read a string
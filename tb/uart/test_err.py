@@ -20,7 +20,7 @@ async def wait_for_line_stat(tb, apb):
 async def test_overrun_err(tb, fifo_enable=False):
     # Start the reset sequence
     await reset_sequence(tb)
-    apb = UartApb(tb)
+    apb = UartApb(tb, shared=False)
 
     # Register setup
     await apb.line_setup()
@@ -57,7 +57,7 @@ async def test_overrun_err_fifo(tb):
 async def test_parity_err(tb, parity_mode=ParityMode.ODD):
     # Start the reset sequence
     await reset_sequence(tb)
-    apb = UartApb(tb)
+    apb = UartApb(tb, shared=False)
 
     # Register setup
     await apb.line_setup(parity_mode=parity_mode)
@@ -84,7 +84,7 @@ async def test_parity_err(tb, parity_mode=ParityMode.ODD):
 async def test_frame_err(tb):
     # Start the reset sequence
     await reset_sequence(tb)
-    apb = UartApb(tb)
+    apb = UartApb(tb, shared=False)
 
     # Register setup
     await apb.line_setup()
@@ -111,7 +111,7 @@ async def test_frame_err(tb):
 async def test_break_int(tb):
     # Start the reset sequence
     await reset_sequence(tb)
-    apb = UartApb(tb)
+    apb = UartApb(tb, shared=False)
 
     # Register setup
     await apb.line_setup()
@@ -137,7 +137,7 @@ async def test_break_int(tb):
 async def test_fifo_err(tb):
     # Start the reset sequence
     await reset_sequence(tb)
-    apb = UartApb(tb)
+    apb = UartApb(tb, shared=False)
 
     # Register setup
     await apb.line_setup()
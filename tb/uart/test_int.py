@@ -15,7 +15,7 @@ def split_into_chunks(s, chunk_size=16):
 async def test_tx_int(tb):
     # Start the reset sequence
     await reset_sequence(tb)
-    apb = UartApb(tb)
+    apb = UartApb(tb, shared=False)
 
     # Register setup
     await apb.line_setup()
@@ -49,7 +49,7 @@ async def test_tx_int(tb):
 async def test_rx_int(tb):
     # Start the reset sequence
     await reset_sequence(tb)
-    apb = UartApb(tb)
+    apb = UartApb(tb, shared=False)
 
     # Register setup
     await apb.line_setup()
@@ -82,7 +82,7 @@ async def test_rx_int(tb):
 async def test_tx_int_fifo(tb):
     # Start the reset sequence
     await reset_sequence(tb)
-    apb = UartApb(tb)
+    apb = UartApb(tb, shared=False)
 
     # Register setup
     await apb.line_setup()
@@ -119,7 +119,7 @@ async def test_tx_int_fifo(tb):
 async def test_rx_int_fifo(tb):
     # Start the reset sequence
     await reset_sequence(tb)
-    apb = UartApb(tb)
+    apb = UartApb(tb, shared=False)
 
     # Register setup
     await apb.line_setup()
@@ -7,10 +7,10 @@ from uart import *
 MSG = "Lorem ipsum dolor sit amet, consectetur adipiscing elit."
 
 
-async def test_tx(tb, fifo_enable=False, baud_rate=115200, word_len=WordLength.WORD_8, parity_mode=ParityMode.NONE):
+async def test_tx(tb, fifo_enable=False, baud_rate=115200, word_len=WordLength.WORD_8, parity_mode=ParityMode.NONE, poll_intv=None):
     # Start the reset sequence
     await reset_sequence(tb)
-    apb = UartApb(tb)
+    apb = UartApb(tb, shared=False, poll_intv=poll_intv)
 
     # Register setup
     await apb.line_setup(baud_rate=baud_rate, word_len=word_len, parity_mode=parity_mode)
@@ -28,10 +28,10 @@ async def test_tx(tb, fifo_enable=False, baud_rate=115200, word_len=WordLength.W
     assert tx_msg == word_len.cast_str(MSG)
 
 
-async def test_rx(tb, fifo_enable=False, baud_rate=115200, word_len=WordLength.WORD_8, parity_mode=ParityMode.NONE):
+async def test_rx(tb, fifo_enable=False, baud_rate=115200, word_len=WordLength.WORD_8, parity_mode=ParityMode.NONE, poll_intv=None):
     # Start the reset sequence
     await reset_sequence(tb)
-    apb = UartApb(tb)
+    apb = UartApb(tb, shared=False, poll_intv=poll_intv)
 
     # Register setup
     await apb.line_setup(baud_rate=baud_rate, word_len=word_len, parity_mode=parity_mode)
@@ -69,6 +69,16 @@ async def test_rx_fifo(tb):
     await test_rx(tb, fifo_enable=True)
 
 
+@cocotb.test(timeout_time=10, timeout_unit="ms")
+async def test_tx_poll(tb):
+    await test_tx(tb, poll_intv=POLL_INTV)
+
+
+@cocotb.test(timeout_time=10, timeout_unit="ms")
+async def test_rx_poll(tb):
+    await test_rx(tb, poll_intv=POLL_INTV)
+
+
 @cocotb.test(timeout_time=20, timeout_unit="ms")
 async def test_tx_slow(tb):
     await test_tx(tb, baud_rate=38400)